@@ -23,7 +23,8 @@ from .utils import (
     fmt_uncertainty, identity,
     rescale_prob, fmt_confidence_interval,
     load_json, save_json, get_label,
-    quadratic
+    quadratic, histogram_merge, histogram_quantile,
+    pattern_histogram_add, pattern_histogram_merge, pattern_histogram_arrays
 )
 
 Numerical = Union[Iterable, float, int]
@@ -174,6 +175,7 @@ class Analysis:
         self.calculate_total_error_rates()
         self.calculate_word_error_rates()
         self.calculate_single_qubit_error_rates()
+        self.calculate_decoder_stats()
         self.assign_labels()
         self.reorder_columns()
 
@@ -241,6 +243,10 @@ class Analysis:
         drop_columns = [
             'effective_error', 'codespace', 'success', 'results_file'
         ]
+        drop_columns += [
+            column for column in ['decoder_stats']
+            if column in self._results.columns
+        ]
         data = {
             'trunc_results': {
                 sector: self.trunc_results[sector].drop(
@@ -453,18 +459,37 @@ class Analysis:
         # grouped_df = self.raw.groupby(self.INPUT_KEYS)
 
         # Columns for which grouped values are to be summed.
+        # Files written before budgets were counted have no over-budget
+        # shots.
         added_columns = grouped_df[[
             'wall_time', 'n_trials'
         ]].sum()
+        for column in ['n_budget_exceeded', 'n_budget_exceeded_fail']:
+            if column in self.raw.columns:
+                added_columns[column] = grouped_df[column].sum()
+            else:
+                added_columns[column] = 0
 
         # Columns for which grouped entries are to be concantenated np arrays.
         concat_columns = grouped_df[[
             'effective_error', 'success', 'codespace'
         ]].aggregate(lambda x: np.concatenate(x.values))
 
+        # Histograms of effective errors, merged across files.
+        for column in ['effective_error_counts', 'codespace_fail_counts']:
+            concat_columns[column] = grouped_df[column].aggregate(
+                lambda x: pattern_histogram_merge(*x.values)
+            )
+
         # Columns to be grouped and turned into lists.
         list_columns = grouped_df[['results_file']].aggregate(list)
 
+        # Histograms of decoding statistics, merged across files.
+        if 'decoder_stats' in self.raw.columns:
+            list_columns['decoder_stats'] = grouped_df[
+                'decoder_stats'
+            ].aggregate(merge_decoder_stats)
+
         remaining_columns = grouped_df[
             ['code', 'error_model', 'decoder', 'method']
         ].first()
@@ -477,7 +502,8 @@ class Analysis:
 
         # Count the number of fails, later used for error bars.
         self._results['n_fail'] = (
-            self._results['n_trials'] - self._results['success'].apply(sum)
+            self._results['n_trials']
+            - self._results['effective_error_counts'].apply(count_successes)
         )
 
         self._results.drop(
@@ -534,7 +560,10 @@ class Analysis:
         estimates_list = []
         uncertainties_list = []
         for i_entry, entry in self._results.iterrows():
-            estimator = 1 - entry['success'].mean()
+            if entry['n_trials'] > 0:
+                estimator = entry['n_fail'] / entry['n_trials']
+            else:
+                estimator = np.nan
             uncertainty = get_standard_error(estimator, entry['n_trials'])
             estimates_list.append(estimator)
             uncertainties_list.append(uncertainty)
@@ -576,10 +605,24 @@ class Analysis:
         for i_entry, entry in self._results.iterrows():
             estimates = np.zeros((entry['k'], 4))
             uncertainties = np.zeros((entry['k'], 4))
+            effective_errors, counts = pattern_histogram_arrays(
+                pattern_histogram_merge(
+                    entry['effective_error_counts'],
+                    entry['codespace_fail_counts']
+                )
+            )
+
+            # Effective errors only counted by sector do not give the
+            # error rates of single qubits.
+            if effective_errors.shape[1] != 2*entry['k']:
+                effective_errors = np.zeros((0, 2*entry['k']))
+                counts = np.zeros(0, dtype=int)
+
             for i in range(entry['k']):
                 for i_pauli, pauli in enumerate([None, 'X', 'Y', 'Z']):
                     estimate, uncertainty = get_single_qubit_error_rate(
-                        entry['effective_error'], i=i, error_type=pauli,
+                        effective_errors, i=i, error_type=pauli,
+                        counts=counts
                     )
                     estimates[i, i_pauli] = estimate
                     uncertainties[i, i_pauli] = uncertainty
@@ -588,6 +631,37 @@ class Analysis:
         self._results['single_qubit_p_est'] = estimates_list
         self._results['single_qubit_p_se'] = uncertainties_list
 
+    def calculate_decoder_stats(
+        self, quantiles: Tuple[float, ...] = (0.5, 0.9, 0.99)
+    ):
+        """Summarize the histograms of decoding statistics.
+
+        For each statistic recorded by the simulations (such as the
+        decoding time `decode_time` or `bp_iterations`), columns with its
+        mean, maximum and quantiles (e.g. `decode_time_p99`) are added
+        to the results, to spot the error rates where decoding becomes
+        expensive.
+        """
+        if 'decoder_stats' not in self._results.columns:
+            return
+
+        all_stats = self._results['decoder_stats']
+        names = sorted(set(
+            name for stats in all_stats for name in stats.keys()
+        ))
+        for name in names:
+            histograms = all_stats.apply(lambda stats: stats.get(name, {}))
+            self._results[f'{name}_mean'] = histograms.apply(
+                lambda h: h['sum'] / h['count'] if h else np.nan
+            )
+            for q in quantiles:
+                self._results[f'{name}_p{round(100*q):d}'] = histograms.apply(
+                    lambda h: histogram_quantile(h, q)
+                )
+            self._results[f'{name}_max'] = histograms.apply(
+                lambda h: h['max'] if h else np.nan
+            )
+
     def assign_labels(self):
         """Assign labels to each entry for filtering."""
         self._results['code_label'] = (
@@ -929,14 +1003,21 @@ class Analysis:
             # symplectic matrix in the corresponding sector,
             # that is the number of valid trials times the number of logical
             # qubits.
-            self._results[n_trials_label] = self._results['k']*(
-                self._results['codespace'].apply(sum)
+            # Effective errors only counted by sector have one bit per
+            # sector instead of k.
+            n_sector_bits = self._results[[
+                'effective_error_counts', 'k'
+            ]].apply(lambda row: get_n_sector_bits(*row), axis=1)
+            self._results[n_trials_label] = n_sector_bits*(
+                self._results['effective_error_counts'].apply(
+                    lambda counts: sum(counts.values())
+                )
             )
 
             # Count the number of fails.
-            self._results[n_fail_label] = self._results[[
-                'effective_error', 'codespace'
-            ]].apply(lambda row: count_fails(*row, sector), axis=1)
+            self._results[n_fail_label] = self._results[
+                'effective_error_counts'
+            ].apply(lambda counts: count_codespace_fails(counts, sector))
 
             # Use the mean as best estimator.
             self._results[p_est_label] = self._results[n_fail_label]/(
@@ -1642,7 +1723,8 @@ class Analysis:
 
 
 def count_fails(
-    effective_error: np.ndarray, codespace: np.ndarray, sector: str
+    effective_error: np.ndarray, codespace: np.ndarray, sector: str,
+    counts: Optional[np.ndarray] = None
 ) -> int:
     """Count the number of sector fails given effective errors as BSFs.
 
@@ -1658,14 +1740,22 @@ def count_fails(
         that trial, while False denotes final state was not in the code space.
     sector: str
         The sector whose errors are to be counted, either 'X' or 'Z'.
+    counts : np.ndarray, optional
+        Size (n_trials,) array of the number of times each effective error
+        occurred, e.g. from `panqec.utils.pattern_histogram_arrays`.
+        Each effective error occurred once if not given.
     """
     n_fails: int = 0
 
     # The number of logical qubits.
     k = int(effective_error.shape[1]/2)
 
+    if counts is None:
+        counts = np.ones(effective_error.shape[0], dtype=int)
+
     # Filter out the trials where decoding failed.
     codespace_effective_errors = effective_error[codespace, :]
+    codespace_counts = counts[codespace]
 
     # Get the block corresponding to the sector.
     if sector == 'X':
@@ -1674,11 +1764,50 @@ def count_fails(
         block = codespace_effective_errors[:, k:]
 
     # Count the number of fails in the block.
-    n_fails = block.sum()
+    n_fails = (block.sum(axis=1).astype(int)*codespace_counts).sum()
 
     return n_fails
 
 
+def count_codespace_fails(counts: Dict[str, int], sector: str) -> int:
+    """Count the number of sector fails given a histogram of the effective
+    errors of trials in the codespace (see `count_fails`)."""
+    effective_errors, pattern_counts = pattern_histogram_arrays(counts)
+    return count_fails(
+        effective_errors, np.ones(len(pattern_counts), dtype=bool), sector,
+        counts=pattern_counts
+    )
+
+
+def count_successes(counts: Dict[str, int]) -> int:
+    """Number of trials without effective error given a histogram of the
+    effective errors of trials in the codespace."""
+    return sum(
+        count for key, count in counts.items() if '1' not in key
+    )
+
+
+def get_n_sector_bits(counts: Dict[str, int], k: int) -> int:
+    """Number of bits of each sector of the effective errors of a
+    histogram, which is 1 if they are only counted by sector and k
+    otherwise."""
+    if len(counts) == 0:
+        return k
+    return len(next(iter(counts))) // 2
+
+
+def merge_decoder_stats(all_stats: Iterable) -> Dict[str, Dict]:
+    """Merge the histograms of decoding statistics of many results files,
+    skipping files without statistics."""
+    merged: Dict[str, Dict] = {}
+    for stats in all_stats:
+        if not isinstance(stats, dict):
+            continue
+        for name, histogram in stats.items():
+            merged[name] = histogram_merge(merged.get(name, {}), histogram)
+    return merged
+
+
 def shorten(long_name):
     if long_name in SHORT_NAMES:
         return SHORT_NAMES[long_name]
@@ -1751,6 +1880,7 @@ def get_single_qubit_error_rate(
     effective_error_list: Union[List[List[int]], np.ndarray],
     i: int = 0,
     error_type: Optional[str] = None,
+    counts: Optional[np.ndarray] = None,
 ) -> Tuple[float, float]:
     """Estimate single-qubit error rate of i-th qubit and its standard error.
 
@@ -1767,6 +1897,9 @@ def get_single_qubit_error_rate(
     error_type :
         Type of Pauli error to calculate error for, i.e. 'X', 'Y' or 'Z'
         If None is given, then rate for any error is estimated.
+    counts :
+        Number of times each effective error occurred.
+        Each effective error occurred once if not given.
 
     Returns
     -------
@@ -1785,24 +1918,30 @@ def get_single_qubit_error_rate(
     if len(effective_errors.shape) != 2:
         return p_est, p_se
 
+    if counts is None:
+        counts = np.ones(effective_errors.shape[0], dtype=int)
+
     # Number of logical qubits and sample size.
     k = int(effective_errors.shape[1]/2)
-    n_results = effective_errors.shape[0]
+    n_results = np.sum(counts)
 
     # Errors on the single logical qubit of interest.
     qubit_errors = np.array(
         [effective_errors[:, i], effective_errors[:, k + i]]
     ).T
 
+    def frequency(pauli):
+        return np.sum(counts[(qubit_errors == pauli).all(axis=1)])/n_results
+
     # Calculate error rate based on error type.
     if error_type is None:
-        p_est = 1 - (qubit_errors == [0, 0]).all(axis=1).mean()
+        p_est = 1 - frequency([0, 0])
     elif error_type == 'X':
-        p_est = (qubit_errors == [1, 0]).all(axis=1).mean()
+        p_est = frequency([1, 0])
     elif error_type == 'Y':
-        p_est = (qubit_errors == [1, 1]).all(axis=1).mean()
+        p_est = frequency([1, 1])
     elif error_type == 'Z':
-        p_est = (qubit_errors == [0, 1]).all(axis=1).mean()
+        p_est = frequency([0, 1])
 
     # Beta distribution assumed.
     p_se = get_standard_error(p_est, n_results)
@@ -2555,19 +2694,44 @@ def read_entry(
 
         # Add the results, converting to np arrays where possible.
         entry.update(data['results'])
-        for key in ['codespace', 'success']:
-            if key in entry:
-                entry[key] = np.array(entry[key], dtype=bool)
-        entry['effective_error'] = np.array(
-            entry['effective_error'], dtype=np.uint8
-        )
+
+        if 'effective_error_counts' in entry:
+            # Compact results only have the counts of effective errors.
+            n_bits = 2*entry['code']['k']
+            entry['effective_error'] = np.zeros((0, n_bits), dtype=np.uint8)
+            for key in ['codespace', 'success']:
+                entry[key] = np.zeros(0, dtype=bool)
+        else:
+            for key in ['codespace', 'success']:
+                if key in entry:
+                    entry[key] = np.array(entry[key], dtype=bool)
+            entry['effective_error'] = np.array(
+                entry['effective_error'], dtype=np.uint8
+            )
+
+            # Count the effective errors like compact results, but without
+            # reducing them to sectors, since they are known anyway.
+            effective_error = entry['effective_error']
+            codespace = entry.get(
+                'codespace', np.ones(len(effective_error), dtype=bool)
+            )
+            entry['effective_error_counts'] = pattern_histogram_add(
+                {}, effective_error[codespace],
+                max_bits=effective_error.shape[-1]
+            )
+            entry['codespace_fail_counts'] = pattern_histogram_add(
+                {}, effective_error[~codespace],
+                max_bits=effective_error.shape[-1]
+            )
 
         # Record the path of the results file if given.
         if results_file:
             entry['results_file'] = results_file
 
         # Count the number of samples
-        entry['n_trials'] = len(entry['effective_error'])
+        entry['n_trials'] = sum(
+            entry['effective_error_counts'].values()
+        ) + sum(entry['codespace_fail_counts'].values())
 
         entries.append(entry)
     return entries
@@ -11,7 +11,7 @@ import datetime
 import time
 import psutil
 from .simulation import (
-    run_file
+    run_file, tune_input_dict
 )
 from .config import CODES, ERROR_MODELS, DECODERS, PANQEC_DIR
 from .slurm import (
@@ -474,6 +474,94 @@ def generate_input(
             json.dump(json_dict, json_file, indent=4)
 
 
+@click.command()
+@click.option(
+    '-i', '--input_file', required=True, type=click.Path(exists=True)
+)
+@click.option(
+    '-o', '--output_file', default=None, type=str,
+    help='Input .json file with the tuned parameters. '
+    'Defaults to the input file name followed by -tuned.json.'
+)
+@click.option(
+    '--in-place', is_flag=True, default=False,
+    help='Write the tuned parameters over the input file'
+)
+@click.option(
+    '-t', '--trials', default=100, type=click.INT, show_default=True,
+    help='Number of shots for each point of the grid and error rate'
+)
+@click.option(
+    '-g', '--grid', default=None, type=str,
+    help='Parameter grid as a json dictionary, '
+    'e.g. \'{"osd_order": [0, 10, 100]}\'. '
+    'Defaults to a grid depending on the decoder.'
+)
+@click.option(
+    '--max_error_rates', default=3, type=click.INT, show_default=True,
+    help='Maximum number of error rates of the input used for calibration'
+)
+@click.option(
+    '--max_latency', default=None, type=float,
+    help='Maximum mean decoding time of a shot, in seconds'
+)
+@click.option(
+    '--n_sigma', default=2., type=float, show_default=True,
+    help='Choose the fastest parameters whose logical error rate is within '
+    'this number of standard errors of the lowest one'
+)
+def tune_decoder(
+    input_file: str,
+    output_file: Optional[str],
+    in_place: bool,
+    trials: int,
+    grid: Optional[str],
+    max_error_rates: int,
+    max_latency: Optional[float],
+    n_sigma: float
+):
+    """Tune the decoder parameters of an input file.
+
+    Short simulations are run for every point of a grid of decoder
+    parameters on each code of the input file, and the Pareto front of
+    logical error rate against decoding time is printed. The chosen
+    parameters are written in a copy of the input file, or over it with
+    --in-place. Only inputs given as ranges can be tuned.
+
+    \b
+    Example:
+    panqec tune-decoder -i inputs/experiment.json -t 200 \\
+            --grid '{"osd_order": [0, 10, 100], "max_bp_iter": [100, 1000]}'
+    """
+    if in_place and output_file is not None:
+        raise click.UsageError(
+            '--in-place and --output_file cannot be used together'
+        )
+    if in_place:
+        output_file = input_file
+    elif output_file is None:
+        root = input_file
+        if root.endswith('.json'):
+            root = root[:-len('.json')]
+        output_file = root + '-tuned.json'
+
+    data = load_json(input_file)
+    parameter_grid = json.loads(grid) if grid is not None else None
+
+    try:
+        tuned_data = tune_input_dict(
+            data, n_trials=trials, parameter_grid=parameter_grid,
+            max_error_rates=max_error_rates, max_latency=max_latency,
+            n_sigma=n_sigma
+        )
+    except ValueError as error:
+        raise click.UsageError(str(error))
+
+    print(f'Writing tuned input to {output_file}')
+    with open(output_file, 'w') as json_file:
+        json.dump(tuned_data, json_file, indent=4)
+
+
 @click.group(invoke_without_command=True)
 @click.pass_context
 def slurm(ctx):
@@ -708,6 +796,7 @@ cli.add_command(run_parallel)
 cli.add_command(ls)
 cli.add_command(slurm)
 cli.add_command(generate_input)
+cli.add_command(tune_decoder)
 cli.add_command(monitor_usage)
 cli.add_command(merge_results)
 cli.add_command(generate_cluster_script)
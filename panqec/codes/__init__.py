@@ -21,7 +21,7 @@ from .fractons._xcube_code import XCubeCode  # noqa
 from .color_3d._color_3d_code import Color3DCode  # noqa
 from .fermion_2d._fermion_kagome import FermionKagome
 from .fermion_2d._fermion_square import FermionSquare
-from .fermion_3d._fermion_cube.py import Fermion3DCode
+from .fermion_3d._fermion_cube import Fermion3DCode
 
 
 __all__ = [
@@ -20,6 +20,16 @@ from .decoders import (
 )
 from .decoders import BeliefPropagationOSDDecoder
 from .decoders import MemoryBeliefPropagationDecoder
+from .decoders import CachedDecoder
+from .decoders import UnionFindDecoder
+from .decoders import LookupTableDecoder
+from .decoders import ParallelWindowDecoder
+from .decoders import CascadeDecoder
+from .decoders import GreedyPreDecoder
+from .decoders import ThreadPoolDecoder
+from .decoders import BudgetDecoder
+from .decoders import RestrictionDecoder
+from .decoders import GeneralizedSweepMatchDecoder
 from .decoders.matching._matching_decoder import MatchingDecoder
 from .error_models import PauliErrorModel
 
@@ -78,7 +88,17 @@ DECODERS: Dict[str, Any] = {
     'RotatedSweepMatchDecoder': RotatedSweepMatchDecoder,
     'BeliefPropagationOSDDecoder': BeliefPropagationOSDDecoder,
     'MemoryBeliefPropagationDecoder': MemoryBeliefPropagationDecoder,
-    'XCubeMatchingDecoder': XCubeMatchingDecoder
+    'XCubeMatchingDecoder': XCubeMatchingDecoder,
+    'CachedDecoder': CachedDecoder,
+    'UnionFindDecoder': UnionFindDecoder,
+    'LookupTableDecoder': LookupTableDecoder,
+    'ParallelWindowDecoder': ParallelWindowDecoder,
+    'CascadeDecoder': CascadeDecoder,
+    'GreedyPreDecoder': GreedyPreDecoder,
+    'ThreadPoolDecoder': ThreadPoolDecoder,
+    'BudgetDecoder': BudgetDecoder,
+    'RestrictionDecoder': RestrictionDecoder,
+    'GeneralizedSweepMatchDecoder': GeneralizedSweepMatchDecoder
 }
 
 # Slurm automation config.
@@ -9,16 +9,38 @@ from .sweepmatch._sweep_decoder_3d import SweepDecoder3D  # noqa
 from .sweepmatch._sweep_match_decoder import SweepMatchDecoder  # noqa
 from .sweepmatch._rotated_sweep_decoder import RotatedSweepDecoder3D  # noqa
 from .sweepmatch._rotated_sweep_match_decoder import RotatedSweepMatchDecoder  # noqa
+from .sweepmatch._generalized_sweep_decoder import GeneralizedSweepDecoder  # noqa
+from .sweepmatch._generalized_sweep_match_decoder import GeneralizedSweepMatchDecoder  # noqa
+from .cached._cached_decoder import CachedDecoder  # noqa
+from .union_find._union_find_decoder import UnionFindDecoder  # noqa
+from .lookup._lookup_table_decoder import LookupTableDecoder  # noqa
+from .window._parallel_window_decoder import ParallelWindowDecoder  # noqa
+from .cascade._cascade_decoder import CascadeDecoder  # noqa
+from .predecoder._greedy_predecoder import GreedyPreDecoder  # noqa
+from .thread_pool._thread_pool_decoder import ThreadPoolDecoder  # noqa
+from .budget._budget_decoder import BudgetDecoder  # noqa
+from .color._restriction_decoder import RestrictionDecoder  # noqa
 
 __all__ = [
     "BaseDecoder",
     "BeliefPropagationOSDDecoder",
     "MemoryBeliefPropagationDecoder",
-    "FermionSquareDecoder"
+    "FermionSquareDecoder",
     "RotatedSweepDecoder3D",
     "RotatedSweepMatchDecoder",
     "SweepDecoder3D",
     "SweepMatchDecoder",
+    "GeneralizedSweepDecoder",
+    "GeneralizedSweepMatchDecoder",
     "MatchingDecoder",
-    "XCubeMatchingDecoder"
+    "XCubeMatchingDecoder",
+    "CachedDecoder",
+    "UnionFindDecoder",
+    "LookupTableDecoder",
+    "ParallelWindowDecoder",
+    "CascadeDecoder",
+    "GreedyPreDecoder",
+    "ThreadPoolDecoder",
+    "BudgetDecoder",
+    "RestrictionDecoder"
 ]
@@ -1,10 +1,17 @@
+import copy
 from abc import ABCMeta, abstractmethod
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 from panqec.codes import StabilizerCode
 from panqec.error_models import BaseErrorModel
 import numpy as np
 
 
+def derive_seed(seed: int, index: int) -> int:
+    """Seed of the `index`-th stream derived from `seed`, so that
+    replicas and sub-decoders get independent random numbers."""
+    return int(np.random.SeedSequence([seed, index]).generate_state(1)[0])
+
+
 class BaseDecoder(metaclass=ABCMeta):
     """Base class for decoders"""
 
@@ -18,6 +25,13 @@ class BaseDecoder(metaclass=ABCMeta):
         self.error_model = error_model
         self.error_rate = error_rate
 
+        # Statistics of the last call to `decode`, see `last_decode_stats`.
+        self._decode_stats: Dict[str, float] = dict()
+
+        # Statistics of each shot of the last call to `decode_batch`,
+        # see `last_batch_stats`.
+        self._batch_stats: List[Dict[str, float]] = []
+
     @property
     @abstractmethod
     def allowed_codes(self) -> Optional[List[str]]:
@@ -49,6 +63,109 @@ class BaseDecoder(metaclass=ABCMeta):
         Example: `{'num_iterations': 10}`
         """
 
+    def last_decode_stats(self) -> Dict[str, float]:
+        """Statistics of the last call to `decode`, such as the number of
+        iterations of an iterative decoder.
+
+        Decoders report them by setting `_decode_stats` in `decode`.
+        The default is an empty dictionary, for decoders that do not
+        report any statistics.
+
+        Returns
+        -------
+        stats : Dict[str, float]
+            Numerical statistics by name,
+            e.g. `{'bp_iterations': 12, 'osd_calls': 1}`.
+        """
+        return dict(self._decode_stats)
+
+    def last_batch_stats(self) -> List[Dict[str, float]]:
+        """Statistics of each shot of the last call to `decode_batch`,
+        in the same format as `last_decode_stats`.
+
+        Decoders report them by setting `_batch_stats` in `decode_batch`,
+        which the default implementation does with the statistics of each
+        call to `decode`.
+
+        Returns
+        -------
+        stats : List[Dict[str, float]]
+            Numerical statistics by name of each shot.
+        """
+        return [dict(stats) for stats in self._batch_stats]
+
+    def set_error_rate(self, error_rate: float):
+        """Reuse the decoder for another error rate.
+
+        The default implementation only updates `error_rate`, which is
+        enough for decoders that read it at decoding time.
+        Decoders whose weights or channel probabilities are computed from
+        the error rate at construction should override it to reweight them,
+        keeping everything that only depends on the code.
+
+        Parameters
+        ----------
+        error_rate: float
+            New error rate used by the decoder
+        """
+        self.error_rate = error_rate
+
+    def _sub_decoders(self) -> Iterator[Tuple[str, 'BaseDecoder']]:
+        """Decoders stored as attributes of this one, by attribute name."""
+        for name, value in vars(self).items():
+            if isinstance(value, BaseDecoder):
+                yield name, value
+
+    def replicate(self, seed: int) -> 'BaseDecoder':
+        """Copy of the decoder to run in another thread.
+
+        The replica shares everything that is only read while decoding,
+        such as the code, the matching graphs or the lookup tables,
+        so that each extra thread uses little memory.
+        Its random number generator is reseeded with `seed`, and the
+        sub-decoders stored as attributes are replicated with seeds
+        derived from it.
+        Decoders that modify other objects while decoding (such as
+        native decoders holding messages, caches or thread pools) should
+        override it to give the replica its own.
+
+        Parameters
+        ----------
+        seed: int
+            Seed of the random choices of the replica
+
+        Returns
+        -------
+        replica : BaseDecoder
+            Decoder with the same parameters
+        """
+        replica = copy.copy(self)
+        replica._decode_stats = dict()
+        replica._batch_stats = []
+        if hasattr(self, '_rng'):
+            setattr(replica, '_rng', np.random.default_rng(seed))
+        for i, (name, decoder) in enumerate(self._sub_decoders()):
+            setattr(replica, name, decoder.replicate(derive_seed(seed, i)))
+        return replica
+
+    def close(self):
+        """Release the resources of the decoder, such as its thread
+        pools. The default implementation closes the sub-decoders stored
+        as attributes.
+
+        The decoder can still be used afterwards, in which case the
+        resources are acquired again. Decoders can also be used as
+        context managers, which close them on exit.
+        """
+        for _, decoder in self._sub_decoders():
+            decoder.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
     @abstractmethod
     def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
         """Given a code and a syndrome, returns a correction to apply
@@ -70,3 +187,37 @@ class BaseDecoder(metaclass=ABCMeta):
             Correction as an array of size 2n (with n the number of qubits)
             in the binary symplectic format.
         """
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Decode many syndromes at once.
+
+        The default implementation calls `decode` on each syndrome.
+        Decoders that can process many shots together (e.g. with vectorized
+        operations) should override it, and set `_batch_stats` to the
+        statistics of each shot (see `last_batch_stats`).
+
+        Parameters
+        ----------
+        syndromes: np.ndarray
+            Syndromes as an array of size (n_shots, m), where m is the number
+            of stabilizers.
+
+        kwargs: dict
+            Decoder-specific parameters (implemented by subclasses)
+
+        Returns
+        -------
+        corrections : np.ndarray
+            Corrections as an array of size (n_shots, 2n) in the binary
+            symplectic format.
+        """
+        corrections = np.zeros(
+            (len(syndromes), 2*self.code.n), dtype=np.uint
+        )
+        batch_stats = []
+        for i_shot, syndrome in enumerate(syndromes):
+            corrections[i_shot] = self.decode(syndrome, **kwargs)
+            batch_stats.append(self.last_decode_stats())
+        self._batch_stats = batch_stats
+
+        return corrections
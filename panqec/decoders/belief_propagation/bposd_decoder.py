@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, cast
 import numpy as np
 from ldpc import bposd_decoder
 from panqec.codes import StabilizerCode
@@ -16,18 +18,40 @@ class BeliefPropagationOSDDecoder(BaseDecoder):
                  max_bp_iter: int = 1000,
                  channel_update: bool = False,
                  osd_order: int = 10,
-                 bp_method: str = 'msl'):
+                 bp_method: str = 'msl',
+                 concurrent: bool = False):
         super().__init__(code, error_model, error_rate)
+
+        if concurrent and channel_update:
+            raise ValueError(
+                "Argument 'concurrent' requires 'channel_update' to be False,"
+                " since the channel update decodes X after Z"
+            )
+
         self._max_bp_iter = max_bp_iter
         self._channel_update = channel_update
         self._osd_order = osd_order
         self._bp_method = bp_method
 
+        # Decode the X and Z errors of CSS codes in two threads.
+        # It does not change the corrections, so it is not in `params`.
+        self._concurrent = concurrent
+        self._executor: Optional[ThreadPoolExecutor] = None
+
         # Do not initialize the decoder until we call the decode method.
         # This is required because during analysis, there is no need to
         # initialize the decoder every time.
         self._initialized = False
 
+        # Channel probabilities, cached for the (error model, error rate)
+        # given by `_channel_key`, and loaded in the BP decoders.
+        self._channel_key: Optional[Tuple] = None
+        self._channel: Dict[str, np.ndarray] = dict()
+
+        # Whether the channel of the X decoder has been modified by a
+        # Bayesian update and has to be reset before the next decoding.
+        self._x_channel_modified = False
+
     @property
     def params(self) -> dict:
         return {
@@ -37,6 +61,22 @@ class BeliefPropagationOSDDecoder(BaseDecoder):
             'bp_method': self._bp_method
         }
 
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Copy of the decoder with its own BP-OSD decoders, which hold
+        the messages of belief propagation, and its own thread."""
+        replica = cast(
+            BeliefPropagationOSDDecoder, super().replicate(seed)
+        )
+        replica._initialized = False
+        replica._executor = None
+        return replica
+
+    def close(self):
+        """Shut down the thread decoding the Z errors."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     def get_probabilities(self):
         pi, px, py, pz = self.error_model.probability_distribution(
             self.code, self.error_rate
@@ -49,34 +89,62 @@ class BeliefPropagationOSDDecoder(BaseDecoder):
                              direction: str = "x->z") -> np.ndarray:
         """Update X probabilities once a Z correction has been applied"""
 
-        n_qubits = correction.shape[0]
-
-        new_probs = np.zeros(n_qubits)
-
         if direction == "z->x":
-            for i in range(n_qubits):
-                if correction[i] == 1:
-                    if pz[i] + py[i] != 0:
-                        new_probs[i] = py[i] / (pz[i] + py[i])
-                else:
-                    new_probs[i] = px[i] / (1 - pz[i] - py[i])
-
+            p_flipped, p_other = px, pz
         elif direction == "x->z":
-            for i in range(n_qubits):
-                if correction[i] == 1:
-                    if px[i] + py[i] != 0:
-                        new_probs[i] = py[i] / (px[i] + py[i])
-                else:
-                    new_probs[i] = pz[i] / (1 - px[i] - py[i])
-
+            p_flipped, p_other = pz, px
         else:
             raise ValueError(
                 f"Unrecognized direction {direction} when "
                 "updating probabilities"
             )
 
+        # Probability of an error given that the other type of error
+        # has (py / (p_other + py)) or has not (p_flipped / p_no_other)
+        # been detected on the qubit.
+        p_detected = p_other + py
+        p_no_other = 1 - p_other - py
+
+        detected = np.divide(
+            py, p_detected,
+            out=np.zeros(len(py)), where=(p_detected != 0)
+        )
+        not_detected = np.divide(
+            p_flipped, p_no_other,
+            out=np.zeros(len(py)), where=(p_no_other != 0)
+        )
+
+        new_probs = np.where(correction == 1, detected, not_detected)
+
         return new_probs
 
+    def update_channel(self):
+        """Load the channel probabilities of the current error model and
+        error rate into the BP decoders, unless they are already loaded."""
+
+        key = (self.error_model, self.error_rate)
+        if key != self._channel_key:
+            pi, px, py, pz = self.get_probabilities()
+            self._channel = {
+                'px': px, 'py': py, 'pz': pz,
+                'x': px + py,
+                'z': pz + py,
+            }
+            self._channel_key = key
+
+            if self.code.is_css:
+                self.x_decoder.update_channel_probs(self._channel['x'])
+                self.z_decoder.update_channel_probs(self._channel['z'])
+            else:
+                self.decoder.update_channel_probs(
+                    np.hstack([self._channel['z'], self._channel['x']])
+                )
+            self._x_channel_modified = False
+
+        elif self._x_channel_modified:
+            self.x_decoder.update_channel_probs(self._channel['x'])
+            self._x_channel_modified = False
+
     def initialize_decoders(self):
         is_css = self.code.is_css
 
@@ -111,6 +179,9 @@ class BeliefPropagationOSDDecoder(BaseDecoder):
                 osd_method="osd_cs",  # Choose from: "osd_e", "osd_cs", "osd0"
                 osd_order=self._osd_order
             )
+
+        # Force the channel to be loaded in the new decoders.
+        self._channel_key = None
         self._initialized = True
 
     def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
@@ -119,55 +190,68 @@ class BeliefPropagationOSDDecoder(BaseDecoder):
         if not self._initialized:
             self.initialize_decoders()
 
-        is_css = self.code.is_css
+        # Only reload the channel if the error model or rate has changed,
+        # or if the previous Bayesian update has modified it.
+        self.update_channel()
+
         n_qubits = self.code.n
-        syndrome = np.array(syndrome, dtype=int)
+        syndrome = np.asarray(syndrome)
 
-        if is_css:
+        if self.code.is_css:
             syndrome_z = self.code.extract_z_syndrome(syndrome)
             syndrome_x = self.code.extract_x_syndrome(syndrome)
 
-        pi, px, py, pz = self.get_probabilities()
-
-        probabilities_x = px + py
-        probabilities_z = pz + py
-
-        probabilities = np.hstack([probabilities_z, probabilities_x])
-
-        if is_css:
-            # Update probabilities (in case the distribution is new at each
-            # iteration)
-            self.x_decoder.update_channel_probs(probabilities_x)
-            self.z_decoder.update_channel_probs(probabilities_z)
-
-            # Decode Z errors
-            self.z_decoder.decode(syndrome_x)
-            z_correction = self.z_decoder.osdw_decoding
-
-            # Bayes update of the probability
-            if self._channel_update:
-                new_x_probs = self.update_probabilities(
-                    z_correction, px, py, pz, direction="z->x"
+            if self._concurrent:
+                # Decode Z errors in the background and X errors here.
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1)
+                future = self._executor.submit(
+                    self.z_decoder.decode, syndrome_x
                 )
-                self.x_decoder.update_channel_probs(new_x_probs)
-
-            # Decode X errors
-            self.x_decoder.decode(syndrome_z)
-            x_correction = self.x_decoder.osdw_decoding
+                x_correction = self.x_decoder.decode(syndrome_z)
+                z_correction = future.result()
+
+            else:
+                # Decode Z errors
+                z_correction = self.z_decoder.decode(syndrome_x)
+
+                # Bayes update of the probability
+                if self._channel_update:
+                    new_x_probs = self.update_probabilities(
+                        z_correction,
+                        self._channel['px'],
+                        self._channel['py'],
+                        self._channel['pz'],
+                        direction="z->x"
+                    )
+                    self.x_decoder.update_channel_probs(new_x_probs)
+                    self._x_channel_modified = True
+
+                # Decode X errors
+                x_correction = self.x_decoder.decode(syndrome_z)
 
             correction = np.concatenate([x_correction, z_correction])
-        else:
-            # Update probabilities (in case the distribution is new at each
-            # iteration)
-            self.decoder.update_channel_probs(probabilities)
 
+            # OSD is only run when BP does not converge.
+            self._decode_stats = {
+                'bp_iterations': self.x_decoder.iter + self.z_decoder.iter,
+                'osd_calls': (
+                    (1 - self.x_decoder.converge)
+                    + (1 - self.z_decoder.converge)
+                )
+            }
+        else:
             # Decode all errors
-            self.decoder.decode(syndrome)
-            correction = self.decoder.osdw_decoding
+            correction = self.decoder.decode(syndrome)
             correction = np.concatenate(
                 [correction[n_qubits:], correction[:n_qubits]]
             )
 
+            self._decode_stats = {
+                'bp_iterations': self.decoder.iter,
+                'osd_calls': 1 - self.decoder.converge
+            }
+
         return correction
 
 
@@ -1,10 +1,8 @@
-from typing import Sequence
+from typing import Dict, List, Tuple
 import numpy as np
 from panqec.codes import StabilizerCode
 from panqec.decoders import BaseDecoder
 from panqec.error_models import BaseErrorModel
-from typing import Dict
-import panqec.bsparse as bsparse
 from scipy.sparse import csr_matrix
 
 
@@ -13,20 +11,30 @@ PAULI_X = 1
 PAULI_Y = 2
 PAULI_Z = 3
 
+# Largest magnitude of a stabilizer to qubit message, which corresponds to
+# clipping the tanh product of arXiv:2104.13659 to [-1 + eps, 1 - eps].
+MAX_LLR = 2 * np.arctanh(1 - 1e-8)
+MIN_LLR = 1e-12
+
+# Regularization of the sums of exponentials of the function lambda of
+# arXiv:2104.13659, which bounds its magnitude by about -log(BIAS_EPS).
+BIAS_EPS = 1e-12
+
 
 def symplectic_to_pauli(H):
+    """Convert a parity-check matrix in the binary symplectic format
+    to a sparse matrix over GF(4), where each element is in [0, 3]
+    (for I, X, Y and Z respectively)."""
     n = H.shape[1] // 2
-    m = H.shape[0]
-    new_H = bsparse.zero_matrix((m, n))
-    rows, cols = H.nonzero()
-    for i in range(len(rows)):
-        if cols[i] < n:
-            new_H[rows[i], cols[i]] = PAULI_X
-        else:
-            if new_H[rows[i], cols[i] - n] == PAULI_X:
-                new_H[rows[i], cols[i] - n] = PAULI_Y
-            else:
-                new_H[rows[i], cols[i] - n] = PAULI_Z
+    H = csr_matrix(H, dtype='uint8')
+    H_x = H[:, :n]
+    H_z = H[:, n:]
+
+    # X -> 1, Z -> 3 and Y -> 1 + 3 - 2 = 2
+    new_H = H_x + 3 * H_z - 2 * H_x.multiply(H_z)
+    new_H = csr_matrix(new_H, dtype='uint8')
+    new_H.eliminate_zeros()
+
     return new_H
 
 
@@ -44,84 +52,261 @@ def pauli_to_symplectic(a, reverse=False):
     return new_a
 
 
-def tanh_prod(a, eps=1e-8):
-    """ Square cross product defined in II.B of arXiv:2104.13659"""
-    prod = np.prod(np.tanh(a/2))
-    if prod >= 1:
-        prod = 1 - eps
-    elif prod <= -1:
-        prod = -1 + eps
-    return 2 * np.arctanh(prod)
+def phi(x):
+    """Involution -log(tanh(x/2)) used to compute the square cross product
+    of II.B of arXiv:2104.13659 as a sum."""
+    return -np.log(np.tanh(np.clip(x, MIN_LLR, MAX_LLR) / 2))
+
+
+def log_exp_bias(pauli, gamma, max_log: bool = False) -> np.ndarray:
+    """ Function lambda defined in II.B of arXiv:2104.13659,
+    evaluated on every edge at once.
+
+    Parameters
+    ----------
+    pauli : np.ndarray
+        Pauli of each edge, shifted to be in [0, 2] (for X, Y and Z)
+    gamma : np.ndarray
+        Qubit to stabilizer messages of each edge, of shape (3, n_edges),
+        or (n_shots, 3, n_edges) for many shots at once
+    max_log : bool
+        Use the max-log approximation log(sum_i exp(x_i)) ~ max_i(x_i),
+        which avoids computing any exponential or logarithm
+
+    Returns
+    -------
+    lambda : np.ndarray
+        log((eps + 1 + exp(-gamma_pauli))
+        / (eps + sum_{w != pauli} exp(-gamma_w)))
+        for each edge (and each shot), with eps = `BIAS_EPS`
+    """
+    n_edges = len(pauli)
+    edges = np.arange(n_edges)
+    gamma_flat = gamma.reshape(gamma.shape[:-2] + (3*n_edges,))
+    gamma_pauli = np.take(gamma_flat, pauli*n_edges + edges, axis=-1)
+    gamma_other_1 = np.take(
+        gamma_flat, (pauli + 1) % 3 * n_edges + edges, axis=-1
+    )
+    gamma_other_2 = np.take(
+        gamma_flat, (pauli + 2) % 3 * n_edges + edges, axis=-1
+    )
+
+    if max_log:
+        return (
+            np.maximum(0, -gamma_pauli)
+            + np.minimum(
+                np.minimum(gamma_other_1, gamma_other_2), -np.log(BIAS_EPS)
+            )
+        )
+
+    return (
+        np.logaddexp(np.log1p(BIAS_EPS), -gamma_pauli)
+        - np.logaddexp(
+            np.log(BIAS_EPS), np.logaddexp(-gamma_other_1, -gamma_other_2)
+        )
+    )
+
 
+def segment_sum(
+    values: np.ndarray, segments: np.ndarray, n_segments: int
+) -> np.ndarray:
+    """Sum the last axis of `values` within each segment.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Values of shape (..., n_edges)
+    segments : np.ndarray
+        Segment (e.g. stabilizer or qubit) of each edge, of size n_edges
+    n_segments : int
+        Total number of segments
+
+    Returns
+    -------
+    sums : np.ndarray
+        Sums of shape (..., n_segments)
+    """
+    batch_shape = values.shape[:-1]
+    n_batch = int(np.prod(batch_shape))
+    indices = (
+        np.arange(n_batch).reshape(-1, 1) * n_segments + segments
+    ).ravel()
+    sums = np.bincount(
+        indices, weights=values.reshape(-1), minlength=n_batch*n_segments
+    )
 
-def log_exp_bias(pauli, gamma, eps=1e-12) -> Sequence:
-    """ Function lambda defined in II.B of arXiv:2104.13659"""
-    denominator = np.sum(np.exp(-gamma), axis=0)
-    gamma_pauli = np.choose(pauli, gamma)
-    exp_gamma_pauli = np.exp(-gamma_pauli)
-    denominator -= exp_gamma_pauli
-    return np.log(eps + (1 + exp_gamma_pauli)) - np.log(eps + denominator)
+    return sums.reshape(batch_shape + (n_segments,))
+
+
+def segment_min_excluding_self(
+    values: np.ndarray, starts: np.ndarray, segments: np.ndarray
+) -> np.ndarray:
+    """Minimum of the last axis of `values` within each segment,
+    excluding the element itself, using the two smallest values of each
+    segment.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Values of shape (n_batch, n_edges), with edges sorted by segment
+    starts : np.ndarray
+        Index of the first edge of each (non-empty) segment
+    segments : np.ndarray
+        Index in `starts` of the segment of each edge, of size n_edges
+
+    Returns
+    -------
+    minima : np.ndarray
+        Minimum of the other elements of the segment, for each edge,
+        of shape (n_batch, n_edges)
+    """
+    n_batch, n_edges = values.shape
+    edges = np.arange(n_edges)
+
+    min_1 = np.minimum.reduceat(values, starts, axis=1)
+
+    # Position of the (first) smallest value in each segment.
+    is_min = values == min_1[:, segments]
+    argmin = np.minimum.reduceat(
+        np.where(is_min, edges, n_edges), starts, axis=1
+    )
+
+    # Second smallest value in each segment.
+    values_without_min = values.copy()
+    values_without_min[np.arange(n_batch).reshape(-1, 1), argmin] = np.inf
+    min_2 = np.minimum.reduceat(values_without_min, starts, axis=1)
+
+    return np.where(
+        edges == argmin[:, segments], min_2[:, segments], min_1[:, segments]
+    )
 
 
 class MemoryBeliefPropagationDecoder(BaseDecoder):
+    """Belief propagation with memory effect (MBP) over GF(4),
+    as described in arXiv:2104.13659.
+
+    Messages are stored on the edges of the Tanner graph, so that the cost
+    of each iteration is linear in the number of non-zero elements of the
+    parity-check matrix.
+
+    With a serial schedule, the qubits are updated one after the other,
+    each one using the messages of the qubits updated before it in the
+    same iteration. Qubits that share no stabilizer do not depend on each
+    other, so they are grouped into layers updated with vectorized
+    operations (see `schedule_layers`). The default layered schedule
+    orders the qubits so that there are few layers, while the serial
+    schedule keeps their order, which can give many more layers.
+    The parallel (flooding) schedule updates all the qubits at once from
+    the messages of the previous iteration, but BP converges less often,
+    e.g. on small color codes.
+
+    The stabilizer to qubit update can use the exact sum-product rule,
+    or the cheaper normalized or offset min-sum approximations, which do not
+    evaluate any transcendental function.
+    """
+
     label = 'MBP decoder'
     allowed_codes = None  # all codes allowed
 
+    bp_methods = ['sum_product', 'normalized_min_sum', 'offset_min_sum']
+    schedules = ['layered', 'serial', 'parallel']
+
     def __init__(self,
                  code: StabilizerCode,
                  error_model: BaseErrorModel,
                  error_rate: float,
                  max_bp_iter: int = 100,
                  alpha: float = 0.4,
-                 beta: float = 0):
+                 beta: float = 0,
+                 bp_method: str = 'sum_product',
+                 ms_scaling_factor: float = 0.75,
+                 ms_offset: float = 0.5,
+                 schedule: str = 'layered'):
+        """Constructor for the MemoryBeliefPropagationDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder
+        error_rate: float
+            Error rate used by the decoder
+        max_bp_iter: int, optional
+            Maximum number of BP iterations
+        alpha: float, optional
+            Inverse of the strength of the memory effect
+        beta: float, optional
+            Strength of the inhibition of commuting messages
+        bp_method: str, optional
+            Stabilizer to qubit update rule. Can take the values
+            'sum_product', 'normalized_min_sum' or 'offset_min_sum'
+        ms_scaling_factor: float, optional
+            Factor multiplying the messages in the normalized min-sum rule
+        ms_offset: float, optional
+            Offset subtracted from the messages in the offset min-sum rule
+        schedule: str, optional
+            Order of the updates of the qubits, either 'layered' (layers
+            of qubits sharing no stabilizer), 'serial' (qubit after qubit,
+            in their order) or 'parallel' (all the qubits at once)
+        """
         super().__init__(code, error_model, error_rate)
 
+        if bp_method not in self.bp_methods:
+            raise ValueError(f"Argument 'bp_method' has to be one of "
+                             f"{self.bp_methods}, not {bp_method}")
+        if schedule not in self.schedules:
+            raise ValueError(f"Argument 'schedule' has to be one of "
+                             f"{self.schedules}, not {schedule}")
+
         self.max_bp_iter = max_bp_iter
+        self.last_n_iterations = np.zeros(0, dtype=int)
         self.alpha = alpha
         self.beta = beta
+        self.bp_method = bp_method
+        self.ms_scaling_factor = ms_scaling_factor
+        self.ms_offset = ms_offset
+        self.schedule = schedule
 
-        self._x_decoder: Dict = dict()
-        self._z_decoder: Dict = dict()
-
-        self._decoder: Dict = dict()
         # Convert it to a matrix over GF(4), where each element is in [0,4]
-        self.H = code.stabilizer_matrix.toarray()
-        self.H_pauli = symplectic_to_pauli(code.stabilizer_matrix).toarray()
-        pi, px, py, pz = self.get_probabilities()
-        self.p_channel = np.vstack([pi, px, py, pz])
+        self.H_pauli = symplectic_to_pauli(code.stabilizer_matrix)
+        self.n_stabs, self.n_qubits = self.H_pauli.shape
 
-        # Easy access to the neighboring qubits of each stabilizer
-        self.neighboring_qubits = [self.H_pauli[m].nonzero()[0]
-                                   for m in range(self.H_pauli.shape[0])]
+        # Edges of the Tanner graph, sorted by stabilizer.
+        self.edge_stabs = np.repeat(
+            np.arange(self.n_stabs), np.diff(self.H_pauli.indptr)
+        )
+        self.edge_qubits = self.H_pauli.indices.astype(int)
+        self.edge_paulis = self.H_pauli.data.astype(int) - 1
 
-        # Easy access to the neighboring stabilizers of each qubit
-        self.neighboring_stabs = [self.H_pauli[:, n].nonzero()[0]
-                                  for n in range(self.H_pauli.shape[1])]
+        # anticommute[w, e] is True if the Pauli w + 1 anticommutes
+        # with the Pauli of the stabilizer on the edge e.
+        self.anticommute = (
+            np.arange(3).reshape(-1, 1) != self.edge_paulis
+        )
 
-        # ===================== Initialize BP variables ====================
+        pi, px, py, pz = self.get_probabilities()
+        self.p_channel = np.vstack([pi, px, py, pz])
 
         # Create channel log ratios
         self.lambda_channel = np.log((1 - self.p_channel[1:])
                                      / self.p_channel[1:])
 
-        # Initialize [qubit to stabilizer] messages (gamma)
-        n_stabs, n_qubits = self.H_pauli.shape
-        self.gamma_q2s = np.zeros((3, n_qubits, n_stabs))
-        for n in range(n_qubits):
-            for m in self.neighboring_stabs[n]:
-                for w in range(3):
-                    if 1 + w != self.H_pauli[m, n]:
-                        self.gamma_q2s[w, n, m] = self.lambda_channel[w, n]
+        # Initial [qubit to stabilizer] messages are the channel log ratios.
+        self.gamma_q2s_init = self.lambda_channel[:, self.edge_qubits]
 
-        # Initialize [stabilizer to qubit] messages (delta)
-        self.delta_s2q = np.zeros((n_stabs, n_qubits))
+        self.layers = self.schedule_layers()
 
     @property
     def params(self) -> dict:
         return {
             'max_bp_iter': self.max_bp_iter,
             'alpha': self.alpha,
-            'beta': self.beta
+            'beta': self.beta,
+            'bp_method': self.bp_method,
+            'ms_scaling_factor': self.ms_scaling_factor,
+            'ms_offset': self.ms_offset,
+            'schedule': self.schedule
         }
 
     def get_probabilities(self):
@@ -132,94 +317,282 @@ class MemoryBeliefPropagationDecoder(BaseDecoder):
         )
         return pi, px, py, pz
 
-    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
-        """Get X and Z corrections given code and measured syndrome."""
-
-        H_pauli = self.H_pauli
-
-        n_stabs, n_qubits = H_pauli.shape
-
-        # ==================== Initialize BP variables ====================
-
-        gamma_q2s = self.gamma_q2s.copy()
-        delta_s2q = self.delta_s2q.copy()
-
-        # ========================= BP iterations =========================
-
-        for iter in range(self.max_bp_iter):
-            print(f"\nIter {iter+1} / {self.max_bp_iter}")
+    def schedule_layers(self) -> List[Dict[str, np.ndarray]]:
+        """Layers of qubits updated together by the schedule.
+
+        The qubits of a layer share no stabilizer, so updating them
+        together is the same as updating them one after the other.
+        With the serial schedule, each qubit is put in the layer after the
+        last layer of the qubits before it that share a stabilizer with it.
+        With the layered schedule, the qubits are colored greedily, each
+        one being put in the first layer without any qubit sharing a
+        stabilizer with it.
+        The parallel schedule has a single layer with all the qubits.
+        """
+        if self.schedule == 'parallel':
+            return [self.get_layer(np.arange(self.n_qubits))]
+
+        # Qubits sharing a stabilizer with each qubit.
+        support = csr_matrix(
+            (np.ones(len(self.edge_qubits)), self.H_pauli.indices,
+             self.H_pauli.indptr),
+            shape=self.H_pauli.shape
+        )
+        neighbours = (support.T @ support).tocsr()
+
+        qubit_layers = -np.ones(self.n_qubits, dtype=int)
+        for qubit in range(self.n_qubits):
+            layers = qubit_layers[neighbours.indices[
+                neighbours.indptr[qubit]:neighbours.indptr[qubit+1]
+            ]]
+            layers = layers[layers >= 0]
+            if self.schedule == 'serial':
+                qubit_layers[qubit] = layers.max(initial=-1) + 1
+            else:
+                free = np.ones(len(layers) + 1, dtype=bool)
+                free[layers[layers <= len(layers)]] = False
+                qubit_layers[qubit] = np.argmax(free)
+
+        return [
+            self.get_layer(np.flatnonzero(qubit_layers == layer))
+            for layer in range(qubit_layers.max(initial=0) + 1)
+        ]
+
+    def get_layer(self, qubits: np.ndarray) -> Dict[str, np.ndarray]:
+        """Edges involved in the update of a set of qubits.
+
+        Parameters
+        ----------
+        qubits : np.ndarray
+            Sorted indices of the qubits updated together
+
+        Returns
+        -------
+        layer : Dict[str, np.ndarray]
+            The `qubits`, their `edges`, all the `stab_edges` of their
+            stabilizers (sorted by stabilizer), the first edge `stab_starts`
+            of each of these stabilizers and the index `stab_segments` of
+            the stabilizer of each of these edges, the position `targets`
+            of the edges of the qubits among them, and the index
+            `edge_qubits` of the qubit of each edge among the qubits.
+        """
+        edges = np.flatnonzero(np.isin(self.edge_qubits, qubits))
+        stab_edges = np.flatnonzero(
+            np.isin(self.edge_stabs, self.edge_stabs[edges])
+        )
+        new_stab = np.diff(self.edge_stabs[stab_edges], prepend=-1) != 0
+        return {
+            'qubits': qubits,
+            'edges': edges,
+            'stab_edges': stab_edges,
+            'stab_starts': np.flatnonzero(new_stab),
+            'stab_segments': np.cumsum(new_stab) - 1,
+            'targets': np.searchsorted(stab_edges, edges),
+            'edge_qubits': np.searchsorted(qubits, self.edge_qubits[edges]),
+        }
 
-            gamma_q = np.zeros((3, n_qubits))
-            for n in range(n_qubits):
-                # --------- Stabilizer to qubit update (prod-sum) ---------
+    def stabilizer_update(
+        self, lambda_edges: np.ndarray, syndromes: np.ndarray,
+        layer: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Stabilizer to qubit messages (delta) on the edges of a layer,
+        computed from the biases (lambda) of all the other edges connected
+        to the same stabilizer.
+
+        Parameters
+        ----------
+        lambda_edges : np.ndarray
+            Biases of the qubit to stabilizer messages of all the edges,
+            of shape (n_shots, n_edges)
+        syndromes : np.ndarray
+            Syndromes of shape (n_shots, n_stabs)
+        layer : Dict[str, np.ndarray]
+            Layer of qubits updated, see `get_layer`
+
+        Returns
+        -------
+        delta_s2q : np.ndarray
+            Stabilizer to qubit messages of shape (n_shots, n_layer_edges)
+        """
+
+        if len(layer['edges']) == 0:
+            return np.zeros((len(syndromes), 0))
+
+        min_sum = self.bp_method != 'sum_product'
+        targets = layer['targets']
+        segments = layer['stab_segments']
+        n_segments = len(layer['stab_starts'])
+        stab_lambdas = lambda_edges[:, layer['stab_edges']]
+
+        # Magnitude of the square cross product, excluding the edge itself.
+        if min_sum:
+            magnitude = segment_min_excluding_self(
+                np.abs(stab_lambdas), layer['stab_starts'], segments
+            )[:, targets]
+            if self.bp_method == 'normalized_min_sum':
+                magnitude = self.ms_scaling_factor * magnitude
+            else:
+                magnitude = np.maximum(magnitude - self.ms_offset, 0)
+            magnitude = np.minimum(magnitude, MAX_LLR)
+        else:
+            phi_edges = phi(np.abs(stab_lambdas))
+            phi_stabs = segment_sum(phi_edges, segments, n_segments)
+            magnitude = np.minimum(phi(
+                phi_stabs[:, segments[targets]] - phi_edges[:, targets]
+            ), MAX_LLR)
+
+        # Sign of the square cross product, excluding the edge itself.
+        negative = (stab_lambdas < 0).astype(int)
+        n_negative = segment_sum(negative, segments, n_segments).astype(int)
+        parity = (
+            n_negative[:, segments[targets]] - negative[:, targets]
+            + syndromes[:, self.edge_stabs[layer['edges']]]
+        ) % 2
+
+        return (1 - 2*parity) * magnitude
+
+    def qubit_update(
+        self, delta_s2q: np.ndarray, layer: Dict[str, np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Beliefs (gamma_q) of the qubits of a layer, of shape
+        (n_shots, 3, n_layer_qubits), and qubit to stabilizer messages
+        (gamma_q2s) of their edges, of shape (n_shots, 3, n_layer_edges),
+        from the stabilizer to qubit messages (delta) of their edges,
+        of shape (n_shots, n_layer_edges)."""
+
+        edge_qubits = layer['edge_qubits']
+        n_qubits = len(layer['qubits'])
+
+        # Sum of the incoming messages that anticommute with each Pauli.
+        delta_anticommute = (
+            self.anticommute[:, layer['edges']] * delta_s2q[:, np.newaxis, :]
+        )
+        sum_diff_pauli = segment_sum(
+            delta_anticommute, edge_qubits, n_qubits
+        )
+        sum_all = segment_sum(delta_s2q, edge_qubits, n_qubits)
+        sum_same_pauli = sum_all[:, np.newaxis, :] - sum_diff_pauli
 
-                for m in self.neighboring_stabs[n]:
-                    lambda_neighbor = np.array([
-                        log_exp_bias(
-                            H_pauli[m, n_prime]-1, gamma_q2s[:, n_prime, m]
-                        )
-                        for n_prime in self.neighboring_qubits[m]
-                        if n_prime != n
-                    ])
-                    lambda_neighbor = np.array(lambda_neighbor)
+        gamma_q = (
+            self.lambda_channel[:, layer['qubits']]
+            + 1 / self.alpha * sum_diff_pauli
+            - self.beta * sum_same_pauli
+        )
 
-                    sign = (-1)**syndrome[m]
-                    delta_s2q[m, n] = sign * tanh_prod(lambda_neighbor)
+        # Inhibition loop
+        gamma_q2s = gamma_q[..., edge_qubits] - delta_anticommute
 
-                # ----------------- Qubit to stabilizer update ---------------
+        return gamma_q, gamma_q2s
 
-                for w in range(3):
-                    sum_same_pauli = np.sum(
-                        delta_s2q[self.neighboring_stabs[n], n][
-                            H_pauli[self.neighboring_stabs[n], n] == w + 1
-                        ]
-                    )
-                    sum_diff_pauli = np.sum(
-                        delta_s2q[self.neighboring_stabs[n], n][
-                            H_pauli[self.neighboring_stabs[n], n] != w + 1
-                        ]
-                    )
+    def hard_decision(self, gamma_q: np.ndarray) -> np.ndarray:
+        """Most likely Pauli (in [0, 3]) on each qubit given beliefs
+        of shape (..., 3, n_qubits)."""
 
-                    gamma_q[w, n] = self.lambda_channel[w, n] \
-                        + 1 / self.alpha * sum_diff_pauli \
-                        - self.beta * sum_same_pauli
+        correction = np.argmin(gamma_q, axis=-2) + 1
+        correction[np.all(gamma_q > 0, axis=-2)] = PAULI_I
 
-                    # Update qubit to stab messages
-                    gamma_q2s[w, n, :] = gamma_q[w, n]
+        return correction
 
-                    # Inhibition loop
-                    gamma_q2s[w, n, (1 + w != H_pauli[:, n])] -= delta_s2q[
-                        (1 + w != H_pauli[:, n]), n
-                    ]
+    def pauli_syndrome(self, error: np.ndarray) -> np.ndarray:
+        """Syndrome of an error given as an array of Paulis in [0, 3],
+        of shape (n_qubits,) or (n_shots, n_qubits)."""
 
-            # ----------------------- Hard decision -----------------------
+        error_edges = error[..., self.edge_qubits]
+        anticommutes = (error_edges != PAULI_I) & (
+            error_edges != self.edge_paulis + 1
+        )
+        syndrome = segment_sum(
+            anticommutes, self.edge_stabs, self.n_stabs
+        ).astype(int) % 2
 
-            correction = np.zeros(n_qubits, dtype='uint8')
+        return syndrome
 
-            for n in range(n_qubits):
-                if not np.all(gamma_q[:, n] > 0):
-                    correction[n] = np.argmin(gamma_q[:, n]) + 1
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections given code and measured syndrome."""
 
-            correction_symplectic = pauli_to_symplectic(correction)
+        correction = self.decode_batch(np.asarray(syndrome).reshape(1, -1))[0]
+        self._decode_stats = {
+            'bp_iterations': int(self.last_n_iterations[0])
+        }
+        return correction
 
-            # --------------- Break loop if syndrome reached ---------------
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections of many shots at once.
+
+        Messages of all the shots are updated together, and a shot is
+        frozen as soon as its hard decision reproduces its syndrome,
+        so that only the remaining active shots are iterated.
+        The number of iterations of each shot is kept in
+        `last_n_iterations`.
+
+        Parameters
+        ----------
+        syndromes: np.ndarray
+            Syndromes as an array of size (n_shots, m), where m is the number
+            of stabilizers.
+
+        Returns
+        -------
+        corrections : np.ndarray
+            Corrections as an array of size (n_shots, 2n) in the binary
+            symplectic format.
+        """
+
+        syndromes = np.asarray(syndromes, dtype=int)
+        n_shots = syndromes.shape[0]
+
+        corrections = np.zeros((n_shots, self.n_qubits), dtype=int)
+        self.last_n_iterations = np.zeros(n_shots, dtype=int)
+
+        # Shots that have not reached their syndrome yet.
+        active = np.flatnonzero(np.any(syndromes, axis=1))
+        active_syndromes = syndromes[active]
+
+        # Biases of the [qubit to stabilizer] messages, which are all that
+        # the stabilizer updates need, initialized with the channel.
+        min_sum = self.bp_method != 'sum_product'
+        lambda_edges = np.tile(
+            log_exp_bias(self.edge_paulis, self.gamma_q2s_init, min_sum),
+            (len(active), 1)
+        )
+        gamma_q = np.zeros((len(active), 3, self.n_qubits))
 
-            new_syndrome = self.code.measure_syndrome(correction_symplectic)
-            if np.all(new_syndrome == syndrome):
-                # print(f"Syndrome reached in {iter} iterations\n")
+        for _ in range(self.max_bp_iter):
+            if len(active) == 0:
                 break
 
-        correction_symplectic = pauli_to_symplectic(correction, reverse=True)
-
-        correction = np.concatenate([correction_symplectic[n_qubits:],
-                                     correction_symplectic[:n_qubits]])
-
-        return correction
-
-
-def test_symplectic_to_pauli():
-    H = csr_matrix(np.array([[1, 1, 0, 1], [1, 0, 1, 1]]))
-    print(symplectic_to_pauli(H))
+            self.last_n_iterations[active] += 1
+            for layer in self.layers:
+                delta_s2q = self.stabilizer_update(
+                    lambda_edges, active_syndromes, layer
+                )
+                gamma_q_layer, gamma_q2s = self.qubit_update(delta_s2q, layer)
+                gamma_q[..., layer['qubits']] = gamma_q_layer
+                lambda_edges[:, layer['edges']] = log_exp_bias(
+                    self.edge_paulis[layer['edges']], gamma_q2s, min_sum
+                )
+
+            corrections[active] = self.hard_decision(gamma_q)
+
+            # Freeze the shots whose syndrome has been reached.
+            not_converged = np.any(
+                self.pauli_syndrome(corrections[active]) != active_syndromes,
+                axis=1
+            )
+            active = active[not_converged]
+            active_syndromes = active_syndromes[not_converged]
+            lambda_edges = lambda_edges[not_converged]
+            gamma_q = gamma_q[not_converged]
+
+        self._batch_stats = [
+            {'bp_iterations': int(n_iterations)}
+            for n_iterations in self.last_n_iterations
+        ]
+
+        return np.hstack([
+            np.logical_or(corrections == PAULI_X, corrections == PAULI_Y),
+            np.logical_or(corrections == PAULI_Y, corrections == PAULI_Z),
+        ]).astype('uint8')
 
 
 def test_decoder():
@@ -227,48 +600,34 @@ def test_decoder():
     from panqec.error_models import PauliErrorModel
     import time
 
-    L = 4
+    L = 10
     max_bp_iter = 10
     alpha = 0.4
 
     code = Toric3DCode(L)
 
-    error_rate = 0.3
+    error_rate = 0.05
     r_x, r_y, r_z = [0.333, 0.333, 0.334]
     error_model = PauliErrorModel(r_x, r_y, r_z)
 
     decoder = MemoryBeliefPropagationDecoder(
         code, error_model, error_rate, max_bp_iter=max_bp_iter, alpha=alpha
     )
+    rng = np.random.default_rng()
 
     # Start timer
     start = time.time()
 
-    n_iter = 1
+    n_iter = 10
+    n_success = 0
     for i in range(n_iter):
-        print(f"\n\nRun {code.label} {i}...")
-        print("Generate errors")
-        error = np.zeros(2*code.n)
-        error[10] = 1
-        error[52] = 1
-        error[58] = 1
-
-        print("Calculate syndrome")
+        error = error_model.generate(code, error_rate, rng=rng)
         syndrome = code.measure_syndrome(error)
-
-        print("Decode")
         correction = decoder.decode(syndrome)
-        print("Get total error")
         total_error = (correction + error) % 2
-        print("Get effective error")
-        effective_error = code.logical_errors(total_error)
-
-        print("Check codespace")
-        codespace = code.in_codespace(total_error)
-        success = bool(np.all(effective_error == 0)) and codespace
-
-        print("Success:", success)
+        n_success += code.is_success(total_error)
 
+    print("Success rate:", n_success / n_iter)
     print("Average time per iteration", (time.time() - start) / n_iter)
 
 
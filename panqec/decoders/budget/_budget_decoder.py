@@ -0,0 +1,201 @@
+import signal
+import threading
+import time
+from typing import Dict, Optional, Union
+import numpy as np
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.error_models import BaseErrorModel
+
+
+class _BudgetExceeded(Exception):
+    """Raised by the timer interrupting a decoder over its time budget."""
+
+
+def _raise_budget_exceeded(signum, frame):
+    raise _BudgetExceeded()
+
+
+class BudgetDecoder(BaseDecoder):
+    """Wrapper that limits the time or the number of iterations spent by
+    another decoder on each syndrome.
+
+    A decoding is over budget if it takes longer than `max_time` seconds,
+    or if its statistics (see `BaseDecoder.last_decode_stats`) exceed
+    `max_stats`, e.g. `{'bp_iterations': 100, 'osd_calls': 0}`.
+    Its correction is then discarded, and replaced with the correction of
+    the `fallback` decoder if there is one, or with the identity
+    otherwise (fail-fast), so that the shot is counted as a failure.
+    Whether each decoding went over budget is reported as the
+    `budget_exceeded` decoding statistic, and simulations count these
+    shots separately.
+
+    When `interrupt` is set, a decoder over its time budget is interrupted
+    with a timer signal (on the main thread of Unix systems only).
+    The interruption only takes effect in Python code, so decoders
+    running in native code (PyMatching, ldpc) are only stopped when they
+    return, and are then treated as over budget.
+    Decoders run in other threads (e.g. by `ThreadPoolDecoder`) cannot be
+    interrupted, so their time is only checked when they return, and
+    only the iteration budget given by `max_stats` bounds their work.
+    """
+
+    allowed_codes = None  # all codes allowed
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 decoder: Union[BaseDecoder, Dict],
+                 max_time: Optional[float] = None,
+                 max_stats: Optional[Dict[str, float]] = None,
+                 fallback: Optional[Union[BaseDecoder, Dict]] = None,
+                 interrupt: bool = True):
+        """Constructor for the BudgetDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder
+        error_rate: float
+            Error rate used by the decoder
+        decoder: Union[BaseDecoder, Dict]
+            Decoder to limit, either as an instance or as a dictionary
+            `{'name': ..., 'parameters': ...}` of a registered decoder,
+            in the same format as in input files
+        max_time: float, optional
+            Maximum decoding time of a syndrome, in seconds
+        max_stats: Dict[str, float], optional
+            Maximum value of the decoding statistics of a syndrome
+        fallback: Union[BaseDecoder, Dict], optional
+            Decoder used for syndromes over budget, in the same format as
+            `decoder`. If None, the identity correction is returned.
+        interrupt: bool, optional
+            Whether to interrupt decoders over their time budget
+        """
+        super().__init__(code, error_model, error_rate)
+
+        if max_time is not None and max_time <= 0:
+            raise ValueError(
+                f"Argument 'max_time' must be positive, not {max_time}"
+            )
+
+        from panqec.simulation._batch_simulation import _parse_decoder_dict
+        if isinstance(decoder, dict):
+            decoder = _parse_decoder_dict(
+                decoder, code, error_model, error_rate
+            )
+        if isinstance(fallback, dict):
+            fallback = _parse_decoder_dict(
+                fallback, code, error_model, error_rate
+            )
+
+        self.decoder = decoder
+        self.fallback = fallback
+        self.max_time = max_time
+        self.max_stats = dict(max_stats) if max_stats is not None else None
+        self.interrupt = interrupt
+
+        self.n_budget_exceeded = 0
+
+    @property
+    def label(self) -> str:
+        return self.decoder.label
+
+    @property
+    def params(self) -> dict:
+        fallback = None
+        if self.fallback is not None:
+            fallback = {
+                'name': self.fallback.id,
+                'parameters': self.fallback.params
+            }
+        return {
+            'decoder': {
+                'name': self.decoder.id,
+                'parameters': self.decoder.params
+            },
+            'max_time': self.max_time,
+            'max_stats': self.max_stats,
+            'fallback': fallback,
+            'interrupt': self.interrupt
+        }
+
+    def set_error_rate(self, error_rate: float):
+        """Move the decoder and the fallback to another error rate."""
+        super().set_error_rate(error_rate)
+        self.decoder.set_error_rate(error_rate)
+        if self.fallback is not None:
+            self.fallback.set_error_rate(error_rate)
+
+    def _can_interrupt(self) -> bool:
+        """Whether a timer signal can interrupt the decoder, which is
+        only possible on the main thread."""
+        return (
+            self.interrupt
+            and hasattr(signal, 'setitimer')
+            and threading.current_thread() is threading.main_thread()
+            and signal.getsignal(signal.SIGALRM) in (signal.SIG_DFL, None)
+        )
+
+    def _decode_within_budget(
+        self, syndrome: np.ndarray, **kwargs
+    ) -> Optional[np.ndarray]:
+        """Correction of the decoder, or None if it is over budget."""
+        correction = None
+        max_time = self.max_time
+        start_time = time.perf_counter()
+
+        if max_time is not None and self._can_interrupt():
+            previous_handler = signal.signal(
+                signal.SIGALRM, _raise_budget_exceeded
+            )
+            try:
+                try:
+                    signal.setitimer(signal.ITIMER_REAL, max_time)
+                    correction = self.decoder.decode(syndrome, **kwargs)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            except _BudgetExceeded:
+                return None
+            finally:
+                signal.signal(signal.SIGALRM, previous_handler)
+        else:
+            correction = self.decoder.decode(syndrome, **kwargs)
+
+        decode_time = time.perf_counter() - start_time
+        if max_time is not None and decode_time > max_time:
+            return None
+
+        if self.max_stats is not None:
+            stats = self.decoder.last_decode_stats()
+            if any(
+                stats.get(name, 0) > value
+                for name, value in self.max_stats.items()
+            ):
+                return None
+
+        return correction
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get the correction of the decoder, or of the fallback if the
+        decoder is over budget."""
+
+        # Some decoders modify the syndrome in place, so give them a copy.
+        correction = self._decode_within_budget(np.array(syndrome), **kwargs)
+        if correction is not None:
+            self._decode_stats = {
+                'budget_exceeded': 0, **self.decoder.last_decode_stats()
+            }
+            return correction
+
+        self.n_budget_exceeded += 1
+        self._decode_stats = {'budget_exceeded': 1}
+        if self.fallback is None:
+            return np.zeros(2*self.code.n, dtype=np.uint)
+
+        correction = self.fallback.decode(np.array(syndrome), **kwargs)
+        self._decode_stats.update(self.fallback.last_decode_stats())
+        return correction
@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from typing import Dict, Union, cast
+import numpy as np
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.error_models import BaseErrorModel
+
+
+class CachedDecoder(BaseDecoder):
+    """Wrapper that memoizes the corrections of any other decoder.
+
+    Trivial syndromes are answered immediately with the identity correction,
+    and the corrections of non-trivial syndromes are kept in a bounded
+    least-recently-used table keyed by the packed syndrome.
+    Below threshold, most shots have a trivial or low-weight syndrome
+    that has already been seen, so most calls to the wrapped decoder
+    can be skipped.
+
+    Note that for decoders with internal randomness (such as tie-breaking
+    in the sweep decoder), a cache hit returns the same correction as the
+    first time the syndrome was decoded.
+    """
+
+    allowed_codes = None  # all codes allowed
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 decoder: Union[BaseDecoder, Dict],
+                 max_size: int = 10000):
+        """Constructor for the CachedDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder
+        error_rate: float
+            Error rate used by the decoder
+        decoder: Union[BaseDecoder, Dict]
+            Decoder to wrap, either as an instance or as a dictionary
+            `{'name': ..., 'parameters': ...}` of a registered decoder,
+            in the same format as in input files
+        max_size: int, optional
+            Maximum number of syndromes kept in the cache of each error rate.
+            The least recently used entry is evicted when the cache is full.
+        """
+        super().__init__(code, error_model, error_rate)
+
+        if max_size < 0:
+            raise ValueError(
+                f"Argument 'max_size' must be non-negative, not {max_size}"
+            )
+
+        if isinstance(decoder, dict):
+            from panqec.simulation._batch_simulation import (
+                _parse_decoder_dict
+            )
+            decoder = _parse_decoder_dict(
+                decoder, code, error_model, error_rate
+            )
+
+        self.decoder = decoder
+        self.max_size = max_size
+
+        # One table per error rate, since the corrections depend on it.
+        self._caches: Dict[float, OrderedDict] = dict()
+        self._cache: OrderedDict = self._caches.setdefault(
+            error_rate, OrderedDict()
+        )
+        self.n_trivial = 0
+        self.n_hits = 0
+        self.n_misses = 0
+
+    @property
+    def label(self) -> str:
+        return f'Cached {self.decoder.label}'
+
+    @property
+    def params(self) -> dict:
+        return {
+            'decoder': {
+                'name': self.decoder.id,
+                'parameters': self.decoder.params
+            },
+            'max_size': self.max_size
+        }
+
+    def cache_info(self) -> dict:
+        """Counters of the cache, in the spirit of
+        `functools.lru_cache`.
+
+        Returns
+        -------
+        info : dict
+            Number of trivial syndromes, cache hits and misses,
+            as well as the maximum and current size of the cache.
+        """
+        return {
+            'trivial': self.n_trivial,
+            'hits': self.n_hits,
+            'misses': self.n_misses,
+            'max_size': self.max_size,
+            'size': len(self._cache),
+        }
+
+    def cache_clear(self):
+        """Empty the cache and reset all the counters."""
+        self._caches.clear()
+        self._cache = self._caches.setdefault(self.error_rate, OrderedDict())
+        self.n_trivial = 0
+        self.n_hits = 0
+        self.n_misses = 0
+
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Copy of the decoder with its own cache and counters."""
+        replica = cast(CachedDecoder, super().replicate(seed))
+        replica._caches = dict()
+        replica.cache_clear()
+        return replica
+
+    def set_error_rate(self, error_rate: float):
+        """Move the wrapped decoder to another error rate, and switch to
+        the table of corrections of that error rate."""
+        super().set_error_rate(error_rate)
+        self.decoder.set_error_rate(error_rate)
+        self._cache = self._caches.setdefault(error_rate, OrderedDict())
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get the correction of the wrapped decoder, using the cache
+        whenever the syndrome has already been decoded."""
+
+        self._decode_stats = {}
+        if not np.any(syndrome):
+            self.n_trivial += 1
+            return np.zeros(2*self.code.n, dtype=np.uint)
+
+        key = np.packbits(np.asarray(syndrome, dtype=np.uint8)).tobytes()
+
+        if key in self._cache:
+            self.n_hits += 1
+            self._decode_stats = {'cache_hit': 1}
+            self._cache.move_to_end(key)
+            return self._cache[key].copy()
+
+        self.n_misses += 1
+
+        # Some decoders modify the syndrome in place, so give them a copy.
+        correction = self.decoder.decode(np.array(syndrome), **kwargs)
+        self._decode_stats = {
+            'cache_hit': 0, **self.decoder.last_decode_stats()
+        }
+
+        if self.max_size > 0:
+            self._cache[key] = np.array(correction)
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return correction
@@ -0,0 +1,186 @@
+from typing import Dict, List, Optional, Union, cast
+import numpy as np
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.decoders.base._base_decoder import derive_seed
+from panqec.error_models import BaseErrorModel
+
+
+class CascadeDecoder(BaseDecoder):
+    """Chain of decoders, from the cheapest to the most expensive.
+
+    Each syndrome is first given to the first decoder of the chain.
+    Its correction is accepted if it reproduces the syndrome and if the
+    statistics of the decoding (see `BaseDecoder.last_decode_stats`) are
+    within the limits given for that stage, e.g. `{'bp_iterations': 20}`
+    or `{'table_miss': 0}`.
+    Otherwise, the syndrome is decoded from scratch by the next decoder,
+    and the correction of the last decoder is always accepted.
+
+    Near and below threshold, most syndromes are resolved by a cheap
+    decoder (lookup table, sweep, union-find, matching), so an expensive
+    decoder such as BP-OSD with a high OSD order only runs on the few
+    syndromes that the others could not resolve.
+    """
+
+    allowed_codes = None  # all codes allowed
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 decoders: List[Union[BaseDecoder, Dict]],
+                 max_stats: Optional[List[Optional[Dict[str, float]]]] = None):
+        """Constructor for the CascadeDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder
+        error_rate: float
+            Error rate used by the decoder
+        decoders: List[Union[BaseDecoder, Dict]]
+            Decoders of each stage, in the order in which they are tried,
+            either as instances or as dictionaries
+            `{'name': ..., 'parameters': ...}` of registered decoders,
+            in the same format as in input files
+        max_stats: List[Optional[Dict[str, float]]], optional
+            For each stage, maximum value of the decoding statistics above
+            which the correction is not trusted and the next stage is
+            tried. None (the default) only checks the residual syndrome.
+        """
+        super().__init__(code, error_model, error_rate)
+
+        if len(decoders) == 0:
+            raise ValueError("Argument 'decoders' must not be empty")
+        if max_stats is None:
+            max_stats = [None]*len(decoders)
+        if len(max_stats) != len(decoders):
+            raise ValueError(
+                f"Argument 'max_stats' must have one entry per decoder "
+                f"({len(decoders)}), not {len(max_stats)}"
+            )
+
+        from panqec.simulation._batch_simulation import _parse_decoder_dict
+        self.decoders: List[BaseDecoder] = [
+            _parse_decoder_dict(decoder, code, error_model, error_rate)
+            if isinstance(decoder, dict) else decoder
+            for decoder in decoders
+        ]
+        self.max_stats = [
+            dict(stats) if stats is not None else None for stats in max_stats
+        ]
+
+        self.n_trivial = 0
+        self.n_calls = np.zeros(len(self.decoders), dtype=int)
+        self.n_resolved = np.zeros(len(self.decoders), dtype=int)
+
+    @property
+    def label(self) -> str:
+        return 'Cascade ' + ' > '.join(
+            decoder.label for decoder in self.decoders
+        )
+
+    @property
+    def params(self) -> dict:
+        return {
+            'decoders': [
+                {'name': decoder.id, 'parameters': decoder.params}
+                for decoder in self.decoders
+            ],
+            'max_stats': self.max_stats
+        }
+
+    def stage_info(self) -> List[dict]:
+        """Counters of each stage of the cascade.
+
+        Returns
+        -------
+        info : List[dict]
+            For each stage, the label of its decoder, the number of
+            syndromes it was given (`calls`) and resolved (`resolved`),
+            and the fraction of all non-trivial syndromes it resolved
+            (`hit_rate`).
+        """
+        n_total = self.n_calls[0]
+        return [
+            {
+                'decoder': decoder.label,
+                'calls': int(self.n_calls[i]),
+                'resolved': int(self.n_resolved[i]),
+                'hit_rate': (
+                    self.n_resolved[i] / n_total if n_total > 0 else np.nan
+                ),
+            }
+            for i, decoder in enumerate(self.decoders)
+        ]
+
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Copy of the decoder with replicas of the decoders of each
+        stage and its own counters."""
+        replica = cast(CascadeDecoder, super().replicate(seed))
+        replica.decoders = [
+            decoder.replicate(derive_seed(seed, i))
+            for i, decoder in enumerate(self.decoders)
+        ]
+        replica.n_trivial = 0
+        replica.n_calls = np.zeros(len(self.decoders), dtype=int)
+        replica.n_resolved = np.zeros(len(self.decoders), dtype=int)
+        return replica
+
+    def close(self):
+        """Close the decoders of each stage."""
+        for decoder in self.decoders:
+            decoder.close()
+
+    def set_error_rate(self, error_rate: float):
+        """Move the decoders of all stages to another error rate."""
+        super().set_error_rate(error_rate)
+        for decoder in self.decoders:
+            decoder.set_error_rate(error_rate)
+
+    def _is_resolved(
+        self, i_stage: int, syndrome: np.ndarray, correction: np.ndarray
+    ) -> bool:
+        """Whether the correction of a stage is accepted."""
+        if i_stage == len(self.decoders) - 1:
+            return True
+
+        max_stats = self.max_stats[i_stage]
+        if max_stats is not None:
+            stats = self.decoders[i_stage].last_decode_stats()
+            if any(
+                stats.get(name, 0) > value
+                for name, value in max_stats.items()
+            ):
+                return False
+
+        return bool(np.all(self.code.measure_syndrome(correction) == syndrome))
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get the correction of the first stage that resolves the
+        syndrome."""
+
+        self._decode_stats = {}
+        if not np.any(syndrome):
+            self.n_trivial += 1
+            return np.zeros(2*self.code.n, dtype=np.uint)
+
+        syndrome = np.asarray(syndrome, dtype=np.uint)
+        for i_stage, decoder in enumerate(self.decoders):
+            self.n_calls[i_stage] += 1
+
+            # Some decoders modify the syndrome in place, so give them a copy.
+            correction = decoder.decode(np.array(syndrome))
+
+            if self._is_resolved(i_stage, syndrome, correction):
+                self.n_resolved[i_stage] += 1
+                break
+
+        self._decode_stats = {
+            'cascade_stage': i_stage, **decoder.last_decode_stats()
+        }
+
+        return correction
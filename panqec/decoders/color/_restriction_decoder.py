@@ -0,0 +1,459 @@
+from typing import Any, Dict, List, Tuple, cast
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from ldpc import bposd_decoder
+from pymatching import Matching
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.error_models import BaseErrorModel
+
+
+class RestrictionDecoder(BaseDecoder):
+    """Restriction decoder for 2D color codes, based on PyMatching.
+
+    The faces of the lattice are grouped by color (read from
+    `stabilizer_type`), and one color is chosen as the lift color.
+    For each of the two other colors, the restricted lattice made of the
+    faces of that color and of the lift color is decoded with PyMatching.
+    The matched edges of both restricted lattices are then lifted to a
+    correction around each face of the lift color, by looking up the
+    lowest-weight set of qubits of the face that flips exactly the
+    neighbouring faces at the end of a matched edge.
+    X and Z errors are decoded independently.
+
+    On planar codes, each boundary is treated as an extra face of its
+    color without stabilizer, made of the qubits that are not in any face
+    of that color. If the lift leaves any defect, it is decoded with BP-OSD
+    on the whole lattice (reported as `fallback_decodes`).
+
+    See Kubica and Delfosse, Efficient color code decoders in d >= 2
+    dimensions from toric code decoders, arXiv:1905.07393.
+    """
+
+    label = 'Color Restriction'
+    allowed_codes = [
+        "Color666ToricCode", "Color666PlanarCode", "Color488Code"
+    ]
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 osd_order: int = 0):
+        """Constructor for the RestrictionDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder (to find the weights)
+        error_rate: float
+            Error rate used by the decoder (to find the weights)
+        osd_order: int, optional
+            OSD order of the BP-OSD decoder of the leftover defects
+        """
+        super().__init__(code, error_model, error_rate)
+
+        if not code.is_css:
+            raise ValueError("The restriction decoder only works for CSS "
+                             "color codes")
+
+        self.osd_order = osd_order
+
+        # X errors are detected by the Z stabilizers and vice versa.
+        self._problems = [
+            self._get_problem(code.Hz, np.flatnonzero(code.z_indices)),
+            self._get_problem(code.Hx, np.flatnonzero(code.x_indices)),
+        ]
+
+        # Matchings of the restricted lattices of each error rate, and
+        # BP-OSD decoders of the leftover defects, built only when needed.
+        self._matchers: Dict[float, List[List[Matching]]] = dict()
+        self._fallbacks: Dict[Tuple[float, int], Any] = dict()
+        self.set_error_rate(error_rate)
+
+    @property
+    def params(self) -> dict:
+        return {
+            'osd_order': self.osd_order
+        }
+
+    def _get_problem(self, H, rows: np.ndarray) -> Dict[str, Any]:
+        """Restricted lattices and lifts of one type of stabilizers."""
+        code = self.code
+        H = (csr_matrix(H) != 0).astype(np.uint8).tocsr()
+        n = H.shape[1]
+
+        # Some lattices list the same face twice, so faces are identified
+        # by their support, and decoded from the first of their rows.
+        supports: Dict[Tuple, int] = dict()
+        face_rows: List[int] = []
+        face_colors: List[str] = []
+        for i_row, row in enumerate(rows):
+            support = tuple(H[i_row].indices)
+            if support not in supports:
+                supports[support] = len(face_rows)
+                face_rows.append(i_row)
+                # Stabilizer types are of the form 'face-red-x'.
+                stabilizer_type = code.stabilizer_type(
+                    code.stabilizer_coordinates[row]
+                ).split('-')
+                if len(stabilizer_type) != 3:
+                    raise ValueError(
+                        f"The restriction decoder needs colored faces, "
+                        f"not {'-'.join(stabilizer_type)}"
+                    )
+                face_colors.append(stabilizer_type[1])
+        n_faces = len(face_rows)
+
+        color_names = sorted(set(face_colors))
+        if len(color_names) != 3:
+            raise ValueError(
+                f"The restriction decoder needs faces of three colors, "
+                f"not {color_names}"
+            )
+
+        # Each boundary is treated as an extra face (without stabilizer)
+        # made of the qubits that are not in any face of its color.
+        faces = H[face_rows]
+        colors = np.array(face_colors)
+        boundaries = []
+        for color in color_names:
+            coverage = np.asarray(faces[colors == color].sum(axis=0)).ravel()
+            if np.any(coverage == 0):
+                boundaries.append((color, np.flatnonzero(coverage == 0)))
+        faces = vstack([faces] + [
+            csr_matrix(
+                (np.ones(len(qubits), dtype=np.uint8),
+                 (np.zeros(len(qubits), dtype=int), qubits)),
+                shape=(1, n)
+            )
+            for _, qubits in boundaries
+        ]).tocsr()
+        colors = np.concatenate([colors, [color for color, _ in boundaries]])
+        is_boundary = np.arange(len(colors)) >= n_faces
+
+        # The lift color must cover each qubit exactly once.
+        candidates = []
+        for color in color_names:
+            coverage = np.asarray(faces[colors == color].sum(axis=0)).ravel()
+            if np.all(coverage == 1):
+                sizes = np.diff(faces[(colors == color) & ~is_boundary].indptr)
+                candidates.append((sizes.max(), color))
+        if len(candidates) == 0:
+            raise ValueError(
+                "The restriction decoder needs a color whose faces do not "
+                "overlap"
+            )
+        lift_color = min(candidates)[1]
+
+        # The faces of the lift color, with the boundary of that color last.
+        lift_faces = np.flatnonzero((colors == lift_color) & ~is_boundary)
+        n_lift_faces = len(lift_faces)
+        cells = np.flatnonzero(colors == lift_color)
+        faces_csc = faces.tocsc()
+
+        def neighbours(cell):
+            """Faces of the other colors sharing qubits with a cell."""
+            found = np.unique(faces_csc[:, faces[cell].indices].indices)
+            return found[colors[found] != lift_color]
+
+        # Lowest-weight subset of the qubits of each lift face for every
+        # pattern of flipped faces around it (or the closest reachable
+        # pattern), the face itself coming first and boundaries last.
+        # Boundaries have no syndrome, so they are left out of the pattern.
+        table_faces = [
+            np.concatenate([[face], neighbours(face)]) for face in lift_faces
+        ]
+        table_faces = [
+            found[~is_boundary[found]] for found in table_faces
+        ]
+        max_qubits = max(len(faces[face].indices) for face in lift_faces)
+        max_faces = max(len(found) for found in table_faces)
+        tables = np.zeros((n_lift_faces, 2**max_faces), dtype=np.int64)
+        cell_qubits = np.full((n_lift_faces, max_qubits), -1, dtype=np.int64)
+        for i_cell, face in enumerate(lift_faces):
+            qubits = faces[face].indices
+            cell_qubits[i_cell, :len(qubits)] = qubits
+            tables[i_cell] = _lift_table(
+                faces[table_faces[i_cell]][:, qubits].toarray(), max_faces
+            )
+
+        # The boundary of the lift color is too long for a table, so its
+        # lift is found by solving a linear system.
+        boundary_lift = None
+        if len(cells) > n_lift_faces:
+            boundary = cells[-1]
+            found = neighbours(boundary)
+            found = found[~is_boundary[found]]
+            qubits = faces[boundary].indices
+            solution, kernel = _solve_gf2(faces[found][:, qubits].toarray())
+            table_faces.append(found)
+            boundary_lift = {
+                'qubits': qubits,
+                'solution': solution,
+                'kernel': kernel,
+                'n_faces': len(found),
+            }
+
+        # Restricted lattices, whose nodes are the faces of the lift color
+        # and of another color, and whose edges join neighbouring faces
+        # (or a face and a boundary, which is not a node).
+        lattices = []
+        for color in color_names:
+            if color == lift_color:
+                continue
+            nodes = np.flatnonzero(
+                ((colors == lift_color) | (colors == color)) & ~is_boundary
+            )
+            node_index = np.full(len(colors), -1)
+            node_index[nodes] = np.arange(len(nodes))
+
+            edge_rows: List[int] = []
+            edge_cols: List[int] = []
+            edge_cells: List[int] = []
+            edge_positions: List[int] = []
+            edge_qubits: List[np.ndarray] = []
+            for i_cell, cell in enumerate(cells):
+                for face in neighbours(cell):
+                    if colors[face] != color or (
+                        is_boundary[cell] and is_boundary[face]
+                    ):
+                        continue
+                    i_edge = len(edge_cells)
+                    for end in [cell, face]:
+                        if not is_boundary[end]:
+                            edge_rows.append(node_index[end])
+                            edge_cols.append(i_edge)
+                    position = np.flatnonzero(table_faces[i_cell] == face)
+                    edge_cells.append(i_cell)
+                    edge_positions.append(
+                        position[0] if len(position) > 0 else -1
+                    )
+                    edge_qubits.append(np.intersect1d(
+                        faces[cell].indices, faces[face].indices
+                    ))
+
+            lattices.append({
+                'nodes': nodes,
+                'H': csr_matrix(
+                    (np.ones(len(edge_rows), dtype=np.uint8),
+                     (edge_rows, edge_cols)),
+                    shape=(len(nodes), len(edge_cells))
+                ),
+                'cells': np.array(edge_cells),
+                'positions': np.array(edge_positions),
+                'qubits': edge_qubits,
+            })
+
+        return {
+            'H': H,
+            'rows': rows,
+            'face_rows': np.array(face_rows),
+            'lift_faces': lift_faces,
+            'tables': tables,
+            'cell_qubits': cell_qubits,
+            'boundary_lift': boundary_lift,
+            'lattices': lattices,
+            'n': n,
+        }
+
+    def set_error_rate(self, error_rate: float):
+        """Reweight the restricted lattices for another error rate."""
+        super().set_error_rate(error_rate)
+
+        if error_rate not in self._matchers:
+            wx, wz = self.error_model.get_weights(self.code, error_rate)
+            self._matchers[error_rate] = [
+                [
+                    Matching(
+                        lattice['H'],
+                        spacelike_weights=np.array([
+                            np.min(weights[qubits])
+                            for qubits in lattice['qubits']
+                        ])
+                    )
+                    for lattice in problem['lattices']
+                ]
+                for problem, weights in zip(self._problems, [wx, wz])
+            ]
+
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Copy of the decoder sharing the matching graphs, with its own
+        BP-OSD decoders for the leftover defects."""
+        replica = cast(RestrictionDecoder, super().replicate(seed))
+        replica._fallbacks = dict()
+        return replica
+
+    def _get_fallback(self, i_problem: int):
+        """BP-OSD decoder of the leftover defects of a type of errors."""
+        key = (self.error_rate, i_problem)
+        if key not in self._fallbacks:
+            pi, px, py, pz = self.error_model.probability_distribution(
+                self.code, self.error_rate
+            )
+            probs = [px + py, pz + py][i_problem]
+            H = self._problems[i_problem]['H']
+            self._fallbacks[key] = bposd_decoder(
+                H,
+                channel_probs=probs,
+                max_iter=100,
+                bp_method='msl',
+                ms_scaling_factor=0,
+                osd_method='osd_cs',
+                osd_order=min(self.osd_order, H.shape[1])
+            )
+        return self._fallbacks[key]
+
+    def _decode_problem(
+        self, i_problem: int, syndrome: np.ndarray
+    ) -> np.ndarray:
+        """Correction of one type of errors given its syndrome."""
+        problem = self._problems[i_problem]
+        matchers = self._matchers[self.error_rate][i_problem]
+        face_syndrome = syndrome[problem['face_rows']]
+
+        # Pattern of flipped faces around each lift face, as a binary
+        # number whose first bit is the syndrome of the face itself, and
+        # flipped faces along the boundary of the lift color.
+        lift_faces = problem['lift_faces']
+        n_lift_faces = len(lift_faces)
+        boundary_lift = problem['boundary_lift']
+        patterns = face_syndrome[lift_faces].astype(np.int64)
+        if boundary_lift is not None:
+            boundary_pattern = np.zeros(boundary_lift['n_faces'], dtype=int)
+
+        for lattice, matcher in zip(problem['lattices'], matchers):
+            node_syndrome = face_syndrome[lattice['nodes']]
+            if not np.any(node_syndrome):
+                continue
+            edges = np.flatnonzero(
+                matcher.decode(node_syndrome, num_neighbours=None)
+            )
+            edges = edges[lattice['positions'][edges] >= 0]
+            cells = lattice['cells'][edges]
+            positions = lattice['positions'][edges]
+            on_faces = cells < n_lift_faces
+            np.bitwise_xor.at(
+                patterns, cells[on_faces],
+                np.left_shift(1, positions[on_faces])
+            )
+            if boundary_lift is not None:
+                np.bitwise_xor.at(
+                    boundary_pattern, positions[~on_faces], 1
+                )
+
+        correction = np.zeros(problem['n'], dtype=np.uint8)
+
+        cells = np.flatnonzero(patterns)
+        subsets = problem['tables'][cells, patterns[cells]]
+        qubits = problem['cell_qubits'][cells]
+        selected = (subsets[:, None] >> np.arange(qubits.shape[1])) & 1
+        correction[qubits[selected.astype(bool)]] = 1
+
+        if boundary_lift is not None and np.any(boundary_pattern):
+            # Lowest-weight solution among those differing by the kernel.
+            solutions = (
+                boundary_lift['solution'] @ boundary_pattern
+                + boundary_lift['kernel']
+            ) % 2
+            best = solutions[np.argmin(solutions.sum(axis=1))]
+            correction[boundary_lift['qubits'][best.astype(bool)]] = 1
+
+        residual = (syndrome + problem['H'] @ correction) % 2
+        if np.any(residual):
+            self._decode_stats['fallback_decodes'] += 1
+            correction ^= np.asarray(
+                self._get_fallback(i_problem).decode(residual),
+                dtype=np.uint8
+            )
+
+        return correction
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections given code and measured syndrome."""
+
+        syndrome = np.asarray(syndrome, dtype=np.uint8)
+        n = self.code.n
+        correction = np.zeros(2*n, dtype=np.uint)
+        self._decode_stats = {'fallback_decodes': 0}
+
+        for i_problem, problem in enumerate(self._problems):
+            sub_syndrome = syndrome[problem['rows']]
+            if np.any(sub_syndrome):
+                correction[i_problem*n:(i_problem + 1)*n] = (
+                    self._decode_problem(i_problem, sub_syndrome)
+                )
+
+        return correction
+
+
+def _lift_table(A: np.ndarray, n_bits: int) -> np.ndarray:
+    """Lowest-weight subset of the columns of A (as a binary number) whose
+    sum is closest to each pattern of rows (as a binary number)."""
+    n_rows, n_cols = A.shape
+    subsets = np.arange(2**n_cols)
+    chosen = (subsets[:, None] >> np.arange(n_cols)) & 1
+    images = (chosen @ A.T.astype(np.int64)) % 2
+    image_patterns = images @ (1 << np.arange(n_rows))
+    weights = chosen.sum(axis=1)
+
+    patterns = np.arange(2**n_bits)
+    distances = np.array([
+        bin(p).count('1') for p in range(2**n_bits)
+    ])[patterns[:, None] ^ image_patterns[None, :]]
+    best = np.argmin(distances*(n_cols + 1) + weights[None, :], axis=1)
+    return subsets[best]
+
+
+def _solve_gf2(A: np.ndarray, max_kernel: int = 10) -> Tuple[
+    np.ndarray, np.ndarray
+]:
+    """Solutions of A x = b modulo 2.
+
+    Returns
+    -------
+    solution : np.ndarray
+        Matrix S such that S b is a solution whenever there is one.
+    kernel : np.ndarray
+        All the sums of the basis vectors of the kernel of A (or only the
+        zero vector if the kernel has more than `max_kernel` dimensions),
+        one per row, to be added to the solution.
+    """
+    n_rows, n_cols = A.shape
+    reduced = A.astype(np.uint8) % 2
+    operations = np.eye(n_rows, dtype=np.uint8)
+    pivots: List[int] = []
+    i_row = 0
+    for col in range(n_cols):
+        found = np.flatnonzero(reduced[i_row:, col]) + i_row
+        if i_row == n_rows or len(found) == 0:
+            continue
+        for matrix in [reduced, operations]:
+            matrix[[i_row, found[0]]] = matrix[[found[0], i_row]]
+        for other in np.flatnonzero(reduced[:, col]):
+            if other != i_row:
+                reduced[other] ^= reduced[i_row]
+                operations[other] ^= operations[i_row]
+        pivots.append(col)
+        i_row += 1
+        if i_row == n_rows:
+            break
+
+    solution = np.zeros((n_cols, n_rows), dtype=np.uint8)
+    solution[pivots] = operations[:len(pivots)]
+
+    free = [col for col in range(n_cols) if col not in pivots]
+    basis = np.zeros((len(free), n_cols), dtype=np.uint8)
+    for i_free, col in enumerate(free):
+        basis[i_free, col] = 1
+        basis[i_free, pivots] = reduced[:len(pivots), col]
+    if len(free) > max_kernel:
+        basis = basis[:0]
+    combinations = (
+        np.arange(2**len(basis))[:, None] >> np.arange(len(basis))
+    ) & 1
+    kernel = (combinations @ basis) % 2
+
+    return solution, kernel
@@ -1,91 +1,107 @@
+from typing import cast
 import numpy as np
-from panqec.codes import StabilizerCode
+from panqec.codes import StabilizerCode, FermionSquare
 from panqec.error_models import BaseErrorModel
 from panqec.decoders import BaseDecoder
-import panqec.bsparse as bsparse
+
 
 class FermionSquareDecoder(BaseDecoder):
     """Basic Fermion Square Encoding Decoder:
-    Searches for isolated 1-qubit error signatures for X,Y,Z errors on face qubits
-    and X,Y errors (have the same signature) on vertex qubits. Z-errors on vertex
-    qubits are undetectable and are ignored as a natural phase noise."""
+    Searches for isolated 1-qubit error signatures for X,Y,Z errors on face
+    qubits and X,Y errors (have the same signature) on vertex qubits.
+    Z-errors on vertex qubits are undetectable and are ignored as a natural
+    phase noise."""
 
     label = 'Fermion Square Decoder'
     allowed_codes = ['FermionSquare']
-        
-    #get coordinates of x,y,z errors separately
-    def error_coordinates(self, errors):
-        x_errors=[]
-        y_errors=[]
-        z_errors=[]
-        for errors_index in range(len(errors)):
-            if errors_index < len(self.code.qubit_coordinates) and errors[errors_index]:
-                x_errors.append(self.code.qubit_coordinates[errors_index])
-            elif errors[errors_index]:
-                if self.code.qubit_coordinates[errors_index%len(self.code.qubit_coordinates)] in x_errors:
-                    y_errors.append(self.code.qubit_coordinates[errors_index%len(self.code.qubit_coordinates)])
-                    x_errors.remove(self.code.qubit_coordinates[errors_index%len(self.code.qubit_coordinates)])
-                else:
-                    z_errors.append(self.code.qubit_coordinates[errors_index%len(self.code.qubit_coordinates)])
-        return x_errors, y_errors, z_errors
-
-    
-    #get coordinates of activated stabilizers
-    def stabilizer_coordinates(self, syndrome):
-        stabilizers = []
-        for stab_ind in range(len(syndrome)):
-            if syndrome[stab_ind]:
-                stabilizers.append(self.code.stabilizer_coordinates[stab_ind])
-        return stabilizers
-    
- 
-    #look for face qubit error patterns, return correction and updated syndrome
-    def decode(self, code: StabilizerCode, syndrome: np.ndarray, **kwargs) -> np.ndarray:
-        """Get X,Z corrections given code and measured syndrome."""
-        self.code = code
-        correction = np.zeros(2*self.code.n, dtype=np.uint)
-        updated_syndrome = copy.deepcopy(syndrome)
-        key_list = list(self.code.qsmap.keys())
-        num_vertex_qubits = code.size[0]**2
-        key_list_vertex = key_list[:num_vertex_qubits]
-        random.shuffle(key_list_vertex)
-        key_list_face = key_list[num_vertex_qubits:]
-        random.shuffle(key_list_face)
-        random.shuffle(key_list)
-        
-        for q_i in key_list_face + key_list_vertex: #face first, then vertex, both shuffled separately
-        #for q_i in key_list: # all shuffled
-            corrected = False
-            stab_arr = self.code.qsmap[q_i]
-            #face qubit
-            if len(stab_arr) == 4:
-                if updated_syndrome[stab_arr[0]] and updated_syndrome[stab_arr[1]] and updated_syndrome[stab_arr[2]] and updated_syndrome[stab_arr[3]]:
-                    #Z error
-                    correction[q_i + self.code.n] = (correction[q_i + self.code.n] + 1) % 2
-                    corrected = True
-                elif updated_syndrome[stab_arr[0]] and updated_syndrome[stab_arr[1]]:
-                    #X error
-                    correction[q_i] = (correction[q_i] + 1) % 2
-                    corrected = True
-                elif updated_syndrome[stab_arr[2]] and updated_syndrome[stab_arr[3]]:
-                    #Y error
-                    correction[q_i] = (correction[q_i] + 1) % 2
-                    correction[q_i + self.code.n] = (correction[q_i + self.code.n] + 1) % 2
-                    corrected = True
-            #vertex qubit
-            elif updated_syndrome[stab_arr[0]] and updated_syndrome[stab_arr[1]]:
-                #X or Y error - random correction
-                coin = random.randint(0,1)
-                if coin:
-                    correction[q_i] = (correction[q_i] + 1) % 2
-                else:
-                    correction[q_i] = (correction[q_i] + 1) % 2
-                    correction[q_i + self.code.n] = (correction[q_i + self.code.n] + 1) % 2       
-                corrected = True
-            if corrected:
-                for stab in stab_arr:
-                    updated_syndrome[stab] = 0
-        #if syndrome still contains anything, decoding failed, return 
-        if any(updated_syndrome):
-            return bsparse.from_array([2])
-        return bsparse.from_array(correction)
\ No newline at end of file
+
+    def __init__(self, code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 seed: int = 0):
+        super().__init__(code, error_model, error_rate)
+
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+
+        # Adjacent stabilizers of every qubit, padded with the dummy index
+        # n_stabilizers for vertex qubits, which only touch two stabilizers.
+        # For face qubits, the first two detect X errors and the last two
+        # detect Y errors.
+        qsmap = cast(FermionSquare, code).qsmap
+        n_stabs = code.n_stabilizers
+        self._adjacent_stabs = np.full((code.n, 4), n_stabs, dtype=int)
+        for qubit, stabs in qsmap.items():
+            self._adjacent_stabs[qubit, :len(stabs)] = stabs
+        self._is_face = np.array([
+            len(qsmap[qubit]) == 4 for qubit in range(code.n)
+        ], dtype=np.bool_)
+
+    @property
+    def params(self) -> dict:
+        return {'seed': self.seed}
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections given measured syndrome.
+
+        Qubits whose adjacent stabilizers show an isolated single-qubit
+        signature are corrected greedily, face qubits before vertex qubits
+        and in a random order within each kind. Each round accepts every
+        candidate that has the highest priority among the candidates it
+        shares a stabilizer with, which gives the same result as visiting
+        the qubits one by one in priority order.
+        """
+        n = self.code.n
+        n_stabs = self.code.n_stabilizers
+        adjacent = self._adjacent_stabs
+        is_face = self._is_face
+        n_face = int(is_face.sum())
+
+        state = np.zeros(n_stabs + 1, dtype=bool)
+        state[:n_stabs] = np.asarray(syndrome)[:n_stabs] % 2 == 1
+        correction = np.zeros(2*n, dtype=np.uint)
+
+        priority = np.empty(n, dtype=int)
+        priority[is_face] = n - n_face + self._rng.permutation(n_face)
+        priority[~is_face] = self._rng.permutation(n - n_face)
+
+        n_rounds = 0
+        while True:
+            lit = state[adjacent]
+            all_lit = lit.all(axis=1)
+            x_lit = lit[:, 0] & lit[:, 1]
+            y_lit = lit[:, 2] & lit[:, 3]
+
+            z_face = is_face & all_lit
+            x_face = is_face & x_lit & ~all_lit
+            y_face = is_face & y_lit & ~all_lit & ~x_lit
+            vertex = ~is_face & x_lit
+
+            candidates = z_face | x_face | y_face | vertex
+            if not np.any(candidates):
+                break
+            n_rounds += 1
+
+            # Keep the candidates that beat all their conflicting neighbours.
+            best = np.full(n_stabs + 1, -1, dtype=int)
+            np.maximum.at(
+                best, adjacent[candidates].ravel(),
+                np.repeat(priority[candidates], 4)
+            )
+            best[n_stabs] = -1
+            accepted = candidates & (priority == best[adjacent].max(axis=1))
+
+            # X and Y errors on vertex qubits have the same signature.
+            vertex_ids = np.flatnonzero(accepted & vertex)
+            vertex_y = self._rng.integers(2, size=vertex_ids.size) == 1
+
+            correction[:n][accepted & (x_face | y_face | vertex)] ^= 1
+            correction[n:][accepted & (z_face | y_face)] ^= 1
+            correction[n + vertex_ids[vertex_y]] ^= 1
+
+            state[adjacent[accepted]] = False
+            state[n_stabs] = False
+
+        self._decode_stats = {'n_rounds': n_rounds}
+
+        return correction
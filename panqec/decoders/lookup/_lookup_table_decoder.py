@@ -0,0 +1,253 @@
+import os
+import json
+import hashlib
+from itertools import combinations, product
+from typing import Dict, Optional, Tuple
+import numpy as np
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.error_models import BaseErrorModel
+
+
+class LookupTableDecoder(BaseDecoder):
+    """Decoder that looks up the correction of each syndrome in a table
+    built from all the errors up to a given weight.
+
+    The table maps each syndrome to the error of lowest weight that
+    produces it, or to the most likely one under the error model if
+    `max_likelihood` is True.
+    Syndromes that are not in the table are decoded with the identity,
+    and are counted in `n_misses`.
+
+    It is only practical for small codes, since the number of errors
+    grows as the binomial coefficient of n and `max_weight`.
+    """
+
+    label = 'Lookup Table'
+    allowed_codes = None  # all codes allowed
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 max_weight: int = 2,
+                 max_likelihood: bool = False,
+                 cache_dir: Optional[str] = None):
+        """Constructor for the LookupTableDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder (for the likelihood of errors)
+        error_rate: float
+            Error rate used by the decoder (for the likelihood of errors)
+        max_weight: int, optional
+            Maximum weight of the errors in the table.
+        max_likelihood: bool, optional
+            If True, keep the most likely error of each syndrome instead of
+            the one with minimum weight.
+        cache_dir: str, optional
+            Directory where the table is saved after being built,
+            and loaded from if it already exists.
+            The table is not saved if None.
+        """
+        super().__init__(code, error_model, error_rate)
+
+        if max_weight < 0:
+            raise ValueError(
+                f"Argument 'max_weight' must be non-negative, not {max_weight}"
+            )
+
+        self.max_weight = max_weight
+        self.max_likelihood = max_likelihood
+        self.cache_dir = cache_dir
+
+        self.n_misses = 0
+
+        # Tables of each error rate, which are only different for
+        # maximum-likelihood tables.
+        self._tables: Dict[Optional[float], Tuple] = dict()
+        self.set_error_rate(error_rate)
+
+    @property
+    def params(self) -> dict:
+        return {
+            'max_weight': self.max_weight,
+            'max_likelihood': self.max_likelihood,
+            'cache_dir': self.cache_dir
+        }
+
+    def set_error_rate(self, error_rate: float):
+        """Switch to the table of another error rate, which is only
+        rebuilt for maximum-likelihood tables."""
+        super().set_error_rate(error_rate)
+
+        key = error_rate if self.max_likelihood else None
+        if key not in self._tables:
+            self._tables[key] = self._load_table()
+        self._table, self._qubits, self._paulis = self._tables[key]
+
+    def _load_table(self) -> Tuple[Dict[bytes, int], np.ndarray, np.ndarray]:
+        """Read the table from the cache directory, or build it."""
+        path = self.get_table_path()
+        if path is not None and os.path.exists(path):
+            data = np.load(path)
+            syndromes = data['syndromes']
+            qubits = data['qubits']
+            paulis = data['paulis']
+        else:
+            syndromes, qubits, paulis = self.build_table()
+            if path is not None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                np.savez_compressed(
+                    path, syndromes=syndromes, qubits=qubits, paulis=paulis
+                )
+
+        table = {
+            syndrome.tobytes(): i for i, syndrome in enumerate(syndromes)
+        }
+
+        return table, qubits, paulis
+
+    def get_table_path(self) -> Optional[str]:
+        """Path of the table in the cache directory, which depends on the
+        code, the maximum weight and, for maximum-likelihood tables, on
+        the error model and error rate."""
+        if self.cache_dir is None:
+            return None
+
+        key: dict = {
+            'code': {'name': self.code.id, 'parameters': self.code.params},
+            'max_weight': self.max_weight,
+            'max_likelihood': self.max_likelihood,
+        }
+        if self.max_likelihood:
+            key['error_model'] = {
+                'name': self.error_model.id,
+                'parameters': self.error_model.params
+            }
+            key['error_rate'] = self.error_rate
+
+        digest = hashlib.sha1(
+            json.dumps(key, sort_keys=True).encode()
+        ).hexdigest()
+
+        return os.path.join(
+            self.cache_dir, f'lookup_{self.code.id}_{digest[:16]}.npz'
+        )
+
+    def build_table(self):
+        """Enumerate all errors up to `max_weight` by increasing weight.
+
+        Returns
+        -------
+        syndromes : np.ndarray
+            Packed syndromes of the table, of shape (n_entries, n_bytes).
+        qubits : np.ndarray
+            Qubits in the support of the error of each syndrome, of shape
+            (n_entries, max_weight), padded with -1.
+        paulis : np.ndarray
+            Pauli (1 for X, 2 for Y, 3 for Z) of the error of each
+            syndrome on each qubit of `qubits`, padded with 0.
+        """
+        n = self.code.n
+        H = self.code.stabilizer_matrix.toarray().astype(bool)
+
+        # Packed syndromes of single-qubit X, Y and Z errors.
+        syndrome_x = H[:, n:].T
+        syndrome_z = H[:, :n].T
+        single_syndromes = np.packbits(
+            np.stack([syndrome_x, syndrome_x ^ syndrome_z, syndrome_z]),
+            axis=-1
+        )
+        n_bytes = single_syndromes.shape[-1]
+
+        # Log-likelihood of each single-qubit Pauli relative to identity.
+        pi, px, py, pz = self.error_model.probability_distribution(
+            self.code, self.error_rate
+        )
+        with np.errstate(divide='ignore'):
+            log_ratio = np.log(np.stack([px, py, pz])) - np.log(pi)
+
+        all_syndromes = []
+        all_qubits = []
+        all_paulis = []
+        all_scores = []
+        for weight in range(self.max_weight + 1):
+            supports = list(combinations(range(n), weight))
+            supports = np.array(supports, dtype=int).reshape(
+                len(supports), weight
+            )
+            paulis = np.array(
+                list(product(range(3), repeat=weight)), dtype=int
+            ).reshape(3**weight, weight)
+
+            qubits = np.repeat(supports, len(paulis), axis=0)
+            paulis = np.tile(paulis, (len(supports), 1))
+
+            syndromes = np.zeros((len(qubits), n_bytes), dtype=np.uint8)
+            scores = np.zeros(len(qubits))
+            for i in range(weight):
+                syndromes ^= single_syndromes[paulis[:, i], qubits[:, i]]
+                scores += log_ratio[paulis[:, i], qubits[:, i]]
+
+            padding = self.max_weight - weight
+            all_syndromes.append(syndromes)
+            all_qubits.append(np.pad(
+                qubits, ((0, 0), (0, padding)), constant_values=-1
+            ))
+            all_paulis.append(np.pad(paulis + 1, ((0, 0), (0, padding))))
+            all_scores.append(scores if self.max_likelihood else -weight)
+
+        syndromes = np.concatenate(all_syndromes)
+        qubits = np.concatenate(all_qubits)
+        paulis = np.concatenate(all_paulis)
+        scores = np.concatenate([
+            np.broadcast_to(s, len(q)) for s, q in zip(all_scores, all_qubits)
+        ])
+
+        # Keep the best error of each syndrome, or the first one enumerated
+        # if there are several.
+        order = np.argsort(-scores, kind='stable')
+        keys = np.ascontiguousarray(syndromes[order]).view(
+            np.dtype((np.void, n_bytes))
+        ).ravel()
+        _, first = np.unique(keys, return_index=True)
+        best = order[np.sort(first)]
+
+        return syndromes[best], qubits[best], paulis[best].astype(np.uint8)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def lookup(self, syndrome: np.ndarray) -> Optional[np.ndarray]:
+        """Correction of a syndrome, or None if it is not in the table."""
+        key = np.packbits(np.asarray(syndrome, dtype=np.uint8)).tobytes()
+        index = self._table.get(key)
+        if index is None:
+            return None
+
+        n = self.code.n
+        correction = np.zeros(2*n, dtype=np.uint)
+        for qubit, pauli in zip(self._qubits[index], self._paulis[index]):
+            if qubit < 0:
+                break
+            if pauli in (1, 2):
+                correction[qubit] = 1
+            if pauli in (2, 3):
+                correction[n + qubit] = 1
+
+        return correction
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get the correction of the syndrome from the table."""
+
+        correction = self.lookup(syndrome)
+        self._decode_stats = {'table_miss': int(correction is None)}
+        if correction is None:
+            self.n_misses += 1
+            correction = np.zeros(2*self.code.n, dtype=np.uint)
+
+        return correction
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 from pymatching import Matching
 from panqec.decoders import BaseDecoder
 from panqec.codes import StabilizerCode
@@ -44,15 +44,10 @@ class MatchingDecoder(BaseDecoder):
         self.error_type = error_type
         self.weights = weights
 
-        if weights is not None:
-            wx, wz = weights
-        else:
-            wx, wz = error_model.get_weights(code, error_rate)
-
-        if error_type is None or error_type == "X":
-            self.matcher_x = Matching(self.code.Hz, spacelike_weights=wx)
-        if error_type is None or error_type == "Z":
-            self.matcher_z = Matching(self.code.Hx, spacelike_weights=wz)
+        # Matching graphs of each error rate (or the single graph of the
+        # given weights), so that switching between error rates is cheap.
+        self._matchers: Dict[Optional[float], Tuple] = dict()
+        self.set_error_rate(error_rate)
 
     @property
     def params(self) -> dict:
@@ -61,22 +56,109 @@ class MatchingDecoder(BaseDecoder):
             'weights': self.weights
         }
 
+    def set_error_rate(self, error_rate: float):
+        """Reweight the matching graphs for another error rate."""
+        super().set_error_rate(error_rate)
+
+        key = None if self.weights is not None else error_rate
+        if key not in self._matchers:
+            if self.weights is not None:
+                wx, wz = self.weights
+            else:
+                wx, wz = self.error_model.get_weights(self.code, error_rate)
+
+            matcher_x = matcher_z = None
+            if self.error_type is None or self.error_type == "X":
+                matcher_x = Matching(self.code.Hz, spacelike_weights=wx)
+            if self.error_type is None or self.error_type == "Z":
+                matcher_z = Matching(self.code.Hx, spacelike_weights=wz)
+            self._matchers[key] = (matcher_x, matcher_z)
+
+        self.matcher_x, self.matcher_z = self._matchers[key]
+
     def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
         """Get X corrections given code and measured syndrome."""
 
         # Initialize correction as full bsf.
         correction = np.zeros(2*self.code.n, dtype=np.uint)
 
+        n_defects = 0
+
         # Keep only the vertex Z measurement syndrome, discard the rest.
         if self.error_type is None or self.error_type == "X":
             syndromes_z = self.code.extract_z_syndrome(syndrome)
+            n_defects += int(np.count_nonzero(syndromes_z))
             correction_x = self.matcher_x.decode(syndromes_z,
                                                  num_neighbours=None)
             correction[:self.code.n] = correction_x
         if self.error_type is None or self.error_type == "Z":
             syndromes_x = self.code.extract_x_syndrome(syndrome)
+            n_defects += int(np.count_nonzero(syndromes_x))
             correction_z = self.matcher_z.decode(syndromes_x,
                                                  num_neighbours=None)
             correction[self.code.n:] = correction_z
 
+        self._decode_stats = {'n_defects': n_defects}
+
         return correction
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections of many shots at once.
+
+        Only the distinct non-trivial syndromes of each type are sent to
+        PyMatching, and their corrections are broadcast back to all the
+        shots that share them.
+
+        Parameters
+        ----------
+        syndromes: np.ndarray
+            Syndromes as an array of size (n_shots, m), where m is the number
+            of stabilizers.
+
+        Returns
+        -------
+        corrections : np.ndarray
+            Corrections as an array of size (n_shots, 2n) in the binary
+            symplectic format.
+        """
+        syndromes = np.asarray(syndromes)
+        n = self.code.n
+
+        corrections = np.zeros((len(syndromes), 2*n), dtype=np.uint)
+        n_defects = np.zeros(len(syndromes), dtype=int)
+
+        if self.error_type is None or self.error_type == "X":
+            syndromes_z = syndromes[:, self.code.z_indices]
+            n_defects += np.count_nonzero(syndromes_z, axis=1)
+            corrections[:, :n] = _match_batch(self.matcher_x, syndromes_z, n)
+        if self.error_type is None or self.error_type == "Z":
+            syndromes_x = syndromes[:, self.code.x_indices]
+            n_defects += np.count_nonzero(syndromes_x, axis=1)
+            corrections[:, n:] = _match_batch(self.matcher_z, syndromes_x, n)
+
+        self._batch_stats = [
+            {'n_defects': int(count)} for count in n_defects
+        ]
+
+        return corrections
+
+
+def _match_batch(matcher: Matching, syndromes: np.ndarray,
+                 n: int) -> np.ndarray:
+    """Decode each distinct non-trivial row of `syndromes` once."""
+    corrections = np.zeros((len(syndromes), n), dtype=np.uint)
+
+    nontrivial = np.flatnonzero(np.any(syndromes, axis=1))
+    if len(nontrivial) == 0:
+        return corrections
+
+    unique_syndromes, inverse = np.unique(
+        syndromes[nontrivial], axis=0, return_inverse=True
+    )
+    unique_corrections = np.array([
+        matcher.decode(syndrome, num_neighbours=None)
+        for syndrome in unique_syndromes
+    ], dtype=np.uint)
+    corrections[nontrivial] = unique_corrections[inverse.ravel()]
+
+    return corrections
@@ -0,0 +1,242 @@
+from typing import Dict, Tuple, Union
+import numpy as np
+from scipy.sparse import csr_matrix, hstack, vstack
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.error_models import BaseErrorModel
+
+
+class GreedyPreDecoder(BaseDecoder):
+    """Wrapper that corrects isolated single-qubit errors before calling
+    any other decoder on the rest of the syndrome.
+
+    A single-qubit Pauli error is applied by the pre-decoder when all the
+    stabilizers it anticommutes with (its signature) are activated, and no
+    other activated stabilizer shares a qubit with them.
+    When several single-qubit Paulis have the same signature, the most
+    likely one under the error model is chosen.
+    All the isolated signatures are resolved at once with sparse
+    matrix products, and only the residual syndrome is passed to the
+    wrapped decoder, whose correction is merged with that of the
+    pre-decoder.
+
+    On large codes at low error rates, most activated stabilizers come in
+    isolated signatures of single-qubit errors, so the wrapped decoder
+    gets a much smaller (often trivial) syndrome.
+    """
+
+    allowed_codes = None  # all codes allowed
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 decoder: Union[BaseDecoder, Dict]):
+        """Constructor for the GreedyPreDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder (to choose between single-qubit
+            errors with the same signature)
+        error_rate: float
+            Error rate used by the decoder
+        decoder: Union[BaseDecoder, Dict]
+            Decoder of the residual syndrome, either as an instance or as
+            a dictionary `{'name': ..., 'parameters': ...}` of a registered
+            decoder, in the same format as in input files
+        """
+        super().__init__(code, error_model, error_rate)
+
+        if isinstance(decoder, dict):
+            from panqec.simulation._batch_simulation import (
+                _parse_decoder_dict
+            )
+            decoder = _parse_decoder_dict(
+                decoder, code, error_model, error_rate
+            )
+
+        self.decoder = decoder
+
+        self._get_signatures()
+        self.set_error_rate(error_rate)
+
+    @property
+    def label(self) -> str:
+        return f'Pre-decoded {self.decoder.label}'
+
+    @property
+    def params(self) -> dict:
+        return {
+            'decoder': {
+                'name': self.decoder.id,
+                'parameters': self.decoder.params
+            }
+        }
+
+    def _get_signatures(self):
+        """Find the distinct signatures of single-qubit errors, and the
+        stabilizers sharing a qubit with each of them."""
+        n = self.code.n
+        H = csr_matrix(self.code.stabilizer_matrix, dtype=np.uint8)
+
+        # Signatures of X, Y and Z errors on each qubit, in this order.
+        Hx_part, Hz_part = H[:, :n], H[:, n:]
+        Hy_part = Hz_part + Hx_part - 2*Hz_part.multiply(Hx_part)
+        candidates = hstack([Hz_part, Hy_part, Hx_part]).tocsc()
+        candidates.eliminate_zeros()
+
+        # Group the single-qubit errors with the same signature.
+        groups: Dict[bytes, int] = dict()
+        candidate_groups = np.zeros(3*n, dtype=int)
+        first_candidates = []
+        for i in range(3*n):
+            support = candidates.indices[
+                candidates.indptr[i]:candidates.indptr[i + 1]
+            ]
+            key = np.sort(support).tobytes()
+            if len(support) == 0:
+                candidate_groups[i] = -1
+            elif key in groups:
+                candidate_groups[i] = groups[key]
+            else:
+                candidate_groups[i] = groups[key] = len(first_candidates)
+                first_candidates.append(i)
+
+        self._candidate_groups = candidate_groups
+        signatures = candidates[:, first_candidates].tocsc()
+        self._signatures = signatures.tocsr()
+        self._signature_sizes = np.asarray(signatures.sum(axis=0)).ravel()
+
+        # Stabilizers sharing a qubit with a signature (including it).
+        support = ((Hx_part + Hz_part) > 0).astype(int)
+        adjacency = ((support @ support.T) > 0).astype(int)
+        neighbourhoods = ((adjacency @ signatures) > 0).astype(np.uint8)
+
+        # Number of activated stabilizers in each signature and in its
+        # neighbourhood are both found with a single product.
+        self._counts = vstack([signatures.T, neighbourhoods.T]).tocsr()
+
+    def set_error_rate(self, error_rate: float):
+        """Move the wrapped decoder to another error rate, and choose the
+        most likely single-qubit error of each signature."""
+        super().set_error_rate(error_rate)
+        self.decoder.set_error_rate(error_rate)
+
+        n = self.code.n
+        pi, px, py, pz = self.error_model.probability_distribution(
+            self.code, error_rate
+        )
+        probabilities = np.concatenate([px, py, pz])
+
+        # Most likely candidate of each group (the first one in case of a
+        # tie), after sorting by group and decreasing probability.
+        valid = np.flatnonzero(self._candidate_groups >= 0)
+        order = valid[np.lexsort((
+            -probabilities[valid], self._candidate_groups[valid]
+        ))]
+        _, first = np.unique(self._candidate_groups[order], return_index=True)
+        best = order[first]
+
+        # Corrections of the groups, in the binary symplectic format.
+        qubits = best % n
+        paulis = best // n
+        rows = np.concatenate([
+            qubits[paulis <= 1], n + qubits[paulis >= 1]
+        ])
+        cols = np.concatenate([
+            np.flatnonzero(paulis <= 1), np.flatnonzero(paulis >= 1)
+        ])
+        self._corrections = csr_matrix(
+            (np.ones(len(rows), dtype=np.uint8), (rows, cols)),
+            shape=(2*n, len(best))
+        )
+
+    def predecode(
+        self, syndromes: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Correct the isolated single-qubit errors of many syndromes.
+
+        Parameters
+        ----------
+        syndromes: np.ndarray
+            Syndromes as an array of size (n_shots, m).
+
+        Returns
+        -------
+        corrections : np.ndarray
+            Corrections of the pre-decoder, as an array of size
+            (n_shots, 2n) in the binary symplectic format.
+        residuals : np.ndarray
+            Syndromes left to decode, as an array of size (n_shots, m).
+        """
+        syndromes = np.asarray(syndromes, dtype=np.uint8)
+        defects = syndromes.T.astype(int)
+
+        n_groups = len(self._signature_sizes)
+        counts = self._counts @ defects
+        resolved = (
+            (counts[:n_groups] == self._signature_sizes[:, None])
+            & (counts[n_groups:] == self._signature_sizes[:, None])
+        ).astype(int)
+
+        corrections = (self._corrections @ resolved).T % 2
+        residuals = (defects + self._signatures @ resolved).T % 2
+
+        return corrections.astype(np.uint), residuals.astype(np.uint)
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Correct the isolated single-qubit errors, and decode the rest
+        of the syndrome with the wrapped decoder."""
+
+        corrections, residuals = self.predecode(
+            np.asarray(syndrome).reshape(1, -1)
+        )
+        correction, residual = corrections[0], residuals[0]
+
+        self._decode_stats = {
+            'predecoded_qubits': int(np.sum(
+                correction[:self.code.n] | correction[self.code.n:]
+            )),
+            'residual_defects': int(np.sum(residual)),
+        }
+        if np.any(residual):
+            correction = (
+                correction + self.decoder.decode(residual, **kwargs)
+            ) % 2
+            self._decode_stats.update(self.decoder.last_decode_stats())
+
+        return correction
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Correct the isolated single-qubit errors of many shots at once,
+        and decode the shots with a residual syndrome with the wrapped
+        decoder."""
+
+        corrections, residuals = self.predecode(syndromes)
+        n = self.code.n
+
+        self._batch_stats = [
+            {
+                'predecoded_qubits': int(np.sum(
+                    correction[:n] | correction[n:]
+                )),
+                'residual_defects': int(np.sum(residual)),
+            }
+            for correction, residual in zip(corrections, residuals)
+        ]
+
+        remaining = np.flatnonzero(np.any(residuals, axis=1))
+        if len(remaining) > 0:
+            corrections[remaining] = (
+                corrections[remaining]
+                + self.decoder.decode_batch(residuals[remaining], **kwargs)
+            ) % 2
+            for shot, stats in zip(
+                remaining, self.decoder.last_batch_stats()
+            ):
+                self._batch_stats[shot].update(stats)
+
+        return corrections
@@ -0,0 +1,533 @@
+import itertools
+from typing import Any, Dict, List, Set, Tuple, cast
+import numpy as np
+from ldpc import bposd_decoder
+from panqec.decoders import BaseDecoder
+from panqec.codes import StabilizerCode
+from panqec.error_models import BaseErrorModel
+from ._sweep_decoder_3d import _is_new_state
+
+
+class GeneralizedSweepDecoder(BaseDecoder):
+    """Sweep decoder for 3D codes with qubits on the edges of a cubic
+    lattice, whose sweep rule is derived from the stabilizers of the code.
+
+    The sweep rule is applied to the stabilizers whose syndromes form
+    loops (those with more than two stabilizers per qubit), such as the
+    faces of `HollowPlanar3DCode` or the triangles of `RhombicToricCode`.
+    For a sweep direction, the causal neighbourhood of each vertex is
+    made of its edges going in that direction, and of the stabilizers
+    containing one of them that lie within the unit cube spanned by the
+    direction. Around each vertex, the sweep rule flips the subset of the
+    edges whose syndrome in the neighbourhood is closest to the current
+    one (picking the smallest subset, and breaking remaining ties at
+    random), which reduces to the usual rule on the cubic lattice.
+
+    The neighbourhoods are looked up from tables precomputed from the
+    coordinates of the qubits and the stabilizer matrix, and the rule is
+    applied to all the vertices at the same time. As in
+    `RotatedSweepDecoder3D`, the eight sweep directions are used in turn
+    in each round.
+
+    The sweep rule does not always clear the syndrome, e.g. at the
+    boundaries of planar codes, so any syndrome it leaves is decoded with
+    BP-OSD on the whole lattice (reported as `fallback_decodes`).
+    Only the errors of type `error_type` are corrected, and
+    `GeneralizedSweepMatchDecoder` corrects the other type with matching.
+
+    See Kubica and Preskill, Cellular-automaton decoders with provable
+    thresholds for topological codes, arXiv:1809.10145.
+    """
+
+    label = 'Generalized 3D Sweep Decoder'
+    allowed_codes = [
+        "RhombicToricCode", "RhombicPlanarCode",
+        "HollowPlanar3DCode", "HollowRhombicCode"
+    ]
+
+    # Sweep directions to take
+    sweep_directions: List[Tuple[int, int, int]] = [
+        (x, y, z) for x, y, z in itertools.product([1, -1], repeat=3)
+    ]
+
+    _rng: np.random.Generator
+    max_rounds: int
+    last_n_sweeps: np.ndarray
+    last_fallbacks: np.ndarray
+
+    def __init__(self, code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 seed: int = 0,
+                 max_rounds: int = 32,
+                 osd_order: int = 0):
+        super().__init__(code, error_model, error_rate)
+        self._rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.max_rounds = max_rounds
+        self.osd_order = osd_order
+        self.last_n_sweeps = np.zeros(0, dtype=int)
+        self.last_fallbacks = np.zeros(0, dtype=bool)
+
+        self._build_tables()
+
+        # BP-OSD decoders of the leftover syndromes of each error rate,
+        # built only when needed.
+        self._fallbacks: Dict[float, Any] = dict()
+
+    @property
+    def params(self) -> dict:
+        return {
+            'seed': self.seed,
+            'max_rounds': self.max_rounds,
+            'osd_order': self.osd_order
+        }
+
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Copy of the decoder sharing the sweep tables, with its own
+        BP-OSD decoders of the leftover syndromes."""
+        replica = cast(GeneralizedSweepDecoder, super().replicate(seed))
+        replica._fallbacks = dict()
+        return replica
+
+    def _get_fallback(self):
+        """BP-OSD decoder of the syndromes left by the sweep rule."""
+        if self.error_rate not in self._fallbacks:
+            pi, px, py, pz = self.error_model.probability_distribution(
+                self.code, self.error_rate
+            )
+            probs = px + py if self._error_type == 'X' else pz + py
+            self._fallbacks[self.error_rate] = bposd_decoder(
+                self._H,
+                channel_probs=probs,
+                max_iter=100,
+                bp_method='msl',
+                ms_scaling_factor=0,
+                osd_method='osd_cs',
+                osd_order=min(self.osd_order, self._H.shape[1])
+            )
+        return self._fallbacks[self.error_rate]
+
+    @property
+    def error_type(self) -> str:
+        """Type of errors ('X' or 'Z') corrected by the sweep rule."""
+        return self._error_type
+
+    def _build_tables(self):
+        """Precompute the causal neighbourhood of each vertex in every sweep
+        direction, with the sweep rule of each kind of neighbourhood.
+
+        For each sweep direction, `_sweep_stabilizers[direction]` and
+        `_sweep_edges[direction]` are arrays of shape (n_vertices, k) and
+        (n_vertices, 3) with the indices of the stabilizers and edges in
+        the neighbourhood of each vertex, padded with the index of a dummy
+        stabilizer (or qubit) that is always ignored.
+        `_sweep_rules[direction]` is an array of shape (2, n_vertices) with
+        the index in `_rules` of the strict and relaxed sweep rules of each
+        vertex (see `decode_batch`), where `_rules` is an array of shape
+        (n_rules, 2**k, 8) of the subsets of edges to flip (as binary
+        numbers) for each pattern of syndromes, in order of preference,
+        and `_rule_counts` is the number of equally good subsets.
+        """
+        code = self.code
+        n = code.n
+
+        # The stabilizers with loop-like syndromes are swept.
+        x_rows = np.flatnonzero(code.x_indices)
+        z_rows = np.flatnonzero(code.z_indices)
+        H_x = (code.Hx != 0).tocsr()
+        H_z = (code.Hz != 0).tocsr()
+        if np.diff(H_x.tocsc().indptr).max(initial=0) > 2:
+            self._error_type = 'Z'
+            self._rows, H = x_rows, H_x
+        elif np.diff(H_z.tocsc().indptr).max(initial=0) > 2:
+            self._error_type = 'X'
+            self._rows, H = z_rows, H_z
+        else:
+            raise ValueError(
+                "The generalized sweep decoder needs stabilizers with more "
+                "than two stabilizers per qubit"
+            )
+        self._H = H.astype(np.uint8)
+        n_stabilizers = H.shape[0]
+        H_csc = H.tocsc()
+
+        qubits = np.array(code.qubit_coordinates)
+        if qubits.shape[1] != 3 or np.any(np.sum(qubits % 2, axis=1) != 1):
+            raise ValueError(
+                "The generalized sweep decoder needs qubits on the edges "
+                "of a cubic lattice"
+            )
+
+        # An axis is periodic if a stabilizer wraps around it.
+        periods = np.zeros(3, dtype=int)
+        for i_row in range(n_stabilizers):
+            support = qubits[H.indices[H.indptr[i_row]:H.indptr[i_row + 1]]]
+            wraps = np.ptp(support, axis=0) > 2
+            periods[wraps] = 2*np.array(code.size)[wraps]
+
+        def wrap(coordinates):
+            return np.where(
+                periods > 0, coordinates % np.maximum(periods, 1), coordinates
+            )
+
+        def offset(coordinates, origin):
+            """Shortest displacement from origin to coordinates."""
+            delta = coordinates - origin
+            return np.where(
+                periods > 0,
+                (delta + periods // 2) % np.maximum(periods, 1)
+                - periods // 2,
+                delta
+            )
+
+        qubit_index = {tuple(wrap(q)): i for i, q in enumerate(qubits)}
+        axes = np.argmax(qubits % 2, axis=1)
+        steps = np.eye(3, dtype=int)[axes]
+        vertices = np.unique(
+            np.concatenate([wrap(qubits - steps), wrap(qubits + steps)]),
+            axis=0
+        )
+
+        # Stabilizers within the unit cube of each direction containing
+        # each edge of each vertex in that direction.
+        neighbourhoods: Dict[Tuple, List] = dict()
+        for direction in self.sweep_directions:
+            neighbourhoods[direction] = []
+            for vertex in vertices:
+                edges = [
+                    qubit_index.get(tuple(wrap(vertex + sign*step)), n)
+                    for sign, step in zip(direction, np.eye(3, dtype=int))
+                ]
+                present = [edge for edge in edges if edge < n]
+                candidates = np.unique(H_csc[:, present].indices)
+                neighbourhood = [
+                    row for row in candidates
+                    if np.all(np.isin(
+                        direction*offset(
+                            qubits[H.indices[H.indptr[row]:H.indptr[row + 1]]],
+                            vertex
+                        ),
+                        [0, 1, 2]
+                    ))
+                ]
+                local = np.zeros((len(neighbourhood), 3), dtype=np.uint8)
+                for i_edge, edge in enumerate(edges):
+                    if edge < n:
+                        local[:, i_edge] = H[neighbourhood, edge].toarray()[
+                            :, 0
+                        ]
+                neighbourhoods[direction].append((edges, neighbourhood, local))
+
+        # Number of stabilizers containing each edge in the bulk, for each
+        # class of vertices (given by their coordinates modulo 4).
+        classes = [tuple(vertex % 4) for vertex in vertices]
+        bulk_counts: Dict[Tuple, np.ndarray] = dict()
+        for direction, found in neighbourhoods.items():
+            for vertex_class, (_, _, local) in zip(classes, found):
+                key = (direction, vertex_class)
+                bulk_counts[key] = np.maximum(
+                    bulk_counts.get(key, np.zeros(3, dtype=int)),
+                    local.sum(axis=0, dtype=int)
+                )
+
+        rule_index: Dict[bytes, int] = dict()
+        rules: List[Tuple[np.ndarray, np.ndarray]] = []
+        tables: Dict[Tuple, Tuple[List, List, List]] = dict()
+        for direction, found in neighbourhoods.items():
+            tables[direction] = ([], [], [])
+            for vertex_class, (edges, neighbourhood, local) in zip(
+                classes, found
+            ):
+                if len(neighbourhood) == 0:
+                    continue
+
+                # Stabilizers missing at a boundary are kept in the strict
+                # rule, but never excited, so that it does not fire with
+                # fewer excited stabilizers than in the bulk. The relaxed
+                # rule ignores them, so that syndromes can leave through
+                # the boundaries where stabilizers end.
+                missing = bulk_counts[direction, vertex_class] - local.sum(
+                    axis=0, dtype=int
+                )
+                strict = np.vstack([local] + [
+                    np.eye(3, dtype=np.uint8)[[i_edge]*missing[i_edge]]
+                    for i_edge in range(3)
+                ])
+
+                vertex_rules = []
+                for rule_matrix in [strict, local]:
+                    key = rule_matrix.tobytes() + bytes([len(rule_matrix)])
+                    if key not in rule_index:
+                        rule_index[key] = len(rules)
+                        rules.append(_sweep_rule(rule_matrix))
+                    vertex_rules.append(rule_index[key])
+
+                stabilizers, edge_table, rule_table = tables[direction]
+                stabilizers.append(
+                    neighbourhood
+                    + [n_stabilizers]*(len(strict) - len(neighbourhood))
+                )
+                edge_table.append(edges)
+                rule_table.append(vertex_rules)
+
+        max_stabilizers = max(
+            len(neighbourhood)
+            for stabilizers, _, _ in tables.values()
+            for neighbourhood in stabilizers
+        )
+        self._rules = np.zeros((len(rules), 2**max_stabilizers, 8), dtype=int)
+        self._rule_counts = np.zeros(
+            (len(rules), 2**max_stabilizers), dtype=int
+        )
+        for i_rule, (subsets, counts) in enumerate(rules):
+            self._rules[i_rule, :len(subsets)] = subsets
+            self._rule_counts[i_rule, :len(counts)] = counts
+
+        self._sweep_stabilizers: Dict[Tuple, np.ndarray] = dict()
+        self._sweep_edges: Dict[Tuple, np.ndarray] = dict()
+        self._sweep_rules: Dict[Tuple, np.ndarray] = dict()
+        for direction, (stabilizers, edges, rule_table) in tables.items():
+            padded = np.full(
+                (len(stabilizers), max_stabilizers), n_stabilizers, dtype=int
+            )
+            for i_vertex, neighbourhood in enumerate(stabilizers):
+                padded[i_vertex, :len(neighbourhood)] = neighbourhood
+            self._sweep_stabilizers[direction] = padded
+            self._sweep_edges[direction] = np.array(
+                edges, dtype=int
+            ).reshape(-1, 3)
+            self._sweep_rules[direction] = np.array(
+                rule_table, dtype=int
+            ).reshape(-1, 2).T
+
+    def _sweep_state(
+        self, state: np.ndarray, sweep_direction: Tuple[int, int, int],
+        strict: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Apply the sweep rule once along a direction on all vertices at
+        the same time.
+
+        Parameters
+        ----------
+        state : np.ndarray
+            Boolean array of signs of shape (n_states, n_stabilizers + 1),
+            where the last entry is the dummy stabilizer, always kept at 0.
+        sweep_direction : Tuple[int, int, int]
+            Direction of the sweep.
+        strict : bool
+            Whether to use the strict or the relaxed rules at boundaries.
+
+        Returns
+        -------
+        new_state : np.ndarray
+            Signs after the sweep move.
+        flips : np.ndarray
+            Boolean array of shape (n_states, n) of the edges flipped.
+        ties : np.ndarray
+            Whether each state had a tie broken at random.
+        """
+        n = self.code.n
+        stabilizer_table = self._sweep_stabilizers[sweep_direction]
+        edge_table = self._sweep_edges[sweep_direction]
+        rule_table = self._sweep_rules[sweep_direction][0 if strict else 1]
+
+        # Pattern of signs in the neighbourhood of each vertex.
+        signs = state[:, stabilizer_table]
+        patterns = signs @ (1 << np.arange(signs.shape[-1]))
+
+        # Pick one of the equally good moves at random.
+        counts = self._rule_counts[rule_table, patterns]
+        choices = np.zeros(patterns.shape, dtype=int)
+        tied = counts > 1
+        choices[tied] = self._rng.integers(counts[tied])
+        moves = self._rules[rule_table, patterns, choices]
+
+        # Scatter the flips to the edges, then to their stabilizers.
+        shot, vertex, axis = np.nonzero(
+            (moves[..., None] >> np.arange(3)) & 1
+        )
+        flips = np.bincount(
+            shot*(n + 1) + edge_table[vertex, axis],
+            minlength=len(state)*(n + 1)
+        ).reshape(len(state), n + 1)[:, :n] % 2 == 1
+
+        new_state = state.copy()
+        new_state[:, :-1] ^= (self._H @ flips.T.astype(np.uint8)).T % 2 == 1
+
+        return new_state, flips, tied.any(axis=1)
+
+    def decode(
+        self, syndrome: np.ndarray, **kwargs
+    ) -> np.ndarray:
+        """Get corrections given measured syndrome."""
+        correction = self.decode_batch(np.asarray(syndrome)[np.newaxis])[0]
+        self._decode_stats = {
+            'n_sweeps': int(self.last_n_sweeps[0]),
+            'fallback_decodes': int(self.last_fallbacks[0])
+        }
+        return correction
+
+    def _sweep_rounds(
+        self, states: np.ndarray, flipped: np.ndarray, active: np.ndarray,
+        strict: bool
+    ):
+        """Sweep the active shots in all directions in turn until there are
+        no syndromes, or until the state at the end of a round repeats
+        itself, updating `states` and `flipped` in place."""
+        n_shots = len(states)
+
+        # Maximum number of times to apply sweep rule before giving up round.
+        largest_size = 2*int(max(self.code.size)) + 2
+        max_sweeps = 4*largest_size
+
+        # States visited by each shot at the end of each round since its
+        # last random tie-breaking.
+        seen_rounds: List[Set[bytes]] = [set() for _ in range(n_shots)]
+        _is_new_state(
+            states[active], active, seen_rounds,
+            np.zeros(len(active), dtype=bool)
+        )
+
+        i_round = 0
+        while len(active) > 0 and i_round < self.max_rounds:
+            tied = np.zeros(n_shots, dtype=bool)
+            for sweep_direction in self.sweep_directions:
+
+                # States visited in this direction by each shot.
+                seen: List[Set[bytes]] = [set() for _ in range(n_shots)]
+                _is_new_state(
+                    states[active], active, seen,
+                    np.zeros(len(active), dtype=bool)
+                )
+
+                # Keep sweeping until there are no syndromes,
+                # or until the state repeats itself.
+                i_sweep = 0
+                sweeping = active
+                while len(sweeping) > 0 and i_sweep < max_sweeps:
+                    states[sweeping], flips, ties = self._sweep_state(
+                        states[sweeping], sweep_direction, strict
+                    )
+                    tied[sweeping] |= ties
+                    flipped[sweeping] ^= flips
+                    self.last_n_sweeps[sweeping] += 1
+                    sweeping = sweeping[
+                        _is_new_state(states[sweeping], sweeping, seen, ties)
+                    ]
+                    i_sweep += 1
+
+                active = active[states[active].any(axis=1)]
+
+            active = active[
+                _is_new_state(
+                    states[active], active, seen_rounds, tied[active]
+                )
+            ]
+            i_round += 1
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Get corrections of many shots at once.
+
+        The cellular automata of all the shots are swept in lockstep, as in
+        `RotatedSweepDecoder3D.decode_batch`, first with the strict rules at
+        the boundaries, then with the relaxed rules for the shots that got
+        stuck with the strict rules.
+        The syndromes left after that are decoded with BP-OSD.
+        The number of sweeps used by each shot is stored in
+        `last_n_sweeps`, and whether it needed BP-OSD in `last_fallbacks`.
+
+        Parameters
+        ----------
+        syndromes: np.ndarray
+            Syndromes as an array of size (n_shots, m), where m is the number
+            of stabilizers.
+
+        Returns
+        -------
+        corrections : np.ndarray
+            Corrections as an array of size (n_shots, 2n) in the binary
+            symplectic format.
+        """
+        syndromes = np.asarray(syndromes)
+        n_shots = syndromes.shape[0]
+        n_stabilizers = len(self._rows)
+
+        # The signs of the swept stabilizers, with an extra dummy at the end.
+        states = np.zeros((n_shots, n_stabilizers + 1), dtype=bool)
+        states[:, :-1] = syndromes[:, self._rows]
+
+        # Keep track of the parity of flips on each edge.
+        flipped = np.zeros((n_shots, self.code.n), dtype=bool)
+
+        # Shots that still have syndromes.
+        active = np.flatnonzero(states.any(axis=1))
+
+        # Number of sweeps applied to each shot.
+        self.last_n_sweeps = np.zeros(n_shots, dtype=int)
+
+        for strict in [True, False]:
+            self._sweep_rounds(states, flipped, active, strict)
+            active = np.flatnonzero(states.any(axis=1))
+
+        # Decode the leftover syndromes on the whole lattice.
+        self.last_fallbacks = np.zeros(n_shots, dtype=bool)
+        self.last_fallbacks[active] = True
+        for shot in active:
+            flipped[shot] ^= self._get_fallback().decode(
+                states[shot, :-1].astype(np.uint8)
+            ) == 1
+
+        corrections = np.zeros((n_shots, 2*self.code.n), dtype=np.uint)
+        if self._error_type == 'X':
+            corrections[:, :self.code.n] = flipped
+        else:
+            corrections[:, self.code.n:] = flipped
+
+        self._batch_stats = [
+            {'n_sweeps': int(n_sweeps), 'fallback_decodes': int(fallback)}
+            for n_sweeps, fallback in zip(
+                self.last_n_sweeps, self.last_fallbacks
+            )
+        ]
+
+        return corrections
+
+
+def _sweep_rule(local: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Subsets of edges to flip for each pattern of signs around a vertex.
+
+    Parameters
+    ----------
+    local : np.ndarray
+        Binary matrix of shape (k, 3) of the stabilizers of the
+        neighbourhood of a vertex containing each of its edges.
+
+    Returns
+    -------
+    subsets : np.ndarray
+        Array of shape (2**k, 8) of the subsets of edges (as binary numbers)
+        whose syndrome is closest to each pattern (as a binary number),
+        with the fewest edges.
+    counts : np.ndarray
+        Number of such subsets for each pattern.
+    """
+    n_stabilizers = local.shape[0]
+    subsets = np.arange(8)
+    chosen = (subsets[:, None] >> np.arange(3)) & 1
+    images = (chosen @ local.T.astype(int)) % 2 @ (
+        1 << np.arange(n_stabilizers)
+    )
+    weights = chosen.sum(axis=1)
+
+    patterns = np.arange(2**n_stabilizers)
+    differences = patterns[:, None] ^ images[None, :]
+    distances = np.zeros(differences.shape, dtype=int)
+    for bit in range(n_stabilizers):
+        distances += (differences >> bit) & 1
+    scores = distances*4 + weights[None, :]
+
+    best = scores == scores.min(axis=1, keepdims=True)
+    counts = best.sum(axis=1)
+    order = np.argsort(~best, axis=1, kind='stable')
+    return subsets[order], counts
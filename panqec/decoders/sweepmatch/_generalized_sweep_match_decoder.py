@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, cast
+from panqec.decoders import (
+    BaseDecoder, GeneralizedSweepDecoder, MatchingDecoder
+)
+from panqec.codes import StabilizerCode
+from panqec.error_models import BaseErrorModel
+import numpy as np
+
+
+class GeneralizedSweepMatchDecoder(BaseDecoder):
+    """Decoder of the rhombic and hollow 3D codes, sweeping the errors with
+    loop-like syndromes with `GeneralizedSweepDecoder` and matching the
+    errors with point-like syndromes with `MatchingDecoder`."""
+
+    label = 'Generalized 3D Sweep Matching Decoder'
+    allowed_codes = [
+        "RhombicToricCode", "RhombicPlanarCode",
+        "HollowPlanar3DCode", "HollowRhombicCode"
+    ]
+
+    def __init__(self, code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 max_rounds=32,
+                 concurrent: bool = False):
+        super().__init__(code, error_model, error_rate)
+
+        self.max_rounds = max_rounds
+        self.concurrent = concurrent
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.sweeper = GeneralizedSweepDecoder(
+            code, error_model, error_rate, max_rounds=max_rounds
+        )
+        match_type = 'X' if self.sweeper.error_type == 'Z' else 'Z'
+        self.matcher = MatchingDecoder(
+            code, error_model, error_rate, match_type
+        )
+
+    @property
+    def params(self) -> dict:
+        return {
+            'max_rounds': self.max_rounds
+        }
+
+    def set_error_rate(self, error_rate: float):
+        """Move the sweeper and the matcher to another error rate."""
+        super().set_error_rate(error_rate)
+        self.sweeper.set_error_rate(error_rate)
+        self.matcher.set_error_rate(error_rate)
+
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Copy of the decoder sharing the sweep tables and matching
+        graphs, with its own thread."""
+        replica = cast(GeneralizedSweepMatchDecoder, super().replicate(seed))
+        replica._executor = None
+        return replica
+
+    def close(self):
+        """Shut down the thread running the sweeper."""
+        super().close()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _run_halves(self, sweep, match):
+        """Run the sweeper and the matcher, in two threads if
+        `concurrent` is set."""
+        if not self.concurrent:
+            return sweep(), match()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        future = self._executor.submit(sweep)
+        match_result = match()
+        return future.result(), match_result
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections given code and measured syndrome."""
+
+        sweep_correction, match_correction = self._run_halves(
+            lambda: self.sweeper.decode(syndrome),
+            lambda: self.matcher.decode(syndrome)
+        )
+
+        correction = (sweep_correction + match_correction) % 2
+
+        self._decode_stats = {
+            **self.sweeper.last_decode_stats(),
+            **self.matcher.last_decode_stats()
+        }
+
+        return correction
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections of many shots at once."""
+
+        sweep_corrections, match_corrections = self._run_halves(
+            lambda: self.sweeper.decode_batch(syndromes),
+            lambda: self.matcher.decode_batch(syndromes)
+        )
+
+        corrections = (sweep_corrections + match_corrections) % 2
+
+        self._batch_stats = [
+            {**sweeper_stats, **matcher_stats}
+            for sweeper_stats, matcher_stats in zip(
+                self.sweeper.last_batch_stats(),
+                self.matcher.last_batch_stats()
+            )
+        ]
+
+        return corrections
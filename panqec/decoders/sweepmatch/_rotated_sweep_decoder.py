@@ -1,8 +1,9 @@
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Set
 import numpy as np
 from panqec.decoders import BaseDecoder
 from panqec.codes import StabilizerCode
 from panqec.error_models import BaseErrorModel
+from ._sweep_decoder_3d import _is_new_state
 
 Operator = Dict[Tuple, str]
 
@@ -12,8 +13,17 @@ class RotatedSweepDecoder3D(BaseDecoder):
     label = 'Rotated Code 3D Sweep Decoder'
     allowed_codes = ["RotatedToric3DCode", "RotatedPlanar3DCode"]
 
+    # Sweep directions to take
+    sweep_directions = [
+        (1, 0, 1), (1, 0, -1),
+        (0, 1, 1), (0, 1, -1),
+        (-1, 0, 1), (-1, 0, -1),
+        (0, -1, 1), (0, -1, -1),
+    ]
+
     _rng: np.random.Generator
     max_rounds: int
+    last_n_sweeps: np.ndarray
 
     def __init__(self, code: StabilizerCode,
                  error_model: BaseErrorModel,
@@ -24,6 +34,9 @@ class RotatedSweepDecoder3D(BaseDecoder):
         self._rng = np.random.default_rng(seed)
         self.seed = seed
         self.max_rounds = max_rounds
+        self.last_n_sweeps = np.zeros(0, dtype=int)
+
+        self._build_tables()
 
     @property
     def params(self) -> dict:
@@ -32,6 +45,125 @@ class RotatedSweepDecoder3D(BaseDecoder):
             'max_rounds': self.max_rounds
         }
 
+    def _build_tables(self):
+        """Precompute the neighbourhood of each vertex in every sweep
+        direction, as well as the faces adjacent to each edge.
+
+        For each sweep direction, `_sweep_faces[direction]` and
+        `_sweep_edges[direction]` are arrays of shape (n_vertices, 3)
+        with the indices of the x, y and z faces and edges of every vertex
+        that has a full neighbourhood in that direction.
+        `_edge_faces` is an array of shape (n, 4) with the indices of the
+        faces adjacent to each edge, padded with the index of a dummy face
+        `n_stabilizers` that is always ignored.
+        """
+        n_stabilizers = self.code.n_stabilizers
+        stabilizer_index = self.code.stabilizer_index
+        qubit_index = self.code.qubit_index
+
+        vertices = [
+            location for location in self.code.stabilizer_coordinates
+            if self.code.stabilizer_type(location) == 'vertex'
+        ]
+
+        self._sweep_faces: Dict[Tuple, np.ndarray] = dict()
+        self._sweep_edges: Dict[Tuple, np.ndarray] = dict()
+        for sweep_direction in self.sweep_directions:
+            faces_table = []
+            edges_table = []
+            for vertex in vertices:
+                faces = self.get_sweep_faces(vertex, sweep_direction)
+                edges = self.get_sweep_edges(vertex, sweep_direction)
+                if (
+                    all(self.code.is_stabilizer(face, 'face')
+                        for face in faces)
+                    and all(edge in qubit_index for edge in edges)
+                ):
+                    faces_table.append([stabilizer_index[f] for f in faces])
+                    edges_table.append([qubit_index[e] for e in edges])
+            self._sweep_faces[sweep_direction] = np.array(
+                faces_table, dtype=int
+            ).reshape(-1, 3)
+            self._sweep_edges[sweep_direction] = np.array(
+                edges_table, dtype=int
+            ).reshape(-1, 3)
+
+        self._edge_faces = np.full((self.code.n, 4), n_stabilizers, dtype=int)
+        for edge, index in qubit_index.items():
+            faces = self.get_edge_faces(edge)
+            self._edge_faces[index, :len(faces)] = [
+                stabilizer_index[face] for face in faces
+            ]
+
+    def _sweep_state(
+        self, state: np.ndarray, sweep_direction: Tuple[int, int, int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Apply the sweep rule once along a direction on all vertices at
+        the same time.
+
+        Parameters
+        ----------
+        state : np.ndarray
+            Boolean array of face signs of shape (..., n_stabilizers + 1),
+            where the last entry is the dummy face, always kept at 0.
+        sweep_direction : Tuple[int, int, int]
+            Direction of the sweep.
+
+        Returns
+        -------
+        new_state : np.ndarray
+            Face signs after the sweep move.
+        flips : np.ndarray
+            Boolean array of shape (..., n) of the edges flipped.
+        """
+        face_table = self._sweep_faces[sweep_direction]
+        edge_table = self._sweep_edges[sweep_direction]
+
+        # Gather the signs of the faces around each vertex.
+        faces = state[..., face_table]
+        x_face = faces[..., 0]
+        y_face = faces[..., 1]
+        z_face = faces[..., 2]
+
+        # Decide which edge to flip around each vertex.
+        move = np.stack([
+            y_face & z_face & ~x_face,
+            x_face & z_face & ~y_face,
+            x_face & y_face & ~z_face,
+        ], axis=-1)
+
+        # When all three faces are excited, flip an edge at random.
+        ties = x_face & y_face & z_face
+        n_ties = np.count_nonzero(ties)
+        if n_ties > 0:
+            directions = self._rng.choice([0, 1, 2], size=n_ties)
+            move[ties] = directions[:, None] == np.arange(3)
+
+        # Scatter the flips to the edges, then to their adjacent faces.
+        batch_shape = state.shape[:-1]
+        batch_offsets = np.arange(int(np.prod(batch_shape)))[:, None]
+        move = move.reshape(-1, *edge_table.shape)
+        batch, vertex, axis = np.nonzero(move)
+
+        n = self.code.n
+        flipped_edges = edge_table[vertex, axis]
+        flips = np.bincount(
+            batch*n + flipped_edges, minlength=len(batch_offsets)*n
+        ).reshape(*batch_shape, n) % 2 == 1
+
+        n_faces = state.shape[-1]
+        flipped_faces = (
+            batch_offsets[batch]*n_faces + self._edge_faces[flipped_edges]
+        )
+        face_flips = np.bincount(
+            flipped_faces.ravel(), minlength=len(batch_offsets)*n_faces
+        ).reshape(state.shape) % 2 == 1
+
+        new_state = state ^ face_flips
+        new_state[..., -1] = False
+
+        return new_state, flips
+
     def get_face_syndromes(
         self, full_syndrome: np.ndarray
     ) -> np.ndarray:
@@ -55,42 +187,116 @@ class RotatedSweepDecoder3D(BaseDecoder):
         self, syndrome: np.ndarray, **kwargs
     ) -> np.ndarray:
         """Get Z corrections given measured syndrome."""
+        correction = self.decode_batch(np.asarray(syndrome)[np.newaxis])[0]
+        self._decode_stats = {'n_sweeps': int(self.last_n_sweeps[0])}
+        return correction
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Get Z corrections of many shots at once.
+
+        The cellular automata of all the shots are swept in lockstep,
+        and a shot drops out as soon as its signs are cleared.
+        A shot moves on to the next direction as soon as its signs come back
+        to a previous state, and stops completely if its signs at the end of
+        a round were already seen at the end of a previous round, as long as
+        no tie was broken at random in between.
+        The number of sweeps used by each shot is stored in
+        `last_n_sweeps`.
+
+        Parameters
+        ----------
+        syndromes: np.ndarray
+            Syndromes as an array of size (n_shots, m), where m is the number
+            of stabilizers.
+
+        Returns
+        -------
+        corrections : np.ndarray
+            Corrections as an array of size (n_shots, 2n) in the binary
+            symplectic format.
+        """
+        syndromes = np.asarray(syndromes)
+        n_shots = syndromes.shape[0]
 
         # Maximum number of times to apply sweep rule before giving up round.
         largest_size = 2*int(max(self.code.size)) + 2
         max_sweeps = 4*largest_size
 
-        # The syndromes represented as an array of 0s and 1s.
-        signs = self.get_initial_state(syndrome)
+        # The signs of the faces, with an extra dummy face at the end.
+        states = np.zeros((n_shots, self.code.n_stabilizers + 1), dtype=bool)
+        states[:, :-1] = syndromes
+        states[:, :-1][:, self.code.z_indices] = False
 
-        # Keep track of the correction needed.
-        correction: Dict = dict()
+        # Keep track of the parity of flips on each edge.
+        flipped = np.zeros((n_shots, self.code.n), dtype=bool)
 
-        # Sweep directions to take
-        sweep_directions = [
-            (1, 0, 1), (1, 0, -1),
-            (0, 1, 1), (0, 1, -1),
-            (-1, 0, 1), (-1, 0, -1),
-            (0, -1, 1), (0, -1, -1),
-        ]
+        # Shots that still have syndromes.
+        active = np.flatnonzero(states.any(axis=1))
+
+        # Number of sweeps applied to each shot.
+        self.last_n_sweeps = np.zeros(n_shots, dtype=int)
 
-        # Keep sweeping in all directions until there are no syndromes.
+        # States visited by each shot at the end of each round since its
+        # last random tie-breaking.
+        seen_rounds: List[Set[bytes]] = [set() for _ in range(n_shots)]
+        _is_new_state(
+            states[active], active, seen_rounds,
+            np.zeros(len(active), dtype=bool)
+        )
+
+        # Keep sweeping in all directions until there are no syndromes,
+        # or until the state at the end of a round repeats itself.
         i_round = 0
-        while any(signs) and i_round < self.max_rounds:
-            for sweep_direction in sweep_directions:
+        while len(active) > 0 and i_round < self.max_rounds:
+            tied = np.zeros(n_shots, dtype=bool)
+            for sweep_direction in self.sweep_directions:
+                face_table = self._sweep_faces[sweep_direction]
+
+                # States visited in this direction by each shot.
+                seen: List[Set[bytes]] = [set() for _ in range(n_shots)]
+                _is_new_state(
+                    states[active], active, seen,
+                    np.zeros(len(active), dtype=bool)
+                )
 
                 # Initialize the number of sweeps.
                 i_sweep = 0
 
-                # Keep sweeping until there are no syndromes.
-                while any(signs) and i_sweep < max_sweeps:
-                    signs = self.sweep_move(
-                        signs, correction, sweep_direction
+                # Keep sweeping until there are no syndromes,
+                # or until the state repeats itself.
+                sweeping = active
+                while len(sweeping) > 0 and i_sweep < max_sweeps:
+                    ties = np.any(
+                        states[sweeping][:, face_table].all(axis=-1), axis=-1
                     )
+                    tied[sweeping] |= ties
+                    states[sweeping], flips = self._sweep_state(
+                        states[sweeping], sweep_direction
+                    )
+                    flipped[sweeping] ^= flips
+                    self.last_n_sweeps[sweeping] += 1
+                    sweeping = sweeping[
+                        _is_new_state(states[sweeping], sweeping, seen, ties)
+                    ]
                     i_sweep += 1
+
+                active = active[states[active].any(axis=1)]
+
+            active = active[
+                _is_new_state(
+                    states[active], active, seen_rounds, tied[active]
+                )
+            ]
             i_round += 1
 
-        return self.code.to_bsf(correction)
+        corrections = np.zeros((n_shots, 2*self.code.n), dtype=np.uint)
+        corrections[:, self.code.n:] = flipped
+
+        self._batch_stats = [
+            {'n_sweeps': int(n_sweeps)} for n_sweeps in self.last_n_sweeps
+        ]
+
+        return corrections
 
     def get_sweep_faces(self, vertex, sweep_direction):
         """Get the coordinates of neighboring faces in sweep direction."""
@@ -146,73 +352,20 @@ class RotatedSweepDecoder3D(BaseDecoder):
     ) -> np.ndarray:
         """Apply the sweep move once along a particular direciton."""
 
-        flip_locations = []
+        state = np.zeros(self.code.n_stabilizers + 1, dtype=bool)
+        state[:-1] = signs
+        state, flips = self._sweep_state(state, sweep_direction)
 
-        # Apply sweep rule on every vertex.
-        for vertex in self.code.stabilizer_coordinates:
-            if self.code.stabilizer_type(vertex) == 'vertex':
-                # Get neighbouring faces and edges in the sweep direction.
-                x_face, y_face, z_face = self.get_sweep_faces(
-                    vertex, sweep_direction
-                )
-                x_edge, y_edge, z_edge = self.get_sweep_edges(
-                    vertex, sweep_direction
-                )
-
-                # Check faces and edges are in lattice before proceeding.
-                faces_valid = tuple(
-                    self.code.is_stabilizer(face, 'face')
-                    for face in [x_face, y_face, z_face]
-                )
-                edges_valid = tuple(
-                    edge in self.code.qubit_index
-                    for edge in [x_edge, y_edge, z_edge]
-                )
-                if all(faces_valid) and all(edges_valid):
-
-                    x_face_index = self.code.stabilizer_index[x_face]
-                    y_face_index = self.code.stabilizer_index[y_face]
-                    z_face_index = self.code.stabilizer_index[z_face]
-                    if (
-                        signs[x_face_index] and signs[y_face_index]
-                        and signs[z_face_index]
-                    ):
-                        direction = self.get_default_direction()
-                        edge_flip = {
-                            0: x_edge, 1: y_edge, 2: z_edge
-                        }[direction]
-                        flip_locations.append(edge_flip)
-                    elif signs[y_face_index] and signs[z_face_index]:
-                        flip_locations.append(x_edge)
-                    elif signs[x_face_index] and signs[z_face_index]:
-                        flip_locations.append(y_edge)
-                    elif signs[x_face_index] and signs[y_face_index]:
-                        flip_locations.append(z_edge)
-
-                """
-                # Boundary case with only 1 face and 2 edges.
-                elif sum(faces_valid) == 1 and sum(edges_valid) == 2:
-                    i_face_valid = faces_valid.index(True)
-                    i_edge_invalid = edges_valid.index(False)
-                    i_edge_valid = edges_valid.index(True)
-                    # Check valid face is orthogonal to missing edge.
-                    if i_face_valid == i_edge_invalid:
-                        valid_face = [x_face, y_face, z_face][i_face_valid]
-                        valid_edge = [x_edge, y_edge, z_edge][i_edge_valid]
-                        # Flip an edge if the face has a syndrome.
-                        if signs[valid_face]:
-                            flip_locations.append(valid_edge)
-                """
+        for index in np.where(flips)[0]:
+            self.code.site(correction, 'Z', self.code.qubit_coordinates[index])
 
         new_signs = signs.copy()
-        for location in flip_locations:
-            self.flip_edge(location, new_signs)
-            self.code.site(correction, 'Z', location)
+        new_signs[:] = state[:-1]
 
         return new_signs
 
-    def flip_edge(self, edge: Tuple, signs: np.ndarray):
-        """Flip signs at index and update correction."""
+    def get_edge_faces(self, edge: Tuple) -> List[Tuple]:
+        """Get the coordinates of the faces adjacent to an edge."""
 
         x, y, z = edge
 
@@ -257,8 +410,13 @@ class RotatedSweepDecoder3D(BaseDecoder):
         faces = [face for face in faces
                  if self.code.is_stabilizer(face, 'face')]
 
+        return faces
+
+    def flip_edge(self, edge: Tuple, signs: np.ndarray):
+        """Flip signs at index and update correction."""
+
         # Flip the state of the faces.
-        for face in faces:
+        for face in self.get_edge_faces(edge):
             signs[self.code.stabilizer_index[face]] = 1 - signs[
                 self.code.stabilizer_index[face]
             ]
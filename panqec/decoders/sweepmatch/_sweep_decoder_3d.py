@@ -1,4 +1,4 @@
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Set
 import numpy as np
 from panqec.decoders import BaseDecoder
 from panqec.error_models import BaseErrorModel
@@ -14,6 +14,7 @@ class SweepDecoder3D(BaseDecoder):
 
     _rng: np.random.Generator
     max_sweep_factor: int
+    last_n_sweeps: np.ndarray
 
     def __init__(self,
                  code: StabilizerCode,
@@ -26,6 +27,10 @@ class SweepDecoder3D(BaseDecoder):
         self.max_sweep_factor = max_sweep_factor
         self.seed = seed
 
+        self.last_n_sweeps = np.zeros(0, dtype=int)
+
+        self._build_grids()
+
     @property
     def params(self) -> dict:
         return {
@@ -33,6 +38,109 @@ class SweepDecoder3D(BaseDecoder):
             'max_sweep_factor': self.max_sweep_factor
         }
 
+    def _build_grids(self):
+        """Precompute the maps between the syndrome and the cellular
+        automaton grids.
+
+        The state of the automaton is stored as a boolean array of shape
+        (3, L_x, L_y, L_z), where the cell (i, j, k) holds the three faces
+        in the sweep direction of the vertex (2i, 2j, 2k), i.e. the faces
+        normal to the x, y and z axes respectively.
+        Similarly, the edges (2i+1, 2j, 2k), (2i, 2j+1, 2k) and (2i, 2j, 2k+1)
+        are stored in the cell (i, j, k) of an array with the same shape.
+        Faces, edges and vertices that do not exist in the code
+        (at the boundaries of the planar code) are masked out.
+        """
+        L_x, L_y, L_z = self.code.size
+        shape = (3, L_x, L_y, L_z)
+
+        self._face_index = np.full(shape, -1, dtype=int)
+        self._edge_index = np.full(shape, -1, dtype=int)
+        self._vertex_mask = np.zeros((L_x, L_y, L_z), dtype=bool)
+
+        face_shifts = [(0, 1, 1), (1, 0, 1), (1, 1, 0)]
+        edge_shifts = [(1, 0, 0), (0, 1, 0), (0, 0, 1)]
+
+        for i, j, k in np.ndindex(L_x, L_y, L_z):
+            vertex = (2*i, 2*j, 2*k)
+            self._vertex_mask[i, j, k] = vertex in self.code.stabilizer_index
+            for axis in range(3):
+                face = tuple(np.add(vertex, face_shifts[axis]))
+                edge = tuple(np.add(vertex, edge_shifts[axis]))
+                self._face_index[axis, i, j, k] = \
+                    self.code.stabilizer_index.get(face, -1)
+                self._edge_index[axis, i, j, k] = \
+                    self.code.qubit_index.get(edge, -1)
+
+        self._face_mask = self._face_index >= 0
+        self._edge_mask = self._edge_index >= 0
+
+    def _to_grid(self, signs: np.ndarray) -> np.ndarray:
+        """Face signs from a syndrome vector to the automaton grid."""
+        grid = np.zeros(self._face_index.shape, dtype=bool)
+        grid[self._face_mask] = signs[self._face_index[self._face_mask]]
+        return grid
+
+    def _sweep_grid(self, grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Apply the sweep rule once on the whole grid at the same time.
+
+        Parameters
+        ----------
+        grid : np.ndarray
+            Boolean array of face signs of shape (..., 3, L_x, L_y, L_z),
+            where the leading dimensions (if any) index independent states.
+
+        Returns
+        -------
+        new_grid : np.ndarray
+            Face signs after the sweep move.
+        flips : np.ndarray
+            Edges flipped by the sweep move, in the same layout as the faces.
+        """
+        x_face = grid[..., 0, :, :, :]
+        y_face = grid[..., 1, :, :, :]
+        z_face = grid[..., 2, :, :, :]
+
+        flips = np.stack([
+            y_face & z_face & ~x_face,
+            x_face & z_face & ~y_face,
+            x_face & y_face & ~z_face,
+        ], axis=-4)
+
+        # When all three faces are excited, flip an edge at random.
+        ties = x_face & y_face & z_face & self._vertex_mask
+        n_ties = np.count_nonzero(ties)
+        if n_ties > 0:
+            directions = self._rng.choice([0, 1, 2], size=n_ties)
+            for direction in range(3):
+                flips[..., direction, :, :, :][ties] = directions == direction
+
+        flips &= self._vertex_mask
+
+        flip_x = flips[..., 0, :, :, :]
+        flip_y = flips[..., 1, :, :, :]
+        flip_z = flips[..., 2, :, :, :]
+
+        # Each edge flips the two faces it bounds in each of the two
+        # planes containing it, one of which is in the neighbouring cell
+        # behind it (with periodic boundary conditions).
+        new_grid = grid.copy()
+        new_grid[..., 0, :, :, :] ^= (
+            flip_y ^ np.roll(flip_y, -1, axis=-1)
+            ^ flip_z ^ np.roll(flip_z, -1, axis=-2)
+        )
+        new_grid[..., 1, :, :, :] ^= (
+            flip_x ^ np.roll(flip_x, -1, axis=-1)
+            ^ flip_z ^ np.roll(flip_z, -1, axis=-3)
+        )
+        new_grid[..., 2, :, :, :] ^= (
+            flip_x ^ np.roll(flip_x, -1, axis=-2)
+            ^ flip_y ^ np.roll(flip_y, -1, axis=-3)
+        )
+        new_grid &= self._face_mask
+
+        return new_grid, flips
+
     def get_face_syndromes(
         self, full_syndrome: np.ndarray
     ) -> np.ndarray:
@@ -97,66 +205,141 @@ class SweepDecoder3D(BaseDecoder):
 
     def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
         """Get Z corrections given measured syndrome."""
+        correction = self.decode_batch(np.asarray(syndrome)[np.newaxis])[0]
+        self._decode_stats = {'n_sweeps': int(self.last_n_sweeps[0])}
+        return correction
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Get Z corrections of many shots at once.
+
+        The cellular automata of all the shots are swept in lockstep,
+        and a shot drops out as soon as its signs are cleared.
+        A shot also drops out when its signs come back to a previous state
+        without any random tie-breaking in between, since it is then stuck
+        in a cycle (or a fixed point) that will never clear.
+        The number of sweeps used by each shot is stored in
+        `last_n_sweeps`.
+
+        Parameters
+        ----------
+        syndromes: np.ndarray
+            Syndromes as an array of size (n_shots, m), where m is the number
+            of stabilizers.
+
+        Returns
+        -------
+        corrections : np.ndarray
+            Corrections as an array of size (n_shots, 2n) in the binary
+            symplectic format.
+        """
+        syndromes = np.asarray(syndromes)
+        n_shots = syndromes.shape[0]
 
         # Maximum number of times to sweep before giving up.
         max_sweeps = self.max_sweep_factor*int(max(self.code.size))
 
-        # The syndromes represented as an array of 0s and 1s.
-        signs = self.get_initial_state(syndrome)
+        # The face syndromes laid out on the cellular automaton grids.
+        grids = np.zeros((n_shots, *self._face_index.shape), dtype=bool)
+        grids[:, self._face_mask] = \
+            syndromes[:, self._face_index[self._face_mask]]
+
+        # Keep track of the parity of flips on each edge.
+        flipped = np.zeros(grids.shape, dtype=bool)
+
+        # Shots that still have syndromes.
+        grid_size = self._face_index.size
+        active = np.flatnonzero(
+            grids.reshape(n_shots, grid_size).any(axis=1)
+        )
+
+        # Number of sweeps applied to each shot.
+        self.last_n_sweeps = np.zeros(n_shots, dtype=int)
 
-        # Keep track of the correction needed.
-        correction: Dict = dict()
+        # States visited by each shot since its last random tie-breaking.
+        seen: List[Set[bytes]] = [set() for _ in range(n_shots)]
+        _is_new_state(
+            grids[active].reshape(len(active), grid_size), active, seen,
+            np.zeros(len(active), dtype=bool)
+        )
 
         # Initialize the number of sweeps.
         i_sweep = 0
 
-        # Keep sweeping until there are no syndromes.
-        while any(signs) and i_sweep < max_sweeps:
-            signs = self.sweep_move(signs, correction)
+        # Keep sweeping until there are no syndromes,
+        # or until the state repeats itself.
+        while len(active) > 0 and i_sweep < max_sweeps:
+            ties = np.any(
+                grids[active].all(axis=1) & self._vertex_mask, axis=(1, 2, 3)
+            )
+            grids[active], flips = self._sweep_grid(grids[active])
+            flipped[active] ^= flips
+            self.last_n_sweeps[active] += 1
+            states = grids[active].reshape(len(active), grid_size)
+            active = active[_is_new_state(states, active, seen, ties)]
             i_sweep += 1
 
-        return self.code.to_bsf(correction)
+        corrections = np.zeros((n_shots, 2*self.code.n), dtype=np.uint)
+        corrections[:, self.code.n + self._edge_index[self._edge_mask]] = \
+            flipped[:, self._edge_mask]
+
+        self._batch_stats = [
+            {'n_sweeps': int(n_sweeps)} for n_sweeps in self.last_n_sweeps
+        ]
+
+        return corrections
 
     def sweep_move(
         self, signs: np.ndarray, correction: Operator
     ) -> np.ndarray:
         """Apply the sweep move once."""
 
+        grid, flips = self._sweep_grid(self._to_grid(signs))
+
+        for axis, i, j, k in zip(*np.where(flips)):
+            location = [2*i, 2*j, 2*k]
+            location[axis] += 1
+            correction[tuple(int(c) for c in location)] = 'Z'
+
         new_signs = signs.copy()
+        new_signs[self._face_index[self._face_mask]] = grid[self._face_mask]
 
-        flip_locations = []
+        return new_signs
 
-        L_x, L_y, L_z = self.code.size
-        limits = (2*L_x, 2*L_y, 2*L_z)
 
-        # Sweep through every edge.
-        for x, y, z in np.array(self.code.stabilizer_coordinates)[self.code.z_indices]:  # type: ignore  # noqa: E501
-            # Get the syndromes on each face in sweep direction.
-            x_face_loc = tuple(np.mod((x, y + 1, z + 1), limits))
-            y_face_loc = tuple(np.mod((x + 1, y, z + 1), limits))
-            z_face_loc = tuple(np.mod((x + 1, y + 1, z), limits))
-            x_face = self.code.is_stabilizer(x_face_loc) and signs[self.code.stabilizer_index[x_face_loc]]  # type: ignore  # noqa: E501
-            y_face = self.code.is_stabilizer(y_face_loc) and signs[self.code.stabilizer_index[y_face_loc]]  # type: ignore  # noqa: E501
-            z_face = self.code.is_stabilizer(z_face_loc) and signs[self.code.stabilizer_index[z_face_loc]]  # type: ignore  # noqa: E501
-
-            x_edge = tuple(np.mod((x + 1, y, z), limits))
-            y_edge = tuple(np.mod((x, y + 1, z), limits))
-            z_edge = tuple(np.mod((x, y, z + 1), limits))
-
-            if x_face and y_face and z_face:
-                direction = self.get_default_direction()
-                flip_locations.append(
-                    {0: x_edge, 1: y_edge, 2: z_edge}[direction]
-                )
-            elif y_face and z_face:
-                flip_locations.append(x_edge)
-            elif x_face and z_face:
-                flip_locations.append(y_edge)
-            elif x_face and y_face:
-                flip_locations.append(z_edge)
-
-        for location in flip_locations:
-            self.flip_edge(location, new_signs)
-            correction[location] = 'Z'
+def _is_new_state(
+    states: np.ndarray, shots: np.ndarray, seen: List[Set[bytes]],
+    ties: np.ndarray
+) -> np.ndarray:
+    """Find the shots that still have syndromes and whose state has not
+    been visited since their last random tie-breaking.
 
-        return new_signs
+    Parameters
+    ----------
+    states : np.ndarray
+        Boolean array of size (n_active, state_size) of the states of the
+        active shots after a sweep move.
+    shots : np.ndarray
+        Index of each active shot.
+    seen : List[Set[bytes]]
+        Packed states visited by each shot, updated in place.
+    ties : np.ndarray
+        Whether each active shot had to break a tie at random during the
+        sweep move, in which case its history is forgotten.
+
+    Returns
+    -------
+    is_new : np.ndarray
+        Boolean array of size n_active, False for the shots that can stop.
+    """
+    packed = np.packbits(states, axis=1)
+    is_new = states.any(axis=1)
+    for i_active in np.flatnonzero(is_new):
+        shot_seen = seen[shots[i_active]]
+        if ties[i_active]:
+            shot_seen.clear()
+        key = packed[i_active].tobytes()
+        if key in shot_seen:
+            is_new[i_active] = False
+        else:
+            shot_seen.add(key)
+    return is_new
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, cast
 import numpy as np
 from panqec.codes import StabilizerCode
 from panqec.decoders import (
@@ -16,22 +18,86 @@ class SweepMatchDecoder(BaseDecoder):
 
     def __init__(self, code: StabilizerCode,
                  error_model: BaseErrorModel,
-                 error_rate: float):
+                 error_rate: float,
+                 concurrent: bool = False):
         super().__init__(code, error_model, error_rate)
+        self.concurrent = concurrent
+        self._executor: Optional[ThreadPoolExecutor] = None
         self.sweeper = SweepDecoder3D(code, error_model, error_rate)
         self.matcher = MatchingDecoder(code, error_model, error_rate,
                                        error_type='X')
 
     @property
     def params(self) -> dict:
+        # `concurrent` does not change the corrections, so it is not
+        # saved with the results.
         return {}
 
+    def set_error_rate(self, error_rate: float):
+        """Move the sweeper and the matcher to another error rate."""
+        super().set_error_rate(error_rate)
+        self.sweeper.set_error_rate(error_rate)
+        self.matcher.set_error_rate(error_rate)
+
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Copy of the decoder sharing the sweep tables and matching
+        graphs, with its own thread."""
+        replica = cast(SweepMatchDecoder, super().replicate(seed))
+        replica._executor = None
+        return replica
+
+    def close(self):
+        """Shut down the thread running the sweeper."""
+        super().close()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _run_halves(self, sweep, match):
+        """Run the sweeper and the matcher, in two threads if
+        `concurrent` is set."""
+        if not self.concurrent:
+            return sweep(), match()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        future = self._executor.submit(sweep)
+        x_result = match()
+        return future.result(), x_result
+
     def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
         """Get X and Z corrections given code and measured syndrome."""
 
-        z_correction = self.sweeper.decode(syndrome)
-        x_correction = self.matcher.decode(syndrome)
+        z_correction, x_correction = self._run_halves(
+            lambda: self.sweeper.decode(syndrome),
+            lambda: self.matcher.decode(syndrome)
+        )
 
         correction = (x_correction + z_correction) % 2
 
+        self._decode_stats = {
+            **self.sweeper.last_decode_stats(),
+            **self.matcher.last_decode_stats()
+        }
+
         return correction
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections of many shots at once."""
+
+        z_corrections, x_corrections = self._run_halves(
+            lambda: self.sweeper.decode_batch(syndromes),
+            lambda: self.matcher.decode_batch(syndromes)
+        )
+
+        corrections = (x_corrections + z_corrections) % 2
+
+        self._batch_stats = [
+            {**sweeper_stats, **matcher_stats}
+            for sweeper_stats, matcher_stats in zip(
+                self.sweeper.last_batch_stats(),
+                self.matcher.last_batch_stats()
+            )
+        ]
+
+        return corrections
@@ -0,0 +1,171 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+import numpy as np
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.decoders.base._base_decoder import derive_seed
+from panqec.error_models import BaseErrorModel
+
+
+class ThreadPoolDecoder(BaseDecoder):
+    """Wrapper that decodes batches of shots in a pool of threads.
+
+    `decode_batch` splits the shots into one contiguous block per thread,
+    and each block is decoded with the `decode_batch` method of its own
+    replica of the wrapped decoder (see `BaseDecoder.replicate`).
+    The replicas share everything that is only read while decoding,
+    such as the code and the matching graphs, so the memory used by
+    extra threads is limited to what the wrapped decoder modifies while
+    decoding (e.g. the messages of native BP-OSD decoders).
+    Each replica gets its own seed, derived from `seed`.
+
+    The threads are shut down by `close`, or on exit when the decoder
+    is used as a context manager.
+
+    Threads only run in parallel while the wrapped decoder releases the
+    GIL, i.e. in numpy operations or in native decoders built to
+    release it.
+    """
+
+    allowed_codes = None  # all codes allowed
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 decoder: Union[BaseDecoder, Dict],
+                 n_workers: Optional[int] = None,
+                 seed: int = 0):
+        """Constructor for the ThreadPoolDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder
+        error_rate: float
+            Error rate used by the decoder
+        decoder: Union[BaseDecoder, Dict]
+            Decoder to run in each thread, either as an instance or as a
+            dictionary `{'name': ..., 'parameters': ...}` of a registered
+            decoder, in the same format as in input files.
+            The other threads use new instances with the same parameters.
+        n_workers: int, optional
+            Number of threads. Defaults to the number of CPUs.
+        seed: int, optional
+            Seed from which the seeds of the replicas of the other threads
+            are derived.
+        """
+        super().__init__(code, error_model, error_rate)
+
+        if n_workers is not None and n_workers < 1:
+            raise ValueError(
+                f"Argument 'n_workers' must be positive, not {n_workers}"
+            )
+
+        if isinstance(decoder, dict):
+            from panqec.simulation._batch_simulation import (
+                _parse_decoder_dict
+            )
+            decoder = _parse_decoder_dict(
+                decoder, code, error_model, error_rate
+            )
+
+        self.decoder = decoder
+        self.n_workers = n_workers
+        self.seed = seed
+
+        # Decoders of each thread, the first one being the wrapped decoder.
+        # The others are only built when a batch is large enough.
+        self._replicas: List[BaseDecoder] = [decoder]
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def label(self) -> str:
+        return self.decoder.label
+
+    @property
+    def params(self) -> dict:
+        return {
+            'decoder': {
+                'name': self.decoder.id,
+                'parameters': self.decoder.params
+            },
+            'n_workers': self.n_workers,
+            'seed': self.seed
+        }
+
+    def _get_replicas(self, n_replicas: int) -> List[BaseDecoder]:
+        """Decoders of the first `n_replicas` threads."""
+        while len(self._replicas) < n_replicas:
+            self._replicas.append(self.decoder.replicate(
+                derive_seed(self.seed, len(self._replicas))
+            ))
+        return self._replicas[:n_replicas]
+
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Thread pool of replicas of the wrapped decoder."""
+        return ThreadPoolDecoder(
+            self.code, self.error_model, self.error_rate,
+            self.decoder.replicate(seed), self.n_workers, seed
+        )
+
+    def close(self):
+        """Shut down the threads and close the decoders of all the
+        threads."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for replica in self._replicas:
+            replica.close()
+
+    def set_error_rate(self, error_rate: float):
+        """Move the decoders of all the threads to another error rate."""
+        super().set_error_rate(error_rate)
+        for replica in self._replicas:
+            replica.set_error_rate(error_rate)
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get the correction of the wrapped decoder."""
+        correction = self.decoder.decode(syndrome, **kwargs)
+        self._decode_stats = self.decoder.last_decode_stats()
+        return correction
+
+    def decode_batch(self, syndromes: np.ndarray, **kwargs) -> np.ndarray:
+        """Decode blocks of shots concurrently, one block per thread."""
+        syndromes = np.asarray(syndromes)
+        n_workers = self.n_workers or os.cpu_count() or 1
+        blocks = [
+            block for block in np.array_split(
+                np.arange(len(syndromes)), n_workers
+            )
+            if len(block) > 0
+        ]
+        if len(blocks) <= 1:
+            corrections = self.decoder.decode_batch(syndromes, **kwargs)
+            self._batch_stats = self.decoder.last_batch_stats()
+            return corrections
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=n_workers)
+
+        replicas = self._get_replicas(len(blocks))
+        results = self._executor.map(
+            lambda replica, block: replica.decode_batch(
+                syndromes[block], **kwargs
+            ),
+            replicas, blocks
+        )
+
+        corrections = np.zeros((len(syndromes), 2*self.code.n), dtype=np.uint)
+        batch_stats = []
+        for block, block_corrections, replica in zip(
+            blocks, results, replicas
+        ):
+            corrections[block] = block_corrections
+            batch_stats += replica.last_batch_stats()
+        self._batch_stats = batch_stats
+
+        return corrections
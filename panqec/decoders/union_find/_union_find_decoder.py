@@ -0,0 +1,259 @@
+from typing import Dict, List, Set, Tuple
+import numpy as np
+from scipy.sparse import hstack
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.error_models import BaseErrorModel
+
+# Smallest growth length of a qubit, used when the error model gives
+# a non-positive weight (i.e. a qubit error probability of at least 1/2).
+MIN_WEIGHT = 1e-6
+
+# Tolerance on the growth of a qubit to consider it fully grown.
+GROWTH_TOL = 1e-9
+
+
+class _Cluster:
+    """Cluster of stabilizers and fully grown qubits.
+
+    The columns of the parity-check matrix of the grown qubits are kept
+    in an echelon basis of integers (bitmasks over stabilizer indices),
+    so that the cluster can be checked for validity and solved
+    incrementally as it grows.
+    The qubits around the cluster are kept as a list of arrays, updated
+    as stabilizers join the cluster rather than recomputed from all its
+    stabilizers (see `get_boundary`).
+    """
+
+    def __init__(self, check: int, defect: bool, boundary: np.ndarray):
+        self.checks: List[int] = [check]
+        self.defects = (1 << check) if defect else 0
+        self.boundary: List[np.ndarray] = [boundary]
+
+        # Pivot (stabilizer index) -> (column, combination of qubits).
+        self.basis: Dict[int, Tuple[int, int]] = dict()
+
+    def add_column(self, column: int, qubit: int):
+        """Add the column of a newly grown qubit to the basis."""
+        combination = 1 << qubit
+        while column:
+            pivot = column.bit_length() - 1
+            if pivot not in self.basis:
+                self.basis[pivot] = (column, combination)
+                return
+            basis_column, basis_combination = self.basis[pivot]
+            column ^= basis_column
+            combination ^= basis_combination
+
+    def merge(self, other: '_Cluster'):
+        """Absorb another cluster, with stabilizers disjoint from this one."""
+        self.checks += other.checks
+        self.defects |= other.defects
+        self.basis.update(other.basis)
+        self.boundary += other.boundary
+
+    def get_boundary(self, grown: np.ndarray) -> np.ndarray:
+        """Qubits around the cluster that are not grown yet."""
+        if len(self.boundary) == 1:
+            boundary = self.boundary[0]
+        else:
+            boundary = np.unique(np.concatenate(self.boundary))
+        boundary = boundary[~grown[boundary]]
+        self.boundary = [boundary]
+        return boundary
+
+    def solve(self) -> int:
+        """Bitmask of qubits of the cluster that reproduce its syndrome,
+        or -1 if there is none yet."""
+        syndrome = self.defects
+        solution = 0
+        while syndrome:
+            pivot = syndrome.bit_length() - 1
+            if pivot not in self.basis:
+                return -1
+            basis_column, basis_combination = self.basis[pivot]
+            syndrome ^= basis_column
+            solution ^= basis_combination
+        return solution
+
+
+class UnionFindDecoder(BaseDecoder):
+    """Union-find decoder for any stabilizer code.
+
+    Clusters are grown on the Tanner graph of the code from the
+    non-trivial stabilizers, at a speed given by the weights of the
+    error model, until the syndrome of each cluster can be reproduced
+    by the qubits it contains [1]_.
+    Each cluster is then solved with the qubits grown first, which
+    for codes with a matching graph amounts to peeling a spanning forest.
+
+    X and Z errors are decoded independently, using the Z and X parts
+    of the stabilizer matrix respectively.
+
+    References
+    ----------
+    .. [1] Delfosse, Londe and Beverland, "Toward a Union-Find decoder
+       for quantum LDPC codes", IEEE Trans. Inf. Theory 68, 3187 (2022).
+    """
+
+    label = 'Union-Find'
+    allowed_codes = None  # all codes allowed
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float):
+        """Constructor for the UnionFindDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder (to find the weights)
+        error_rate: float
+            Error rate used by the decoder (to find the weights)
+        """
+        super().__init__(code, error_model, error_rate)
+
+        n = code.n
+        H = code.stabilizer_matrix.tocsr()
+
+        # The first n columns are the X errors, which are detected by the
+        # Z part of the stabilizers, and the last n are the Z errors.
+        H = hstack([H[:, n:], H[:, :n]]).tocsr()
+        H.data[:] = 1
+        H.eliminate_zeros()
+        self._H_rows = H
+        self._H_columns = H.tocsc()
+
+        # Bitmask of the stabilizers of each column.
+        self._column_masks = [
+            sum(1 << int(check) for check in self._column_checks(qubit))
+            for qubit in range(2*n)
+        ]
+
+        self.set_error_rate(error_rate)
+
+    @property
+    def params(self) -> dict:
+        return {}
+
+    def set_error_rate(self, error_rate: float):
+        """Recompute the qubit weights for another error rate."""
+        super().set_error_rate(error_rate)
+
+        weights_x, weights_z = self.error_model.get_weights(
+            self.code, error_rate
+        )
+        self.weights = np.maximum(
+            np.concatenate([weights_x, weights_z]), MIN_WEIGHT
+        )
+
+    def _column_checks(self, qubit: int) -> np.ndarray:
+        start, stop = self._H_columns.indptr[qubit:qubit+2]
+        return self._H_columns.indices[start:stop]
+
+    def _row_qubits(self, check: int) -> np.ndarray:
+        start, stop = self._H_rows.indptr[check:check+2]
+        return self._H_rows.indices[start:stop]
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections given measured syndrome."""
+
+        n_qubits = 2*self.code.n
+        correction = np.zeros(n_qubits, dtype=np.uint)
+
+        syndrome = np.asarray(syndrome).astype(bool)
+        defects = np.flatnonzero(syndrome)
+        self._decode_stats = {'growth_steps': 0, 'n_clusters': 0}
+        if len(defects) == 0:
+            return correction
+
+        # Union-find structure over the stabilizers.
+        parent: Dict[int, int] = {}
+        clusters: Dict[int, _Cluster] = {}
+
+        def find(check: int) -> int:
+            root = check
+            while parent[root] != root:
+                root = parent[root]
+            while parent[check] != root:
+                parent[check], check = root, parent[check]
+            return root
+
+        def union(root_1: int, root_2: int) -> int:
+            if root_1 == root_2:
+                return root_1
+            if len(clusters[root_1].checks) < len(clusters[root_2].checks):
+                root_1, root_2 = root_2, root_1
+            parent[root_2] = root_1
+            clusters[root_1].merge(clusters.pop(root_2))
+            return root_1
+
+        support = np.zeros(n_qubits)
+        grown = np.zeros(n_qubits, dtype=bool)
+
+        for check in defects:
+            parent[int(check)] = int(check)
+            clusters[int(check)] = _Cluster(
+                int(check), True, self._row_qubits(check)
+            )
+
+        invalid: Set[int] = set(clusters.keys())
+        growth_steps = 0
+        while invalid:
+            growth_steps += 1
+            # Qubits on the boundary of each invalid cluster.
+            boundaries = np.concatenate([
+                clusters[root].get_boundary(grown) for root in invalid
+            ])
+            if len(boundaries) == 0:
+                break
+
+            # Grow every boundary qubit at a rate given by the number
+            # of invalid clusters around it, until one is fully grown.
+            boundary, rates = np.unique(boundaries, return_counts=True)
+            remaining = self.weights[boundary] - support[boundary]
+            delta = np.min(remaining / rates)
+            support[boundary] += delta*rates
+            new_qubits = boundary[
+                support[boundary] >= self.weights[boundary] - GROWTH_TOL
+            ]
+
+            # Merge the clusters connected by the new qubits.
+            touched = set()
+            for qubit in new_qubits:
+                qubit = int(qubit)
+                grown[qubit] = True
+                root = -1
+                for check in self._column_checks(qubit):
+                    check = int(check)
+                    if check not in parent:
+                        parent[check] = check
+                        clusters[check] = _Cluster(
+                            check, False, self._row_qubits(check)
+                        )
+                    check_root = find(check)
+                    root = check_root if root < 0 else union(root, check_root)
+                clusters[root].add_column(self._column_masks[qubit], qubit)
+                touched.add(root)
+
+            invalid = {find(root) for root in invalid | touched}
+            invalid = {
+                root for root in invalid if clusters[root].solve() < 0
+            }
+
+        self._decode_stats = {
+            'growth_steps': growth_steps, 'n_clusters': len(clusters)
+        }
+
+        for cluster in clusters.values():
+            solution = cluster.solve()
+            # Flip the qubits of the solution, one set bit at a time.
+            while solution > 0:
+                lowest = solution & -solution
+                correction[lowest.bit_length() - 1] = 1
+                solution ^= lowest
+
+        return correction
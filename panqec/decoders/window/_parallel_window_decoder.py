@@ -0,0 +1,401 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, cast
+import numpy as np
+from ldpc import bposd_decoder
+from pymatching import Matching
+from panqec.codes import StabilizerCode
+from panqec.decoders import BaseDecoder
+from panqec.error_models import BaseErrorModel
+
+# Stabilizers, columns and committed columns of a window.
+Window = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class ParallelWindowDecoder(BaseDecoder):
+    """Decoder splitting the lattice into overlapping windows along one
+    axis, which are decoded concurrently.
+
+    The lattice is cut into `n_blocks` slabs along `axis`, using the
+    coordinates of the qubits and stabilizers, which wrap around if the
+    code is periodic along `axis` (i.e. if some stabilizers span more than
+    half of the lattice along it). Each slab is decoded on
+    the sub-matrix of the stabilizers and qubits within `buffer` of it,
+    but only the correction on the qubits of the slab itself is kept.
+    The syndrome left around the seams between slabs is then decoded in
+    a second set of windows, with the stabilizers within `buffer` of each
+    seam, and only the correction on the qubits within `buffer / 2` of
+    the seam (its core) is kept and added to that of the slabs.
+    Whatever remains (if anything) is decoded on the whole lattice.
+
+    The windows are decoded with PyMatching (`block_decoder='matching'`)
+    or with BP-OSD (`block_decoder='bposd'`), as in `MatchingDecoder` and
+    `BeliefPropagationOSDDecoder`, in a pool of `n_workers` threads.
+    By default (`block_decoder='auto'`), matching is used for the errors
+    whose qubits are all detected by at most two stabilizers, and BP-OSD
+    for the others (e.g. the X errors of the 3D toric code).
+    X and Z errors are decoded independently for CSS codes.
+    """
+
+    label = 'Parallel Window'
+    allowed_codes = None  # all codes allowed
+
+    block_decoders = ['auto', 'matching', 'bposd']
+
+    def __init__(self,
+                 code: StabilizerCode,
+                 error_model: BaseErrorModel,
+                 error_rate: float,
+                 n_blocks: int = 2,
+                 buffer: float = 4,
+                 axis: int = 0,
+                 block_decoder: str = 'auto',
+                 n_workers: Optional[int] = None,
+                 max_bp_iter: int = 1000,
+                 osd_order: int = 0):
+        """Constructor for the ParallelWindowDecoder class
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Code used by the decoder
+        error_model: BaseErrorModel
+            Error model used by the decoder (to find the weights)
+        error_rate: float
+            Error rate used by the decoder (to find the weights)
+        n_blocks: int, optional
+            Number of slabs the lattice is cut into
+        buffer: float, optional
+            Distance (in units of coordinates) by which each window extends
+            beyond the qubits it commits. With more than one slab, it must
+            be less than half the width of a slab, and large enough for
+            the core of each seam to contain qubits.
+        axis: int, optional
+            Coordinate along which the lattice is cut
+        block_decoder: str, optional
+            Decoder of each window, either 'matching', 'bposd', or 'auto'
+            to use matching wherever it applies and BP-OSD elsewhere
+        n_workers: int, optional
+            Number of threads decoding the windows.
+            Defaults to the number of CPUs.
+        max_bp_iter: int, optional
+            Maximum number of BP iterations (only for 'bposd')
+        osd_order: int, optional
+            OSD order (only for 'bposd')
+        """
+        super().__init__(code, error_model, error_rate)
+
+        if n_blocks < 1:
+            raise ValueError(
+                f"Argument 'n_blocks' must be positive, not {n_blocks}"
+            )
+        if buffer < 0:
+            raise ValueError(
+                f"Argument 'buffer' must be non-negative, not {buffer}"
+            )
+        if block_decoder not in self.block_decoders:
+            raise ValueError(f"Argument 'block_decoder' has to be one of "
+                             f"{self.block_decoders}, not {block_decoder}")
+        if n_workers is not None and n_workers < 1:
+            raise ValueError(
+                f"Argument 'n_workers' must be positive, not {n_workers}"
+            )
+
+        self.n_blocks = n_blocks
+        self.buffer = buffer
+        self.axis = axis
+        self.block_decoder = block_decoder
+        self.n_workers = n_workers
+        self.max_bp_iter = max_bp_iter
+        self.osd_order = osd_order
+
+        self._problems = self._get_problems()
+        self._windows = [
+            self._get_windows(problem) for problem in self._problems
+        ]
+
+        # Decoders of each window (and of the whole lattice, built only
+        # when needed) for each error rate.
+        self._decoders: Dict[float, Dict[Tuple, Any]] = dict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.set_error_rate(error_rate)
+
+    @property
+    def params(self) -> dict:
+        return {
+            'n_blocks': self.n_blocks,
+            'buffer': self.buffer,
+            'axis': self.axis,
+            'block_decoder': self.block_decoder,
+            'n_workers': self.n_workers,
+            'max_bp_iter': self.max_bp_iter,
+            'osd_order': self.osd_order
+        }
+
+    def _get_problems(self) -> List[Dict[str, Any]]:
+        """Binary problems H e = s solved by the decoder, with the index
+        in the correction of each column of H."""
+        code = self.code
+        n = code.n
+
+        qubit_coords = np.array(code.qubit_coordinates)[:, self.axis]
+        stab_coords = np.array(code.stabilizer_coordinates)[:, self.axis]
+
+        if code.is_css:
+            # X errors are detected by the Z stabilizers and vice versa.
+            problems = [
+                {
+                    'H': code.Hz.tocsr(),
+                    'rows': np.asarray(code.z_indices),
+                    'out_index': np.arange(n),
+                    'col_coords': qubit_coords,
+                },
+                {
+                    'H': code.Hx.tocsr(),
+                    'rows': np.asarray(code.x_indices),
+                    'out_index': n + np.arange(n),
+                    'col_coords': qubit_coords,
+                },
+            ]
+        else:
+            # The X part of the stabilizers detects Z errors.
+            problems = [{
+                'H': code.stabilizer_matrix.tocsr(),
+                'rows': np.arange(code.n_stabilizers),
+                'out_index': np.concatenate([n + np.arange(n), np.arange(n)]),
+                'col_coords': np.tile(qubit_coords, 2),
+            }]
+
+        for problem in problems:
+            H = (problem['H'] != 0).astype(np.uint8).tocsr()
+            problem['H'] = H
+            problem['row_coords'] = stab_coords[problem['rows']]
+
+            is_graph = np.diff(H.tocsc().indptr).max() <= 2
+            if self.block_decoder == 'matching' and not is_graph:
+                raise ValueError(
+                    "Block decoder 'matching' requires every qubit to be "
+                    "detected by at most two stabilizers of each type"
+                )
+            if self.block_decoder == 'auto':
+                problem['decoder'] = 'matching' if is_graph else 'bposd'
+            else:
+                problem['decoder'] = self.block_decoder
+
+            # Stabilizers of periodic codes wrap around the lattice.
+            col_coords = problem['col_coords'][H.indices]
+            starts = H.indptr[:-1][np.diff(H.indptr) > 0]
+            spans = (
+                np.maximum.reduceat(col_coords, starts)
+                - np.minimum.reduceat(col_coords, starts)
+            )
+            extent = max(problem['row_coords'].max(), col_coords.max()) + 1
+            problem['periodic'] = bool(np.any(spans > extent / 2))
+
+        return problems
+
+    def _get_windows(
+        self, problem: Dict[str, Any]
+    ) -> Dict[str, List[Window]]:
+        """Windows of the slabs and of the seams between them."""
+        row_coords = problem['row_coords']
+        col_coords = problem['col_coords']
+
+        extent = max(row_coords.max(), col_coords.max()) + 1
+        width = extent / self.n_blocks
+        if self.n_blocks > 1 and 2*self.buffer >= width:
+            raise ValueError(
+                f"Argument 'buffer' must be less than half the width of a "
+                f"block ({width/2}), not {self.buffer}"
+            )
+
+        periodic = problem['periodic']
+
+        def offset(coords, start):
+            """Offset of coordinates from `start`, wrapping around the
+            lattice if it is periodic."""
+            if periodic:
+                return (coords - start) % extent
+            return coords - start
+
+        def distance(coords, start, stop):
+            """Distance of coordinates to [start, stop)."""
+            shift = offset(coords, start)
+            inside = (shift >= 0) & (shift < stop - start)
+            outside = np.where(shift < 0, -shift, shift - (stop - start))
+            if periodic:
+                outside = np.minimum(outside, extent - shift)
+            return np.where(inside, 0, outside)
+
+        H = problem['H']
+
+        def get_window(start, stop):
+            # All the columns of the stabilizers of the window are kept, so
+            # that the columns crossing its edge act as a boundary, but
+            # only the columns in [start, stop) are committed.
+            rows = np.flatnonzero(
+                distance(row_coords, start, stop) <= self.buffer
+            )
+            cols = np.unique(H[rows].indices)
+            shift = offset(col_coords[cols], start)
+            commit = (shift >= 0) & (shift < stop - start)
+            return rows, cols, commit
+
+        blocks = [
+            get_window(i*width, (i + 1)*width) for i in range(self.n_blocks)
+        ]
+        seams: List[Window] = []
+        if self.n_blocks > 1:
+            # Without wrap-around, there is no seam at the edge of the
+            # lattice.
+            core = self.buffer / 2
+            seams = [
+                get_window(i*width - core, i*width + core)
+                for i in range(0 if periodic else 1, self.n_blocks)
+            ]
+            if not all(np.any(commit) for _, _, commit in seams):
+                raise ValueError(
+                    f"Argument 'buffer' is too small for the seams to "
+                    f"commit any qubit, not {self.buffer}"
+                )
+
+        return {'blocks': blocks, 'seams': seams}
+
+    def _make_decoder(self, H, out_index: np.ndarray, block_decoder: str):
+        """Decoder of the problem H e = s for the current error rate."""
+        if block_decoder == 'matching':
+            wx, wz = self.error_model.get_weights(self.code, self.error_rate)
+            weights = np.concatenate([wx, wz])[out_index]
+            return Matching(H, spacelike_weights=weights)
+        else:
+            pi, px, py, pz = self.error_model.probability_distribution(
+                self.code, self.error_rate
+            )
+            probs = np.concatenate([px + py, pz + py])[out_index]
+            return bposd_decoder(
+                H,
+                channel_probs=probs,
+                max_iter=self.max_bp_iter,
+                bp_method='msl',
+                ms_scaling_factor=0,
+                osd_method='osd_cs',
+                osd_order=min(self.osd_order, H.shape[1])
+            )
+
+    def set_error_rate(self, error_rate: float):
+        """Reweight the decoders of the windows for another error rate."""
+        super().set_error_rate(error_rate)
+
+        if error_rate not in self._decoders:
+            decoders: Dict[Tuple, Any] = dict()
+            for i_problem, problem in enumerate(self._problems):
+                for stage, windows in self._windows[i_problem].items():
+                    for i_window, (rows, cols, _) in enumerate(windows):
+                        if len(rows) > 0 and len(cols) > 0:
+                            decoders[i_problem, stage, i_window] = (
+                                self._make_decoder(
+                                    problem['H'][rows][:, cols],
+                                    problem['out_index'][cols],
+                                    problem['decoder']
+                                )
+                            )
+            self._decoders[error_rate] = decoders
+
+    def replicate(self, seed: int) -> BaseDecoder:
+        """Copy of the decoder sharing the windows, with its own window
+        decoders and thread pool."""
+        replica = cast(ParallelWindowDecoder, super().replicate(seed))
+        replica._decoders = dict()
+        replica._executor = None
+        replica.set_error_rate(self.error_rate)
+        return replica
+
+    def close(self):
+        """Shut down the threads decoding the windows."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _map(self, function, items):
+        if self.n_workers == 1 or len(items) <= 1:
+            return list(map(function, items))
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.n_workers or os.cpu_count()
+            )
+        return list(self._executor.map(function, items))
+
+    def _decode_stage(
+        self, i_problem: int, stage: str, syndrome: np.ndarray
+    ) -> np.ndarray:
+        """Decode the windows of a stage, and add up the corrections of
+        the columns they commit."""
+        problem = self._problems[i_problem]
+        windows = self._windows[i_problem][stage]
+        decoders = self._decoders[self.error_rate]
+
+        tasks = [
+            (decoders[i_problem, stage, i_window], window)
+            for i_window, window in enumerate(windows)
+            if np.any(syndrome[window[0]])
+        ]
+
+        def decode_window(task):
+            decoder, (rows, cols, commit) = task
+            sub_correction = np.asarray(decoder.decode(syndrome[rows]))
+            return cols[commit], sub_correction[commit]
+
+        correction = np.zeros(problem['H'].shape[1], dtype=np.uint8)
+        for cols, values in self._map(decode_window, tasks):
+            correction[cols] ^= values
+
+        self._decode_stats[f'{stage}_windows'] += len(tasks)
+
+        return correction
+
+    def _decode_globally(
+        self, i_problem: int, syndrome: np.ndarray
+    ) -> np.ndarray:
+        """Decode the syndrome on the whole lattice."""
+        decoders = self._decoders[self.error_rate]
+        key = (i_problem, 'global', 0)
+        if key not in decoders:
+            problem = self._problems[i_problem]
+            decoders[key] = self._make_decoder(
+                problem['H'], problem['out_index'], problem['decoder']
+            )
+        return np.asarray(decoders[key].decode(syndrome), dtype=np.uint8)
+
+    def decode(self, syndrome: np.ndarray, **kwargs) -> np.ndarray:
+        """Get X and Z corrections given code and measured syndrome."""
+
+        syndrome = np.asarray(syndrome, dtype=np.uint8)
+        correction = np.zeros(2*self.code.n, dtype=np.uint)
+        self._decode_stats = {
+            'blocks_windows': 0, 'seams_windows': 0, 'global_decodes': 0
+        }
+
+        for i_problem, problem in enumerate(self._problems):
+            H = problem['H']
+            sub_syndrome = syndrome[problem['rows']]
+            if not np.any(sub_syndrome):
+                continue
+
+            sub_correction = self._decode_stage(
+                i_problem, 'blocks', sub_syndrome
+            )
+            residual = (sub_syndrome + H @ sub_correction) % 2
+
+            if np.any(residual):
+                sub_correction ^= self._decode_stage(
+                    i_problem, 'seams', residual
+                )
+                residual = (sub_syndrome + H @ sub_correction) % 2
+
+            if np.any(residual):
+                sub_correction ^= self._decode_globally(i_problem, residual)
+                self._decode_stats['global_decodes'] += 1
+
+            correction[problem['out_index']] = sub_correction
+
+        return correction
@@ -1,48 +1,11 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from panqec.decoders import BaseDecoder, MatchingDecoder
 from panqec.codes import StabilizerCode, Toric2DCode
 from panqec.decoders import BeliefPropagationOSDDecoder
 from panqec.error_models import PauliErrorModel
 
 
-def get_matched_pairs(H, correction, syndrome):
-    pairs = []
-    seen_syndromes = set([])
-    syndrome_indices = np.nonzero(syndrome)[0]
-
-    for s in syndrome_indices:
-        if s not in seen_syndromes:
-            # print("s", s)
-            seen_syndromes.add(s)
-
-            s_prime = s
-            continue_search = True
-            prev_qubit = -1
-
-            while continue_search:
-                found_new_qubit = False
-                for q in H[s_prime].nonzero()[1]:
-                    # print("q", q)
-                    if correction[q] and q != prev_qubit:
-                        # print("Found new qubit")
-                        found_new_qubit = True
-                        prev_qubit = q
-                        for i in H[:, q].nonzero()[0]:
-                            if i != s_prime:
-                                s_prime = i
-                                break
-
-                        break
-
-                if not found_new_qubit:
-                    continue_search = False
-                    pairs.append((s, s_prime))
-                    seen_syndromes.add(s_prime)
-
-    return pairs
-
-
 def find_connected_components(neighbors):
     connected_components = []
     seen = set()
@@ -199,10 +162,34 @@ class XCubeMatchingDecoder(BaseDecoder):
                            'z': Toric2DCode(Lx, Ly)
                            }
 
+        self.z_decoder = BeliefPropagationOSDDecoder(self.code,
+                                                     self.error_model,
+                                                     self.error_rate)
+
+        # Matching decoders of the 2D toric codes for each error rate.
+        self._matching_decoders: Dict[float, Dict[str, MatchingDecoder]] = {}
+        self.set_error_rate(error_rate)
+
+        self._build_plane_maps()
+
+    def set_error_rate(self, error_rate: float):
+        """Reweight the 2D toric code matching decoders for another
+        error rate."""
+        super().set_error_rate(error_rate)
+        self.z_decoder.set_error_rate(error_rate)
+
+        if error_rate not in self._matching_decoders:
+            self._matching_decoders[error_rate] = self._get_matching_decoders(
+                error_rate
+            )
+        self.matching_decoder = self._matching_decoders[error_rate]
+
+    def _get_matching_decoders(
+        self, error_rate: float
+    ) -> Dict[str, MatchingDecoder]:
         # Weight the 2D toric code matching decoders
         # Only works for Z biased noise and z-axis deformation
-        weights_X, _ = self.error_model.get_weights(self.code,
-                                                    self.error_rate)
+        weights_X, _ = self.error_model.get_weights(self.code, error_rate)
 
         wz = weights_X[self.code.qubit_index[(0, 0, 1)]]
         wxy = weights_X[self.code.qubit_index[(1, 0, 0)]]
@@ -220,16 +207,175 @@ class XCubeMatchingDecoder(BaseDecoder):
                            for _ in self.toric_code['z'].qubit_coordinates]
                           )}
 
-        self.matching_decoder = {axis: MatchingDecoder(self.toric_code[axis],
-                                                       self.error_model,
-                                                       self.error_rate,
-                                                       weights=(weights[axis],
-                                                                weights[axis]))
-                                 for axis in ['x', 'y', 'z']}
+        return {axis: MatchingDecoder(self.toric_code[axis],
+                                      self.error_model,
+                                      error_rate,
+                                      weights=(weights[axis],
+                                               weights[axis]))
+                for axis in ['x', 'y', 'z']}
+
+    def _build_plane_maps(self):
+        """Precompute where each cube stabilizer lands in the 2D toric codes
+        of each projection axis.
+
+        For each axis, `_plane_rows[axis]` and `_plane_faces[axis]` give,
+        for every cube (in the order of `_cube_indices`), the row of its
+        plane (plane coordinate 2*row + 1) and the index of the corresponding
+        face in the 2D toric code.
+        `_face_coordinates[axis]` gives the coordinates of the faces
+        in the order of the rows of the 2D toric code's Hx matrix,
+        which is the order used by the matched pairs.
+        `_qubit_grid[axis]` gives the index of the qubit of the 2D toric
+        code at each coordinate (-1 where there is no qubit).
+        """
+        axis_to_int = {'x': 0, 'y': 1, 'z': 2}
 
-        self.z_decoder = BeliefPropagationOSDDecoder(self.code,
-                                                     self.error_model,
-                                                     self.error_rate)
+        self._cube_indices = np.flatnonzero(self.code.z_indices)
+        cube_coordinates = [
+            self.code.stabilizer_coordinates[i] for i in self._cube_indices
+        ]
+
+        self._plane_rows: Dict[str, np.ndarray] = {}
+        self._plane_faces: Dict[str, np.ndarray] = {}
+        self._face_coordinates: Dict[str, np.ndarray] = {}
+        self._qubit_grid: Dict[str, np.ndarray] = {}
+
+        for axis, axis_int in axis_to_int.items():
+            toric_code = self.toric_code[axis]
+            self._plane_rows[axis] = np.array([
+                (loc[axis_int] - 1) // 2 for loc in cube_coordinates
+            ], dtype=int)
+            self._plane_faces[axis] = np.array([
+                toric_code.stabilizer_index[tuple_remove(loc, axis_int)]
+                for loc in cube_coordinates
+            ], dtype=int)
+            self._face_coordinates[axis] = np.array([
+                toric_code.stabilizer_coordinates[i]
+                for i in np.flatnonzero(toric_code.x_indices)
+            ], dtype=int).reshape(-1, 2)
+            self._qubit_grid[axis] = np.full(
+                2*np.array(toric_code.size), -1, dtype=int
+            )
+            for loc, index in toric_code.qubit_index.items():
+                self._qubit_grid[axis][loc] = index
+
+    def _pair_paths(
+        self, axis: str, rows: np.ndarray, pairs: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Qubits of the 2D toric codes on the paths joining matched faces.
+
+        Each pair is joined by a shortest path going first along the first
+        coordinate and then along the second one. As the weights of the
+        matching are the same for all the qubits along a given direction,
+        it has the same weight as the path found by the matching, and the
+        corrections only differ by stabilizers (or by a logical operator
+        when two faces are exactly half the lattice apart).
+
+        Parameters
+        ----------
+        axis : str
+            Axis orthogonal to the planes, 'x', 'y' or 'z'.
+        rows : np.ndarray
+            Row of the plane of each pair.
+        pairs : np.ndarray
+            Array of shape (n_pairs, 2) of the faces matched together,
+            as rows of the Hx matrix of the 2D toric code.
+
+        Returns
+        -------
+        rows, qubits : Tuple[np.ndarray, np.ndarray]
+            Rows of the planes and indices of the qubits (in the 2D toric
+            code) flipped by the paths.
+        """
+        grid = self._qubit_grid[axis]
+        n = self.toric_code[axis].n
+        period = np.array(grid.shape)
+        start = self._face_coordinates[axis][pairs[:, 0]]
+        stop = self._face_coordinates[axis][pairs[:, 1]]
+
+        # Signed number of steps along each coordinate, going the short way
+        # around the torus.
+        delta = (stop - start) % period
+        delta = np.where(delta > period // 2, delta - period, delta)
+        n_steps = np.abs(delta) // 2
+        sign = np.sign(delta)
+
+        # Qubits crossed along the first coordinate from the start face,
+        # then along the second coordinate at the first coordinate of the
+        # stop face, as indices row*n + qubit.
+        flipped = []
+        for coord in range(2):
+            pair = np.repeat(np.arange(len(pairs)), n_steps[:, coord])
+            first_step = np.cumsum(n_steps[:, coord]) - n_steps[:, coord]
+            step = np.arange(len(pair)) - first_step[pair]
+            path = np.where(coord == 0, start[pair].T, stop[pair].T)
+            path[coord] = (
+                start[pair, coord] + sign[pair, coord]*(2*step + 1)
+            ) % period[coord]
+            flipped.append(rows[pair]*n + grid[path[0], path[1]])
+
+        flips = np.bincount(np.concatenate(flipped))
+        return np.divmod(np.flatnonzero(flips % 2), n)
+
+    def decode_planes(
+        self, cube_syndrome: np.ndarray, axis: str
+    ) -> Tuple[List[Tuple], Dict[int, np.ndarray]]:
+        """Decode all the 2D toric codes orthogonal to a given axis.
+
+        Parameters
+        ----------
+        cube_syndrome : np.ndarray
+            Syndrome of the cube stabilizers, in the order of the
+            `z_indices` of the code.
+        axis : str
+            Axis orthogonal to the planes, 'x', 'y' or 'z'.
+
+        Returns
+        -------
+        matching : List[Tuple]
+            3D locations of the qubits in the matching of all the planes.
+        pairs : Dict[int, np.ndarray]
+            For each plane with a non-trivial syndrome, array of shape
+            (n_pairs, 2) of the faces matched together (as rows of the Hx
+            matrix of the 2D toric code).
+        """
+        axis_int = {'x': 0, 'y': 1, 'z': 2}[axis]
+        toric_code = self.toric_code[axis]
+        decoder = self.matching_decoder[axis]
+        n_planes = self.code.size[axis_int]
+
+        # Fill the syndromes of all planes at once.
+        plane_syndromes = np.zeros(
+            (n_planes, toric_code.n_stabilizers), dtype=np.uint
+        )
+        plane_syndromes[
+            self._plane_rows[axis], self._plane_faces[axis]
+        ] = cube_syndrome
+
+        # Match each plane once, and join the matched faces to get the
+        # correction.
+        nontrivial = np.flatnonzero(plane_syndromes.any(axis=1))
+        pairs = {
+            2*row + 1: decoder.matcher_z.decode_to_matched_dets_array(
+                toric_code.extract_x_syndrome(plane_syndromes[row])
+            )
+            for row in nontrivial
+        }
+        pair_rows = np.repeat(
+            nontrivial, [len(pairs[2*row + 1]) for row in nontrivial]
+        )
+        all_pairs = np.concatenate(
+            [np.zeros((0, 2), dtype=int)] + list(pairs.values())
+        ).astype(int)
+        rows, qubits = self._pair_paths(axis, pair_rows, all_pairs)
+
+        qubit_coordinates = toric_code.qubit_coordinates
+        matching = [
+            tuple_insert(qubit_coordinates[i], axis_int, 2*row + 1)
+            for row, i in zip(rows, qubits)
+        ]
+
+        return matching, pairs
 
     @property
     def params(self) -> dict:
@@ -245,21 +391,19 @@ class XCubeMatchingDecoder(BaseDecoder):
 
         Lx, Ly, Lz = self.code.size
 
-        # print("Initialize plane syndrome")
-        plane_syndrome = {
-            'x': {x: np.zeros(self.toric_code['x'].n_stabilizers)
-                  for x in range(1, 2*Lx, 2)},
-            'y': {y: np.zeros(self.toric_code['y'].n_stabilizers)
-                  for y in range(1, 2*Ly, 2)},
-            'z': {z: np.zeros(self.toric_code['z'].n_stabilizers)
-                  for z in range(1, 2*Lz, 2)}
-        }
-
-        # Remove X stabilizer syndrome and keep it for later
-        x_syndrome = self.code.extract_x_syndrome(syndrome)
-        syndrome[self.code.x_indices] = 0
+        # Keep only the cube syndrome, the rest is decoded later.
+        syndrome = np.asarray(syndrome)
+        cube_syndrome = syndrome[self._cube_indices]
         axis_to_int = {'x': 0, 'y': 1, 'z': 2}
 
+        # Decode all the 2D toric codes
+        xcube_matching: Dict[str, List] = {}
+        toric_pairs: Dict[str, Dict[int, np.ndarray]] = {}
+        for axis in ['x', 'y', 'z']:
+            xcube_matching[axis], toric_pairs[axis] = self.decode_planes(
+                cube_syndrome, axis
+            )
+
         for proj_axis in ['x', 'y', 'z']:
             proj_axis_int = axis_to_int[proj_axis]
 
@@ -267,77 +411,25 @@ class XCubeMatchingDecoder(BaseDecoder):
 
             L_proj = [Lx, Ly, Lz][proj_axis_int]
 
-            for i_stab in range(len(self.code.stabilizer_index)):
-                if syndrome[i_stab]:
-                    loc = self.code.stabilizer_coordinates[i_stab]
-
-                    for axis in ['x', 'y', 'z']:
-                        loc_2d = tuple_remove(loc, axis_to_int[axis])
-                        idx_face = self.toric_code[axis].stabilizer_index[
-                            loc_2d
-                        ]
-                        plane = loc[axis_to_int[axis]]
-                        plane_syndrome[axis][plane][idx_face] = 1
-
-            # Decode all the 2D toric codes
-            xcube_matching: Dict[str, List] = {'x': [], 'y': [], 'z': []}
             connected_planes: Dict[int, set] = {
-                plane: set() for plane in plane_syndrome[proj_axis].keys()
+                plane: set() for plane in range(1, 2*L_proj, 2)
             }
 
-            for axis in ['x', 'y', 'z']:
-                for plane in plane_syndrome[axis].keys():
-                    current_syndrome = plane_syndrome[axis][plane]
-
-                    toric_X_syndrome = self.toric_code[
-                        axis
-                    ].extract_x_syndrome(
-                        current_syndrome
-                    )
-
-                    if np.all(toric_X_syndrome == 0):
-                        continue
-
-                    toric_matching = self.matching_decoder[axis].decode(
-                        current_syndrome
-                    )
-                    n = self.toric_code[axis].n
-                    toric_Z_correction = toric_matching[n:]
-
-                    toric_pairs = get_matched_pairs(
-                        self.toric_code[axis].Hx.todense(),
-                        toric_Z_correction,
-                        toric_X_syndrome
-                    )
-
-                    for i in toric_Z_correction.nonzero()[0]:
-                        x, y = self.toric_code[axis].qubit_coordinates[i]
-                        loc_3d = tuple_insert((x, y), axis_to_int[axis], plane)
-                        xcube_matching[axis].append(loc_3d)
-
-                    if axis != proj_axis:
-                        for pair in toric_pairs:
-                            i1, i2 = pair
-                            loc1 = self.toric_code[axis].qubit_coordinates[i1]
-                            loc2 = self.toric_code[axis].qubit_coordinates[i2]
-
-                            # print("Axis", axis)
-                            # print("Pair", loc1, loc2)
-
-                            proj_component = {'x': {'y': 0, 'z': 0},
-                                              'y': {'x': 0, 'z': 1},
-                                              'z': {'x': 1, 'y': 1}
-                                              }[proj_axis][axis]
-                            plane1 = loc1[proj_component]
-                            plane2 = loc2[proj_component]
-
-                            if plane1 != plane2:
-                                if proj_component == 1:
-                                    connected_planes[plane1+1].add(plane2+1)
-                                    connected_planes[plane2+1].add(plane1+1)
-                                else:
-                                    connected_planes[plane1].add(plane2)
-                                    connected_planes[plane2].add(plane1)
+            for axis in ortho_axes:
+                proj_component = {'x': {'y': 0, 'z': 0},
+                                  'y': {'x': 0, 'z': 1},
+                                  'z': {'x': 1, 'y': 1}
+                                  }[proj_axis][axis]
+                face_planes = self._face_coordinates[axis][:, proj_component]
+
+                for pairs in toric_pairs[axis].values():
+                    for i1, i2 in pairs:
+                        plane1 = int(face_planes[i1])
+                        plane2 = int(face_planes[i2])
+
+                        if plane1 != plane2:
+                            connected_planes[plane1].add(plane2)
+                            connected_planes[plane2].add(plane1)
 
             xcube_matching_proj = xcube_matching[proj_axis]
             xcube_matching_ortho = set((xcube_matching[ortho_axes[0]]
@@ -406,10 +498,10 @@ class XCubeMatchingDecoder(BaseDecoder):
         correction = possible_correction[axis_min_weight]
 
         # Decode Z part with BP-OSD
-        syndrome[self.code.z_indices] = 0
-        syndrome[self.code.x_indices] = x_syndrome
+        x_syndrome = syndrome.copy()
+        x_syndrome[self.code.z_indices] = 0
 
-        z_correction = self.z_decoder.decode(syndrome).astype('uint8')
+        z_correction = self.z_decoder.decode(x_syndrome).astype('uint8')
 
         correction += z_correction
 
@@ -47,6 +47,42 @@ class BaseErrorModel(metaclass=ABCMeta):
             in the binary symplectic format
         """
 
+    def generate_batch(
+        self, code: StabilizerCode, error_rate: float, n_shots: int,
+        rng=None
+    ) -> np.ndarray:
+        """Generate many errors at once.
+
+        The default implementation calls `generate` for each shot.
+        Error models that can sample all the shots together should
+        override it.
+
+        Parameters
+        ----------
+        code : StabilizerCode
+            Errors will be generated on the qubits of the provided code
+        error_rate: float
+            Physical error rate
+        n_shots: int
+            Number of errors to generate
+        rng: numpy.random.Generator
+            Random number generator (default=None resolves to
+            numpy.random.default_rng())
+
+        Returns
+        -------
+        errors : np.ndarray
+            Errors as an array of size (n_shots, 2n) in the binary
+            symplectic format
+        """
+        rng = np.random.default_rng() if rng is None else rng
+
+        errors = np.zeros((n_shots, 2*code.n), dtype=np.uint8)
+        for i_shot in range(n_shots):
+            errors[i_shot] = self.generate(code, error_rate, rng=rng)
+
+        return errors
+
     @abstractmethod
     def probability_distribution(
         self, code: StabilizerCode, error_rate: float
@@ -118,6 +118,30 @@ class PauliErrorModel(BaseErrorModel):
 
         return error
 
+    def generate_batch(
+        self, code: StabilizerCode, error_rate: float, n_shots: int,
+        rng=None
+    ) -> np.ndarray:
+        rng = np.random.default_rng() if rng is None else rng
+
+        p_i, p_x, p_y, p_z = self.probability_distribution(code, error_rate)
+
+        # Same draws and thresholds as `generate` on each qubit of each
+        # shot, so that both give the same errors for the same generator.
+        x = rng.random((n_shots, code.n))
+        cum_i = p_i
+        cum_x = cum_i + p_x
+        cum_y = cum_x + p_y
+        is_x = (x >= cum_i) & (x < cum_x)
+        is_y = (x >= cum_x) & (x < cum_y)
+        is_z = x >= cum_y
+
+        errors = np.zeros((n_shots, 2*code.n), dtype=np.uint8)
+        errors[:, :code.n] = is_x | is_y
+        errors[:, code.n:] = is_y | is_z
+
+        return errors
+
     @functools.lru_cache()
     def probability_distribution(
         self, code: StabilizerCode, error_rate: float
@@ -8,9 +8,15 @@ from ._batch_simulation import (  # noqa
     read_input_dict, run_file,
     expand_input_ranges, count_runs,
 )
+from ._tuning import (  # noqa
+    calibrate_decoder, summarize_calibration, pareto_front,
+    choose_parameters, tune_input_dict, DEFAULT_TUNING_GRIDS
+)
 
 __all__ = [
     'BaseSimulation',
     'DirectSimulation', 'BatchSimulation', 'SplittingSimulation',
     'run_file', 'read_input_json', 'read_input_dict', 'run_once',
+    'calibrate_decoder', 'summarize_calibration', 'pareto_front',
+    'choose_parameters', 'tune_input_dict',
 ]
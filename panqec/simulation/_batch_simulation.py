@@ -291,35 +291,18 @@ class BatchSimulation():
         # )
         # print('n_trials = ', min(sim.n_results for sim in batch_sim))
         for sim, batch_result in zip(self, batch_results):
-            n_logicals = batch_result['k']
-
-            # Small fix for the current situation. TO REMOVE in later versions
-            if n_logicals == -1:
-                n_logicals = 1
-
             batch_result['noise_direction'] = sim.error_model.direction
 
             if self.method == 'direct':
-                if len(sim.results['effective_error']) > 0:
-                    batch_result['p_x'] = np.array(
-                        sim.results['effective_error']
-                    )[:, :n_logicals].any(axis=1).mean()
-                    batch_result['p_x_se'] = np.sqrt(
-                        batch_result['p_x']*(1 - batch_result['p_x'])
-                        / (sim.n_results + 1)
-                    )
-                    batch_result['p_z'] = np.array(
-                        sim.results['effective_error']
-                    )[:, n_logicals:].any(axis=1).mean()
-                    batch_result['p_z_se'] = np.sqrt(
-                        batch_result['p_z']*(1 - batch_result['p_z'])
-                        / (sim.n_results + 1)
-                    )
-                else:
-                    batch_result['p_x'] = np.nan
-                    batch_result['p_x_se'] = np.nan
-                    batch_result['p_z'] = np.nan
-                    batch_result['p_z_se'] = np.nan
+                p_x, p_z = sim.sector_error_rates()
+                batch_result['p_x'] = p_x
+                batch_result['p_x_se'] = np.sqrt(
+                    p_x*(1 - p_x) / (sim.n_results + 1)
+                )
+                batch_result['p_z'] = p_z
+                batch_result['p_z_se'] = np.sqrt(
+                    p_z*(1 - p_z) / (sim.n_results + 1)
+                )
 
         results = batch_results
 
@@ -467,9 +450,8 @@ def _parse_decoder_dict(
     decoder_class = DECODERS[decoder_name]
     decoder_params: dict = {}
     if 'parameters' in decoder_dict:
-        decoder_params = decoder_dict['parameters']
-    else:
-        decoder_params = {}
+        # Copy so that the input dictionary is not polluted with objects.
+        decoder_params = dict(decoder_dict['parameters'])
 
     decoder_params['code'] = code
     decoder_params['error_model'] = error_model
@@ -479,6 +461,48 @@ def _parse_decoder_dict(
     return decoder
 
 
+class DecoderPool:
+    """Decoders shared by all the error rates of a batch.
+
+    A decoder is only built once for each code, error model and decoder
+    dictionary, and it is moved to the other error rates with
+    `BaseDecoder.set_error_rate`, which reweights it instead of rebuilding
+    its graphs.
+    Simulations sharing a decoder move it back to their own error rate
+    before decoding.
+    """
+
+    def __init__(self):
+        self._decoders: Dict[Tuple, BaseDecoder] = dict()
+
+    def __len__(self) -> int:
+        return len(self._decoders)
+
+    def get_decoder(
+        self,
+        decoder_dict: Dict[str, Any],
+        code: StabilizerCode,
+        error_model: BaseErrorModel,
+        error_rate: float
+    ) -> BaseDecoder:
+        """Decoder of the pool set to the given error rate, which is built
+        with `_parse_decoder_dict` the first time it is requested."""
+        key = (
+            id(code), id(error_model),
+            json.dumps(decoder_dict, sort_keys=True, default=str)
+        )
+        if key in self._decoders:
+            decoder = self._decoders[key]
+            decoder.set_error_rate(error_rate)
+        else:
+            decoder = _parse_decoder_dict(
+                decoder_dict, code, error_model, error_rate
+            )
+            self._decoders[key] = decoder
+
+        return decoder
+
+
 def read_input_json(
     input_file: str,
     output_file: str,
@@ -564,18 +588,24 @@ def get_simulations(data: dict, verbose: bool = True) -> List[BaseSimulation]:
         raise ValueError("Invalid data format: does not have 'runs'\
                          or 'ranges' key")
 
+    # Decoders are shared by all the error rates of the same code,
+    # error model and decoder.
+    pool = DecoderPool()
+
     if method == 'direct':
         for code, error_model, decoder_dict, error_rate in instances:
-            decoder = _parse_decoder_dict(decoder_dict, code, error_model,
-                                          error_rate)
+            decoder = pool.get_decoder(decoder_dict, code, error_model,
+                                       error_rate)
 
             simulations.append(DirectSimulation(code, error_model, decoder,
                                                 error_rate, verbose=verbose,
                                                 **method_params))
 
     if method == 'splitting':
-        for code, error_model, decoder_dict in instances:
-            decoders = [_parse_decoder_dict(decoder_dict, code, error_model, p)
+        for code, error_model, decoder_dict in itertools.product(
+            codes, error_models, decoder_range
+        ):
+            decoders = [pool.get_decoder(decoder_dict, code, error_model, p)
                         for p in error_rates]
 
             simulations.append(SplittingSimulation(
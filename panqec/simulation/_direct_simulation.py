@@ -3,11 +3,18 @@ API for running simulations.
 """
 
 import datetime
+import time
+import warnings
 import numpy as np
+from scipy.sparse import csr_matrix, hstack, vstack
 from panqec.codes import StabilizerCode
 from panqec.decoders import BaseDecoder
 from panqec.error_models import BaseErrorModel
 from ..bpauli import get_effective_error
+from ..utils import (
+    histogram_add, pattern_histogram_add, pattern_histogram_arrays,
+    pattern_histogram_merge
+)
 from . import BaseSimulation
 
 
@@ -28,7 +35,9 @@ def run_once(
 
     error = error_model.generate(code, error_rate=error_rate, rng=rng)
     syndrome = code.measure_syndrome(error)
+    start_time = time.perf_counter()
     correction = decoder.decode(syndrome)
+    decode_time = time.perf_counter() - start_time
     total_error = (correction + error) % 2
     effective_error = get_effective_error(
         total_error, code.logicals_x, code.logicals_z
@@ -43,6 +52,8 @@ def run_once(
         'effective_error': effective_error,
         'success': success,
         'codespace': codespace,
+        'decode_time': decode_time,
+        'decoder_stats': decoder.last_decode_stats(),
     }
 
     return results
@@ -87,6 +98,39 @@ class DirectSimulation(BaseSimulation):
         Set False to suppress output.
     rng :
         Set Random number generator if you want to seed it.
+    batch_size : int
+        Number of shots simulated together.
+        With the default of 1, each shot is simulated by `run_once`.
+        Larger blocks generate their errors with
+        `BaseErrorModel.generate_batch` and verify all the corrections
+        with a single sparse product, and are decoded with
+        `BaseDecoder.decode_batch` when the decoder overrides it.
+    compact : bool
+        Set True to only keep the counts of each effective error instead
+        of the outcome of each shot (see Notes).
+
+    Notes
+    -----
+    Besides the outcome of each shot, the results contain streaming
+    histograms (see `panqec.utils.histogram_add`) of the decoding time of
+    each shot and of the statistics reported by
+    `BaseDecoder.last_decode_stats`, under `decoder_stats`.
+    Shots whose decoding went over budget (see `BudgetDecoder`) are
+    counted in `n_budget_exceeded`, and those that failed in
+    `n_budget_exceeded_fail`.
+    When a block is decoded by `decode_batch`, each of its shots is given
+    the mean decoding time of the block, and its statistics reported by
+    `BaseDecoder.last_batch_stats`.
+
+    By default, the effective error, success and presence in the code
+    space of every shot are kept, so the results grow with the number of
+    shots.
+    In compact mode, they are replaced by histograms (see
+    `panqec.utils.pattern_histogram_add`) of the effective errors of the
+    shots that end in the code space, under `effective_error_counts`, and
+    of those that do not, under `codespace_fail_counts`.
+    Their size is at most `4**k`, and the effective errors of codes with
+    more than 8 logical qubits are only counted by sector.
     """
 
     start_time: datetime.datetime
@@ -106,20 +150,40 @@ class DirectSimulation(BaseSimulation):
         error_rate: float,
         compress: bool = True,
         verbose=True,
-        rng=None
+        rng=None,
+        batch_size: int = 1,
+        compact: bool = False
     ):
         super().__init__(
             code, error_model, compress=compress, verbose=verbose, rng=rng
         )
 
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least 1.')
+
         self.decoder = decoder
         self.error_rate = error_rate
+        self.batch_size = batch_size
+        self.compact = compact
+        self._check_matrix = None
 
+        if compact:
+            outcomes: dict = {
+                'effective_error_counts': {},
+                'codespace_fail_counts': {},
+            }
+        else:
+            outcomes = {
+                'effective_error': [],
+                'success': [],
+                'codespace': [],
+            }
         self._results = {
             **self._results,
-            'effective_error': [],
-            'success': [],
-            'codespace': [],
+            **outcomes,
+            'decoder_stats': {},
+            'n_budget_exceeded': 0,
+            'n_budget_exceeded_fail': 0,
         }
         self._inputs = {
             **self._inputs,
@@ -130,37 +194,190 @@ class DirectSimulation(BaseSimulation):
             'error_rate': self.error_rate,
             'method': {
                 'name': 'direct',
-                'parameters': {}
+                'parameters': {'compact': True} if compact else {}
             }
         }
 
     def _run(self, n_runs: int):
         """Run assuming perfect measurement."""
 
+        # The decoder may be shared with simulations at other error rates.
+        if self.decoder.error_rate != self.error_rate:
+            self.decoder.set_error_rate(self.error_rate)
+
+        if self.batch_size > 1:
+            if not (0 <= self.error_rate <= 1):
+                raise ValueError('Error rate must be in [0, 1].')
+            for start in range(0, n_runs, self.batch_size):
+                self._run_batch(min(self.batch_size, n_runs - start))
+            return
+
         for i_run in range(n_runs):
             shot = run_once(
                 self.code, self.error_model, self.decoder,
                 error_rate=self.error_rate,
                 rng=self.rng
             )
-            for key, value in shot.items():
-                if key in self._results.keys():
-                    self._results[key].append(value)
+            self.record_outcomes(
+                shot['effective_error'][np.newaxis],
+                np.array([shot['codespace']]), np.array([shot['success']])
+            )
+            self.record_decoder_stats(
+                {'decode_time': shot['decode_time'], **shot['decoder_stats']}
+            )
+            if shot['decoder_stats'].get('budget_exceeded', 0):
+                self._results['n_budget_exceeded'] += 1
+                self._results['n_budget_exceeded_fail'] += int(
+                    not shot['success']
+                )
 
             self._results['n_runs'] += 1
 
+    @property
+    def check_matrix(self):
+        """Stabilizers and logicals of the code, stacked as
+        `[H; logicals_z; logicals_x]`, with their X and Z blocks swapped so
+        that their product with errors gives their commutation.
+        Computed once and cached.
+        """
+        if self._check_matrix is None:
+            n = self.code.n
+            stacked = vstack([
+                self.code.stabilizer_matrix,
+                csr_matrix(self.code.logicals_z),
+                csr_matrix(self.code.logicals_x)
+            ]).tocsr().astype(np.int32)
+            self._check_matrix = hstack(
+                [stacked[:, n:], stacked[:, :n]]
+            ).tocsr()
+        return self._check_matrix
+
+    def _run_batch(self, n_shots: int):
+        """Simulate a block of shots together."""
+        m = self.code.n_stabilizers
+        check_matrix = self.check_matrix
+
+        errors = self.error_model.generate_batch(
+            self.code, self.error_rate, n_shots, rng=self.rng
+        )
+        syndromes = np.zeros((n_shots, m), dtype=np.uint8)
+        syndromes[:] = (check_matrix[:m] @ errors.T).T % 2
+
+        # Decoders without a batch decoder are still run shot by shot, to
+        # keep the time and statistics of each shot.
+        if type(self.decoder).decode_batch is BaseDecoder.decode_batch:
+            corrections = np.zeros((n_shots, 2*self.code.n), dtype=np.uint8)
+            shot_stats = []
+            for i_shot in range(n_shots):
+                start_time = time.perf_counter()
+                corrections[i_shot] = self.decoder.decode(syndromes[i_shot])
+                decode_time = time.perf_counter() - start_time
+                shot_stats.append({
+                    'decode_time': decode_time,
+                    **self.decoder.last_decode_stats()
+                })
+        else:
+            start_time = time.perf_counter()
+            corrections = self.decoder.decode_batch(syndromes)
+            decode_time = (time.perf_counter() - start_time) / n_shots
+            batch_stats = self.decoder.last_batch_stats()
+            if len(batch_stats) != n_shots:
+                warnings.warn(
+                    f'{self.decoder.id}.decode_batch does not report the '
+                    f'statistics of each shot, only their decoding time '
+                    f'is recorded'
+                )
+                batch_stats = [{} for _ in range(n_shots)]
+            shot_stats = [
+                {'decode_time': decode_time, **stats}
+                for stats in batch_stats
+            ]
+
+        total_errors = ((errors + corrections) % 2).astype(np.uint8)
+        checks = np.zeros((n_shots, check_matrix.shape[0]), dtype=np.uint8)
+        checks[:] = (check_matrix @ total_errors.T).T % 2
+        codespace = ~checks[:, :m].any(axis=1)
+        effective_errors = checks[:, m:]
+        success = codespace & ~effective_errors.any(axis=1)
+
+        self.record_outcomes(effective_errors, codespace, success)
+        for i_shot, stats in enumerate(shot_stats):
+            self.record_decoder_stats(stats)
+            if stats.get('budget_exceeded', 0):
+                self._results['n_budget_exceeded'] += 1
+                self._results['n_budget_exceeded_fail'] += int(
+                    not success[i_shot]
+                )
+
+        self._results['n_runs'] += n_shots
+
+    def record_outcomes(
+        self, effective_errors: np.ndarray, codespace: np.ndarray,
+        success: np.ndarray
+    ):
+        """Add the effective errors, presence in the code space and success
+        of shots to the results."""
+        if self.compact:
+            pattern_histogram_add(
+                self._results['effective_error_counts'],
+                effective_errors[codespace]
+            )
+            pattern_histogram_add(
+                self._results['codespace_fail_counts'],
+                effective_errors[~codespace]
+            )
+        else:
+            self._results['effective_error'].extend(effective_errors)
+            self._results['success'].extend(success.tolist())
+            self._results['codespace'].extend(codespace.tolist())
+
+    def record_decoder_stats(self, stats: dict):
+        """Add the decoding statistics of a shot to their histograms."""
+        histograms = self._results['decoder_stats']
+        for name, value in stats.items():
+            histograms[name] = histogram_add(histograms.get(name, {}), value)
+
+    def sector_error_rates(self):
+        """Rates of shots with an effective error in the X sector and in
+        the Z sector, or nan if there are no shots."""
+        if self.compact:
+            histogram = pattern_histogram_merge(
+                self.results['effective_error_counts'],
+                self.results['codespace_fail_counts']
+            )
+            patterns, counts = pattern_histogram_arrays(histogram)
+        else:
+            patterns = np.array(self.results['effective_error'])
+            counts = np.ones(len(patterns), dtype=int)
+        if counts.sum() == 0:
+            return np.nan, np.nan
+
+        half = patterns.shape[1] // 2
+        p_x = counts[patterns[:, :half].any(axis=1)].sum() / counts.sum()
+        p_z = counts[patterns[:, half:].any(axis=1)].sum() / counts.sum()
+        return p_x, p_z
+
     def get_results(self):
         """Return results as dictionary."""
 
-        success = np.array(self.results['success'])
-        if len(success) > 0:
-            n_fail = np.sum(~success)
+        if self.compact:
+            patterns, counts = pattern_histogram_arrays(
+                self.results['effective_error_counts']
+            )
+            n_success = counts[~patterns.any(axis=1)].sum()
+            n_runs = counts.sum() + sum(
+                self.results['codespace_fail_counts'].values()
+            )
         else:
-            n_fail = 0
+            success = np.array(self.results['success'], dtype=bool)
+            n_success = np.sum(success)
+            n_runs = len(success)
         simulation_data = {
-            'n_success': np.sum(success),
-            'n_fail': n_fail,
-            'n_runs': len(success),
+            'n_success': n_success,
+            'n_fail': n_runs - n_success,
+            'n_runs': n_runs,
+            'n_budget_exceeded': self.results['n_budget_exceeded'],
+            'n_budget_exceeded_fail': self.results['n_budget_exceeded_fail'],
         }
 
         # Use sample mean as estimator for effective error rate.
@@ -107,6 +107,7 @@ class SplittingSimulation(BaseSimulation):
 
             # Check that the chosen error indeed fails
             syndrome = self.code.measure_syndrome(initial_error)
+            self.decoders[0].set_error_rate(self.error_rates[0])
             correction = self.decoders[0].decode(syndrome)
             total_error = (correction + initial_error) % 2
             if self.code.is_success(total_error):
@@ -204,6 +205,10 @@ class SplittingSimulation(BaseSimulation):
 
         if b:
             syndrome = self.code.measure_syndrome(new_error)
+
+            # The decoder may be shared by all the error rates.
+            if decoder.error_rate != error_rate:
+                decoder.set_error_rate(error_rate)
             correction = decoder.decode(syndrome)
             total_error = (correction + new_error) % 2
             if (self.code.is_logical_error(total_error)
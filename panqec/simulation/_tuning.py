@@ -0,0 +1,358 @@
+"""
+API for tuning the parameters of decoders.
+
+Short calibration batches are run for every point of a grid of decoder
+parameters, to find the parameters that reach the lowest logical error
+rate for a given per-shot latency.
+"""
+
+import copy
+import itertools
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from panqec.codes import StabilizerCode
+from panqec.error_models import BaseErrorModel
+from . import DirectSimulation
+from ._batch_simulation import (
+    _parse_all_ranges, _parse_code_dict, _parse_decoder_dict,
+    _parse_error_model_dict
+)
+
+# Grids of parameters explored by default for each decoder.
+DEFAULT_TUNING_GRIDS: Dict[str, Dict[str, List]] = {
+    'BeliefPropagationOSDDecoder': {
+        'max_bp_iter': [10, 100, 1000],
+        'osd_order': [0, 10, 100],
+        'bp_method': ['msl', 'ps'],
+    },
+    'MemoryBeliefPropagationDecoder': {
+        'max_bp_iter': [10, 100, 1000],
+        'alpha': [0.2, 0.4, 0.7, 1.0],
+        'beta': [0, 0.5],
+    },
+}
+
+
+def expand_parameter_grid(grid: Dict[str, List]) -> List[Dict[str, Any]]:
+    """All the combinations of parameters of a grid.
+
+    Examples
+    --------
+    >>> expand_parameter_grid({'osd_order': [0, 10], 'max_bp_iter': [100]})
+    [{'osd_order': 0, 'max_bp_iter': 100}, {'osd_order': 10, 'max_bp_iter': 100}]
+    """  # noqa: E501
+    names = list(grid.keys())
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*[grid[name] for name in names])
+    ]
+
+
+def calibrate_decoder(
+    code: StabilizerCode,
+    error_model: BaseErrorModel,
+    decoder_name: str,
+    parameter_grid: Dict[str, List],
+    error_rates: List[float],
+    n_trials: int = 100,
+    base_parameters: Optional[Dict[str, Any]] = None,
+    rng=None,
+    verbose: bool = False
+) -> pd.DataFrame:
+    """Run a short simulation for every point of a grid of decoder
+    parameters and every error rate.
+
+    Parameters
+    ----------
+    code : StabilizerCode
+        The code to simulate.
+    error_model : BaseErrorModel
+        The error model to use.
+    decoder_name : str
+        Name of a registered decoder, e.g. 'BeliefPropagationOSDDecoder'.
+    parameter_grid : Dict[str, List]
+        Values of each parameter to explore.
+    error_rates : List[float]
+        Error rates at which the decoders are calibrated.
+    n_trials : int
+        Number of shots for each point and error rate.
+    base_parameters : Dict[str, Any], optional
+        Parameters of the decoder that are not explored.
+    rng :
+        Random number generator used by all the simulations.
+    verbose : bool
+        Set True to print the progress.
+
+    Returns
+    -------
+    calibration : pd.DataFrame
+        One row per point of the grid and error rate, with the decoder
+        `parameters`, the `error_rate`, the number of shots `n_trials`
+        and of failures `n_fail`, and the total decoding time
+        `decode_time` of all the shots.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if base_parameters is None:
+        base_parameters = {}
+
+    rows = []
+    for point in expand_parameter_grid(parameter_grid):
+        parameters = {**base_parameters, **point}
+        decoder = _parse_decoder_dict(
+            {'name': decoder_name, 'parameters': parameters},
+            code, error_model, error_rates[0]
+        )
+        for error_rate in error_rates:
+            if verbose:
+                print(f'Calibrating {decoder_name} {parameters} '
+                      f'on {code.label} at p={error_rate}')
+            simulation = DirectSimulation(
+                code, error_model, decoder, error_rate,
+                verbose=False, rng=rng
+            )
+            simulation.run(n_trials)
+            results = simulation.get_results()
+            decode_time = simulation.results['decoder_stats']['decode_time']
+            rows.append({
+                'parameters': parameters,
+                'error_rate': error_rate,
+                'n_trials': results['n_runs'],
+                'n_fail': results['n_fail'],
+                'decode_time': decode_time['sum'],
+            })
+
+    return pd.DataFrame(rows)
+
+
+def summarize_calibration(calibration: pd.DataFrame) -> pd.DataFrame:
+    """Pool the shots of all the error rates (and error models) of each
+    point of the grid.
+
+    Parameters
+    ----------
+    calibration : pd.DataFrame
+        Rows returned by `calibrate_decoder`, possibly concatenated.
+
+    Returns
+    -------
+    summary : pd.DataFrame
+        One row per point of the grid, with its `parameters`, the
+        logical error rate `p_est` and its standard error `p_se`, and the
+        mean decoding time of a shot `latency` (in seconds).
+    """
+    keys = calibration['parameters'].apply(
+        lambda parameters: str(sorted(parameters.items()))
+    )
+    grouped = calibration.assign(key=keys).groupby('key', sort=False)
+    summary = grouped[['n_trials', 'n_fail', 'decode_time']].sum()
+    summary['parameters'] = grouped['parameters'].first()
+    summary['p_est'] = summary['n_fail'] / summary['n_trials']
+    summary['p_se'] = np.sqrt(
+        summary['p_est']*(1 - summary['p_est']) / (summary['n_trials'] + 1)
+    )
+    summary['latency'] = summary['decode_time'] / summary['n_trials']
+    return summary.reset_index(drop=True)[[
+        'parameters', 'n_trials', 'n_fail', 'p_est', 'p_se', 'latency'
+    ]]
+
+
+def pareto_front(summary: pd.DataFrame) -> pd.DataFrame:
+    """Points of the grid that no other point beats on both logical error
+    rate and latency, from the fastest to the slowest.
+
+    Parameters
+    ----------
+    summary : pd.DataFrame
+        Rows returned by `summarize_calibration`.
+
+    Returns
+    -------
+    front : pd.DataFrame
+        The rows of the Pareto front, sorted by increasing latency
+        (and decreasing logical error rate).
+    """
+    ordered = summary.sort_values(['latency', 'p_est'], kind='stable')
+    on_front = []
+    best_p_est = np.inf
+    for index, row in ordered.iterrows():
+        if row['p_est'] < best_p_est:
+            on_front.append(index)
+            best_p_est = row['p_est']
+    return ordered.loc[on_front]
+
+
+def choose_parameters(
+    summary: pd.DataFrame,
+    max_latency: Optional[float] = None,
+    n_sigma: float = 2
+) -> Dict[str, Any]:
+    """Choose the parameters of the decoder on the Pareto front.
+
+    Parameters
+    ----------
+    summary : pd.DataFrame
+        Rows returned by `summarize_calibration`.
+    max_latency : float, optional
+        If given, the parameters with the lowest logical error rate
+        among those with at most this mean decoding time (in seconds)
+        are chosen, or the fastest ones if none is fast enough.
+    n_sigma : float
+        Otherwise, the fastest parameters whose logical error rate is
+        within `n_sigma` standard errors of the lowest one are chosen.
+
+    Returns
+    -------
+    parameters : Dict[str, Any]
+        The chosen parameters.
+    """
+    front = pareto_front(summary)
+
+    if max_latency is not None:
+        fast_enough = front[front['latency'] <= max_latency]
+        if len(fast_enough) == 0:
+            return front.iloc[0]['parameters']
+        return fast_enough.iloc[-1]['parameters']
+
+    best = front.iloc[-1]
+    margin = n_sigma*np.sqrt(best['p_se']**2 + front['p_se']**2)
+    good_enough = front[front['p_est'] <= best['p_est'] + margin]
+    return good_enough.iloc[0]['parameters']
+
+
+def _subsample(values: List[float], n_values: int) -> List[float]:
+    """At most `n_values` values evenly spread over a list."""
+    if len(values) <= n_values:
+        return list(values)
+    indices = np.unique(
+        np.round(np.linspace(0, len(values) - 1, n_values)).astype(int)
+    )
+    return [values[i] for i in indices]
+
+
+def tune_input_dict(
+    data: dict,
+    n_trials: int = 100,
+    parameter_grid: Optional[Dict[str, List]] = None,
+    max_error_rates: int = 3,
+    max_latency: Optional[float] = None,
+    n_sigma: float = 2,
+    rng=None,
+    verbose: bool = True
+) -> dict:
+    """Tune the decoder parameters of an input dict for each code.
+
+    The decoder of each range is calibrated on every code of the range,
+    using all its error models and at most `max_error_rates` of its
+    error rates, and the parameters are chosen with `choose_parameters`.
+    When different codes get different parameters (typically larger
+    codes needing fewer OSD orders than they are given by hand), the
+    range is split into one range per set of parameters.
+    Explicit `runs` have no ranges to calibrate on, so they are kept
+    as they are, and an input with only `runs` is rejected.
+
+    Parameters
+    ----------
+    data : dict
+        Data that has been parsed from an input json file.
+    n_trials : int
+        Number of shots for each point of the grid and error rate.
+    parameter_grid : Dict[str, List], optional
+        Values of each parameter to explore.
+        Defaults to `DEFAULT_TUNING_GRIDS` for the decoder.
+    max_error_rates : int
+        Maximum number of error rates used for the calibration.
+    max_latency : float, optional
+        Maximum mean decoding time of a shot (see `choose_parameters`).
+    n_sigma : float
+        Tolerance on the logical error rate (see `choose_parameters`).
+    rng :
+        Random number generator used by all the simulations.
+    verbose : bool
+        Set False to suppress output.
+
+    Returns
+    -------
+    tuned_data : dict
+        Copy of the input data with the chosen decoder parameters.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    if 'ranges' not in data:
+        raise ValueError(
+            "Only inputs with 'ranges' can be tuned, "
+            "explicit 'runs' fix the decoder parameters of each run"
+        )
+
+    tuned_data = copy.deepcopy(data)
+    ranges = tuned_data['ranges']
+    if not isinstance(ranges, list):
+        ranges = [ranges]
+
+    tuned_ranges = []
+    for sub_ranges in ranges:
+        decoder_name = sub_ranges['decoder']['name']
+        grid = parameter_grid
+        if grid is None:
+            if decoder_name not in DEFAULT_TUNING_GRIDS:
+                raise ValueError(
+                    f'No default parameter grid for {decoder_name}, '
+                    f'please give one'
+                )
+            grid = DEFAULT_TUNING_GRIDS[decoder_name]
+
+        base_parameters = sub_ranges['decoder'].get('parameters', {})
+        if not isinstance(base_parameters, dict):
+            base_parameters = {}
+
+        code_range, noise_range, _, error_rates = _parse_all_ranges(
+            sub_ranges
+        )
+        error_models = [
+            _parse_error_model_dict(noise_dict) for noise_dict in noise_range
+        ]
+        error_rates = _subsample(error_rates, max_error_rates)
+
+        # Codes grouped by their chosen parameters.
+        chosen: Dict[str, Dict[str, Any]] = dict()
+        for code_dict in code_range:
+            code = _parse_code_dict(code_dict)
+            calibration = pd.concat([
+                calibrate_decoder(
+                    code, error_model, decoder_name, grid, error_rates,
+                    n_trials=n_trials, base_parameters=base_parameters,
+                    rng=rng
+                )
+                for error_model in error_models
+            ])
+            summary = summarize_calibration(calibration)
+            parameters = choose_parameters(
+                summary, max_latency=max_latency, n_sigma=n_sigma
+            )
+
+            if verbose:
+                print(f'Pareto front of {decoder_name} on {code.label}:')
+                print(pareto_front(summary).to_string(index=False))
+                print(f'Chosen parameters: {parameters}')
+
+            key = str(sorted(parameters.items()))
+            group = chosen.setdefault(
+                key, {'parameters': parameters, 'codes': []}
+            )
+            group['codes'].append(code_dict['parameters'])
+
+        for group in chosen.values():
+            tuned = copy.deepcopy(sub_ranges)
+            if len(chosen) > 1:
+                tuned['code']['parameters'] = group['codes']
+            tuned['decoder']['parameters'] = group['parameters']
+            tuned_ranges.append(tuned)
+
+    if isinstance(tuned_data['ranges'], list) or len(tuned_ranges) > 1:
+        tuned_data['ranges'] = tuned_ranges
+    else:
+        tuned_data['ranges'] = tuned_ranges[0]
+
+    return tuned_data
@@ -406,3 +406,175 @@ def get_label(name: str, parameters: Dict[str, Any]) -> str:
         parameter_labels.append(f'{key}={formatted_value}')
     label = name + '(' + ', '.join(parameter_labels) + ')'
     return label
+
+
+# Resolution of the logarithmic bins of streaming histograms.
+HISTOGRAM_BINS_PER_DECADE = 10
+
+
+def histogram_add(histogram: Dict[str, Any], value: float) -> Dict[str, Any]:
+    """Add a value to a streaming histogram, in place.
+
+    The histogram is a JSON-serializable dictionary with the number of
+    values, their sum and maximum, and the counts of logarithmic bins
+    (`HISTOGRAM_BINS_PER_DECADE` per decade, plus a bin 'zero' for
+    non-positive values), so that its size does not grow with the number
+    of values.
+
+    Parameters
+    ----------
+    histogram : Dict[str, Any]
+        The histogram, which can be empty.
+    value : float
+        The value to add.
+
+    Returns
+    -------
+    histogram : Dict[str, Any]
+        The updated histogram.
+
+    Examples
+    --------
+    >>> histogram = {}
+    >>> for value in [0, 1, 1, 100]:
+    ...     histogram = histogram_add(histogram, value)
+    >>> histogram['bins']
+    {'zero': 1, '0': 2, '20': 1}
+    """
+    value = float(value)
+    if value > 0:
+        key = str(int(np.floor(HISTOGRAM_BINS_PER_DECADE*np.log10(value))))
+    else:
+        key = 'zero'
+
+    histogram.setdefault('count', 0)
+    histogram.setdefault('sum', 0.0)
+    histogram.setdefault('bins', {})
+    histogram['count'] += 1
+    histogram['sum'] += value
+    histogram['max'] = max(histogram.get('max', value), value)
+    histogram['bins'][key] = histogram['bins'].get(key, 0) + 1
+
+    return histogram
+
+
+def histogram_merge(*histograms: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge streaming histograms made with `histogram_add`."""
+    merged: Dict[str, Any] = {}
+    for histogram in histograms:
+        if not histogram:
+            continue
+        merged['count'] = merged.get('count', 0) + histogram['count']
+        merged['sum'] = merged.get('sum', 0.0) + histogram['sum']
+        merged['max'] = max(merged.get('max', histogram['max']),
+                            histogram['max'])
+        bins = merged.setdefault('bins', {})
+        for key, count in histogram['bins'].items():
+            bins[key] = bins.get(key, 0) + count
+    return merged
+
+
+def histogram_quantile(histogram: Dict[str, Any], q: float) -> float:
+    """Estimate a quantile of a streaming histogram.
+
+    The lower edge of the bin containing the quantile is returned (capped
+    by the maximum), so the estimate is within a factor
+    `10**(1/HISTOGRAM_BINS_PER_DECADE)` below the true quantile.
+    Returns nan for an empty histogram.
+    """
+    if not histogram or histogram['count'] == 0:
+        return np.nan
+
+    keys = sorted(
+        histogram['bins'].keys(),
+        key=lambda key: -np.inf if key == 'zero' else int(key)
+    )
+    counts = np.cumsum([histogram['bins'][key] for key in keys])
+    key = keys[int(np.searchsorted(counts, q*histogram['count']))
+               if q > 0 else 0]
+    if key == 'zero':
+        return 0.0
+    return float(min(
+        10**(int(key)/HISTOGRAM_BINS_PER_DECADE), histogram['max']
+    ))
+
+
+# Longest binary patterns kept whole in pattern histograms.
+PATTERN_HISTOGRAM_MAX_BITS = 16
+
+
+def pattern_histogram_add(
+    histogram: Dict[str, int], patterns: np.ndarray,
+    max_bits: int = PATTERN_HISTOGRAM_MAX_BITS
+) -> Dict[str, int]:
+    """Count binary patterns, such as effective errors, in place.
+
+    The histogram is a JSON-serializable dictionary whose keys are the
+    patterns written as strings of 0 and 1, and whose values are their
+    counts.
+    Patterns of more than `max_bits` bits (e.g. the effective errors of
+    codes with many logical qubits, which have up to `4**k` values) are
+    reduced to two bits, telling whether each of their halves (the X and
+    Z sectors of an effective error) is non-zero.
+
+    Parameters
+    ----------
+    histogram : Dict[str, int]
+        The histogram, which can be empty.
+    patterns : np.ndarray
+        Array of size (n_patterns, n_bits) of the patterns to add.
+    max_bits : int
+        Maximum number of bits of patterns counted as they are.
+
+    Returns
+    -------
+    histogram : Dict[str, int]
+        The updated histogram.
+
+    Examples
+    --------
+    >>> pattern_histogram_add({}, np.array([[0, 1], [0, 0], [0, 1]]))
+    {'00': 1, '01': 2}
+    """
+    patterns = np.asarray(patterns, dtype=np.uint8)
+    if len(patterns) == 0:
+        return histogram
+
+    if patterns.shape[1] > max_bits:
+        half = patterns.shape[1] // 2
+        patterns = np.array([
+            patterns[:, :half].any(axis=1), patterns[:, half:].any(axis=1)
+        ], dtype=np.uint8).T
+
+    unique_patterns, counts = np.unique(
+        patterns, axis=0, return_counts=True
+    )
+    for pattern, count in zip(unique_patterns, counts):
+        key = ''.join(str(bit) for bit in pattern)
+        histogram[key] = histogram.get(key, 0) + int(count)
+    return histogram
+
+
+def pattern_histogram_merge(*histograms: Dict[str, int]) -> Dict[str, int]:
+    """Merge pattern histograms made with `pattern_histogram_add`."""
+    merged: Dict[str, int] = {}
+    for histogram in histograms:
+        if not isinstance(histogram, dict):
+            continue
+        for key, count in histogram.items():
+            merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def pattern_histogram_arrays(histogram: Dict[str, int]):
+    """Patterns and counts of a histogram made with `pattern_histogram_add`,
+    as an array of size (n_patterns, n_bits) and an array of size
+    n_patterns.
+    """
+    keys = list(histogram.keys())
+    n_bits = len(keys[0]) if keys else 0
+    patterns = np.array(
+        [[int(bit) for bit in key] for key in keys], dtype=np.uint8
+    ).reshape(len(keys), n_bits)
+    counts = np.array([histogram[key] for key in keys], dtype=int)
+    return patterns, counts
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from panqec.codes import Toric3DCode
 from panqec.decoders import BeliefPropagationOSDDecoder
 from tests.decoders.decoder_test import DecoderTest
@@ -14,3 +15,115 @@ class TestBeliefPropagationOSDDecoder(DecoderTest):
     def decoder(self, code, error_model):
         error_rate = 0.1
         return BeliefPropagationOSDDecoder(code, error_model, error_rate)
+
+    def test_update_probabilities(self, decoder):
+        correction = np.array([1, 0, 1, 0])
+        px = np.array([0.1, 0.2, 0.1, 0.3])
+        py = np.array([0.05, 0, 0.1, 0.1])
+        pz = np.array([0.2, 0, 0.3, 0.1])
+
+        new_x_probs = decoder.update_probabilities(
+            correction, px, py, pz, direction="z->x"
+        )
+        assert np.allclose(new_x_probs, [0.05/0.25, 0.2, 0.1/0.4, 0.3/0.8])
+
+        new_z_probs = decoder.update_probabilities(
+            correction, px, py, pz, direction="x->z"
+        )
+        assert np.allclose(new_z_probs, [0.05/0.15, 0, 0.1/0.2, 0.1/0.6])
+
+        with pytest.raises(ValueError):
+            decoder.update_probabilities(
+                correction, px, py, pz, direction="fake"
+            )
+
+    def test_channel_only_reloaded_when_changed(self, code, decoder):
+        syndrome = np.zeros(code.n_stabilizers, dtype=np.uint)
+        decoder.decode(syndrome)
+        channel = decoder._channel
+
+        decoder.decode(syndrome)
+        assert decoder._channel is channel
+
+        decoder.error_rate = 0.2
+        decoder.decode(syndrome)
+        assert decoder._channel is not channel
+        assert np.allclose(
+            decoder.x_decoder.channel_probs, decoder._channel['x']
+        )
+
+
+class TestBeliefPropagationOSDDecoderChannelUpdate(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric3DCode(3)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        error_rate = 0.1
+        return BeliefPropagationOSDDecoder(
+            code, error_model, error_rate, channel_update=True
+        )
+
+    def test_x_channel_reset_after_update(self, code, decoder):
+        error = np.zeros(2*code.n, dtype='uint8')
+        error[code.n] = 1
+        decoder.decode(code.measure_syndrome(error))
+        assert decoder._x_channel_modified
+
+        decoder.update_channel()
+        assert not decoder._x_channel_modified
+        assert np.allclose(
+            decoder.x_decoder.channel_probs, decoder._channel['x']
+        )
+
+
+class TestBeliefPropagationOSDDecoderConcurrent(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric3DCode(3)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        error_rate = 0.1
+        return BeliefPropagationOSDDecoder(
+            code, error_model, error_rate, concurrent=True
+        )
+
+    def test_same_correction_as_sequential(self, code, error_model, decoder):
+        sequential = BeliefPropagationOSDDecoder(code, error_model, 0.1)
+        rng = np.random.default_rng(0)
+        for _ in range(5):
+            error = error_model.generate(code, error_rate=0.05, rng=rng)
+            syndrome = code.measure_syndrome(error)
+            assert np.all(
+                decoder.decode(syndrome) == sequential.decode(syndrome)
+            )
+            assert (
+                decoder.last_decode_stats() == sequential.last_decode_stats()
+            )
+
+    def test_concurrent_not_in_params(self, decoder):
+        assert 'concurrent' not in decoder.params
+
+    def test_close_shuts_down_thread(self, code, error_model, decoder):
+        syndrome = code.measure_syndrome(
+            error_model.generate(code, error_rate=0.05)
+        )
+        decoder.decode(syndrome)
+        assert decoder._executor is not None
+        decoder.close()
+        assert decoder._executor is None
+
+        # The thread is started again if the decoder is reused.
+        decoder.decode(syndrome)
+        assert decoder._executor is not None
+        decoder.close()
+
+    def test_channel_update_is_sequential(self, code, error_model):
+        with pytest.raises(ValueError):
+            BeliefPropagationOSDDecoder(
+                code, error_model, 0.1, channel_update=True, concurrent=True
+            )
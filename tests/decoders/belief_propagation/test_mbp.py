@@ -1,6 +1,12 @@
 import pytest
-from panqec.codes import Toric2DCode
+import numpy as np
+from scipy.sparse import csr_matrix
+from panqec.codes import Toric2DCode, Color666PlanarCode
 from panqec.decoders import MemoryBeliefPropagationDecoder
+from panqec.error_models import PauliErrorModel
+from panqec.decoders.belief_propagation.mbp_decoder import (
+    symplectic_to_pauli, pauli_to_symplectic, segment_min_excluding_self
+)
 from tests.decoders.decoder_test import DecoderTest
 
 
@@ -14,3 +20,167 @@ class TestMemoryBeliefPropagationDecoder(DecoderTest):
     def decoder(self, code, error_model):
         error_rate = 0.1
         return MemoryBeliefPropagationDecoder(code, error_model, error_rate)
+
+    def test_messages_stored_on_edges(self, code, decoder):
+        n_edges = decoder.H_pauli.nnz
+        assert decoder.edge_stabs.shape == (n_edges,)
+        assert decoder.edge_qubits.shape == (n_edges,)
+        assert decoder.anticommute.shape == (3, n_edges)
+
+    def test_pauli_syndrome_matches_code(self, code, decoder):
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            error = rng.integers(0, 4, size=code.n)
+            syndrome = code.measure_syndrome(pauli_to_symplectic(error))
+            assert np.all(decoder.pauli_syndrome(error) == syndrome)
+
+
+class TestScheduleMemoryBeliefPropagationDecoder(DecoderTest):
+
+    @pytest.fixture(params=['layered', 'serial', 'parallel'])
+    def schedule(self, request):
+        return request.param
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(4)
+
+    @pytest.fixture
+    def decoder(self, code, error_model, schedule):
+        error_rate = 0.1
+        return MemoryBeliefPropagationDecoder(
+            code, error_model, error_rate, schedule=schedule
+        )
+
+    def test_schedule_in_params(self, decoder, schedule):
+        assert decoder.params['schedule'] == schedule
+
+    def test_layers_share_no_stabilizer(self, code, decoder):
+        qubits = np.concatenate([layer['qubits'] for layer in decoder.layers])
+        assert np.all(np.sort(qubits) == np.arange(code.n))
+        if decoder.schedule == 'parallel':
+            return
+        for layer in decoder.layers:
+            stabs = decoder.edge_stabs[layer['edges']]
+            assert len(np.unique(stabs)) == len(stabs)
+
+
+class TestMinSumMemoryBeliefPropagationDecoder(DecoderTest):
+
+    @pytest.fixture(params=['normalized_min_sum', 'offset_min_sum'])
+    def bp_method(self, request):
+        return request.param
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(4)
+
+    @pytest.fixture
+    def decoder(self, code, error_model, bp_method):
+        error_rate = 0.1
+        return MemoryBeliefPropagationDecoder(
+            code, error_model, error_rate, bp_method=bp_method
+        )
+
+    def test_bp_method_in_params(self, decoder, bp_method):
+        assert decoder.params['bp_method'] == bp_method
+
+
+def test_invalid_bp_method():
+    code = Toric2DCode(3)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    with pytest.raises(ValueError):
+        MemoryBeliefPropagationDecoder(
+            code, error_model, 0.1, bp_method='fake'
+        )
+
+
+def test_invalid_schedule():
+    code = Toric2DCode(3)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    with pytest.raises(ValueError):
+        MemoryBeliefPropagationDecoder(
+            code, error_model, 0.1, schedule='fake'
+        )
+
+
+@pytest.mark.parametrize('schedule', ['layered', 'serial'])
+def test_layers_match_one_qubit_at_a_time(schedule):
+    code = Color666PlanarCode(3)
+    error_model = PauliErrorModel(0.2, 0.3, 0.5)
+    decoder = MemoryBeliefPropagationDecoder(
+        code, error_model, 0.05, schedule=schedule
+    )
+    rng = np.random.default_rng(0)
+    errors = error_model.generate_batch(code, 0.05, 50, rng=rng)
+    syndromes = np.array([code.measure_syndrome(error) for error in errors])
+    corrections = decoder.decode_batch(syndromes)
+
+    # Same updates done one qubit after the other, in the schedule order.
+    order = np.concatenate([layer['qubits'] for layer in decoder.layers])
+    decoder.layers = [decoder.get_layer(np.array([q])) for q in order]
+    assert np.allclose(corrections, decoder.decode_batch(syndromes))
+
+
+def test_serial_schedules_converge_on_color_code():
+    code = Color666PlanarCode(3)
+    error_model = PauliErrorModel(0.2, 0.3, 0.5)
+    error_rate = 0.05
+    rng = np.random.default_rng(0)
+    errors = error_model.generate_batch(code, error_rate, 200, rng=rng)
+    syndromes = np.array([code.measure_syndrome(error) for error in errors])
+
+    n_converged = {}
+    n_success = {}
+    for schedule in ['layered', 'serial', 'parallel']:
+        decoder = MemoryBeliefPropagationDecoder(
+            code, error_model, error_rate, max_bp_iter=100,
+            schedule=schedule
+        )
+        corrections = decoder.decode_batch(syndromes)
+        n_converged[schedule] = sum(
+            np.all(code.measure_syndrome(correction) == syndrome)
+            for correction, syndrome in zip(corrections, syndromes)
+        )
+        n_success[schedule] = sum(
+            code.is_success((correction + error) % 2)
+            for correction, error in zip(corrections, errors)
+        )
+
+    # The previous decoder, looping over the qubits one by one, converged
+    # on 196 and succeeded on 184 of these 200 shots.
+    for schedule in ['layered', 'serial']:
+        assert n_converged[schedule] >= 190
+        assert n_success[schedule] >= 180
+        assert n_converged[schedule] > n_converged['parallel']
+
+
+def test_segment_min_excluding_self():
+    values = np.array([[3., 1., 2., 5., 4., 4.]])
+    starts = np.array([0, 3])
+    segments = np.array([0, 0, 0, 1, 1, 1])
+    minima = segment_min_excluding_self(values, starts, segments)
+    assert np.all(minima == [[1., 2., 1., 4., 4., 4.]])
+
+
+def test_symplectic_to_pauli():
+    H = csr_matrix(np.array([[1, 1, 0, 1], [1, 0, 1, 1]]))
+    H_pauli = symplectic_to_pauli(H)
+    assert np.all(H_pauli.toarray() == [[1, 2], [2, 3]])
+
+
+def test_decode_batch_matches_decode():
+    code = Toric2DCode(4)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = MemoryBeliefPropagationDecoder(code, error_model, 0.1)
+    rng = np.random.default_rng(0)
+
+    errors = np.array([
+        error_model.generate(code, 0.1, rng=rng) for _ in range(20)
+    ])
+    syndromes = np.array([code.measure_syndrome(error) for error in errors])
+
+    corrections = decoder.decode_batch(syndromes)
+    assert corrections.shape == (20, 2*code.n)
+    for syndrome, correction in zip(syndromes, corrections):
+        assert np.all(correction == decoder.decode(syndrome))
@@ -0,0 +1,175 @@
+import threading
+import time
+import pytest
+import numpy as np
+from panqec.codes import Toric2DCode
+from panqec.decoders import (
+    BaseDecoder, BudgetDecoder, MatchingDecoder, BeliefPropagationOSDDecoder,
+    ThreadPoolDecoder
+)
+from panqec.error_models import PauliErrorModel
+from panqec.simulation import DirectSimulation
+from tests.decoders.decoder_test import DecoderTest
+
+
+class SlowDecoder(BaseDecoder):
+    """Decoder spending a given time in Python code before matching."""
+
+    label = 'Slow'
+    allowed_codes = None
+
+    def __init__(self, code, error_model, error_rate, delay=1.0):
+        super().__init__(code, error_model, error_rate)
+        self.delay = delay
+        self.matcher = MatchingDecoder(code, error_model, error_rate)
+
+    @property
+    def params(self):
+        return {'delay': self.delay}
+
+    def decode(self, syndrome, **kwargs):
+        start_time = time.perf_counter()
+        while time.perf_counter() - start_time < self.delay:
+            pass
+        return self.matcher.decode(syndrome)
+
+
+@pytest.fixture
+def error():
+    return Toric2DCode(4).to_bsf({(1, 0): 'X'})
+
+
+class TestBudgetDecoder(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(4)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        error_rate = 0.1
+        return BudgetDecoder(
+            code, error_model, error_rate,
+            {'name': 'BeliefPropagationOSDDecoder'},
+            max_time=10, fallback={'name': 'MatchingDecoder'}
+        )
+
+    def test_within_budget(self, code, decoder, error):
+        correction = decoder.decode(code.measure_syndrome(error))
+        assert code.is_success((correction + error) % 2)
+        stats = decoder.last_decode_stats()
+        assert stats['budget_exceeded'] == 0
+        assert 'bp_iterations' in stats
+        assert decoder.n_budget_exceeded == 0
+
+    def test_params_reinstantiate_decoder(self, code, error_model, decoder):
+        params = decoder.params
+        assert params['fallback']['name'] == 'MatchingDecoder'
+        new_decoder = BudgetDecoder(code, error_model, 0.1, **params)
+        assert isinstance(new_decoder.decoder, BeliefPropagationOSDDecoder)
+        assert isinstance(new_decoder.fallback, MatchingDecoder)
+        assert new_decoder.params == params
+
+    def test_invalid_max_time(self, code, error_model):
+        with pytest.raises(ValueError):
+            BudgetDecoder(
+                code, error_model, 0.1, {'name': 'MatchingDecoder'},
+                max_time=0
+            )
+
+
+@pytest.mark.parametrize('interrupt', [True, False])
+def test_slow_decoder_uses_fallback(error, interrupt):
+    code = Toric2DCode(4)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    slow = SlowDecoder(code, error_model, 0.1, delay=0.2)
+    decoder = BudgetDecoder(
+        code, error_model, 0.1, slow, max_time=0.01,
+        fallback=MatchingDecoder(code, error_model, 0.1), interrupt=interrupt
+    )
+
+    start_time = time.perf_counter()
+    correction = decoder.decode(code.measure_syndrome(error))
+    elapsed = time.perf_counter() - start_time
+
+    assert code.is_success((correction + error) % 2)
+    assert decoder.last_decode_stats()['budget_exceeded'] == 1
+    assert decoder.n_budget_exceeded == 1
+    if interrupt:
+        assert elapsed < 0.2
+
+
+def test_time_budget_off_main_thread(error):
+    code = Toric2DCode(4)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    slow = SlowDecoder(code, error_model, 0.1, delay=0.05)
+    decoder = BudgetDecoder(
+        code, error_model, 0.1, slow, max_time=0.01,
+        fallback=MatchingDecoder(code, error_model, 0.1), interrupt=True
+    )
+
+    # Timer signals cannot be set outside the main thread, so the decoder
+    # runs to the end and is only then found over budget.
+    results = {}
+
+    def run():
+        results['can_interrupt'] = decoder._can_interrupt()
+        results['correction'] = decoder.decode(code.measure_syndrome(error))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+
+    assert not results['can_interrupt']
+    assert code.is_success((results['correction'] + error) % 2)
+    assert decoder.last_decode_stats()['budget_exceeded'] == 1
+
+
+def test_iteration_budget_in_thread_pool(error):
+    code = Toric2DCode(4)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    budget = BudgetDecoder(
+        code, error_model, 0.1, {'name': 'BeliefPropagationOSDDecoder'},
+        max_time=10, max_stats={'bp_iterations': 0}
+    )
+    syndrome = code.measure_syndrome(error)
+    with ThreadPoolDecoder(
+        code, error_model, 0.1, budget, n_workers=2
+    ) as decoder:
+        corrections = decoder.decode_batch(np.array([syndrome]*4))
+    assert np.all(corrections == 0)
+
+
+def test_iteration_budget_fails_fast(error):
+    code = Toric2DCode(4)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = BudgetDecoder(
+        code, error_model, 0.1, {'name': 'BeliefPropagationOSDDecoder'},
+        max_stats={'bp_iterations': 0}
+    )
+    correction = decoder.decode(code.measure_syndrome(error))
+    assert np.all(correction == 0)
+    assert decoder.last_decode_stats() == {'budget_exceeded': 1}
+
+
+def test_simulation_counts_shots_over_budget():
+    code = Toric2DCode(4)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = BudgetDecoder(
+        code, error_model, 0.2, {'name': 'BeliefPropagationOSDDecoder'},
+        max_stats={'bp_iterations': 0}
+    )
+    simulation = DirectSimulation(
+        code, error_model, decoder, 0.2, verbose=False
+    )
+    simulation.run(10)
+    results = simulation.get_results()
+
+    # Every shot with a non-trivial syndrome fails fast.
+    n_exceeded = results['n_budget_exceeded']
+    assert n_exceeded > 0
+    assert results['n_budget_exceeded_fail'] == n_exceeded
+    assert results['n_fail'] >= n_exceeded
+    assert simulation.results['decoder_stats']['budget_exceeded']['sum'] == (
+        n_exceeded
+    )
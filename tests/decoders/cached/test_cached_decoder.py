@@ -0,0 +1,143 @@
+import pytest
+import numpy as np
+from panqec.codes import Toric2DCode
+from panqec.decoders import CachedDecoder, MatchingDecoder
+from panqec.simulation import read_input_dict
+from tests.decoders.decoder_test import DecoderTest
+
+
+class TestCachedDecoder(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(4)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        error_rate = 0.1
+        matcher = MatchingDecoder(code, error_model, error_rate)
+        return CachedDecoder(code, error_model, error_rate, matcher)
+
+    def test_trivial_syndrome_is_not_cached(self, code, decoder):
+        syndrome = np.zeros(code.n_stabilizers, dtype=np.uint)
+        decoder.decode(syndrome)
+        decoder.decode(syndrome)
+        info = decoder.cache_info()
+        assert info['trivial'] == 2
+        assert info['hits'] == 0
+        assert info['misses'] == 0
+        assert info['size'] == 0
+
+    def test_repeated_syndrome_is_a_hit(self, code, decoder):
+        error = np.zeros(2*code.n, dtype='uint8')
+        error[0] = 1
+        syndrome = code.measure_syndrome(error)
+
+        correction_1 = decoder.decode(syndrome)
+        correction_2 = decoder.decode(syndrome)
+
+        assert np.all(correction_1 == correction_2)
+        assert decoder.n_misses == 1
+        assert decoder.n_hits == 1
+        assert code.is_success((correction_2 + error) % 2)
+
+        # Modifying the returned correction must not corrupt the cache.
+        correction_2[:] = 0
+        assert np.all(decoder.decode(syndrome) == correction_1)
+
+        decoder.cache_clear()
+        assert decoder.cache_info()['size'] == 0
+        assert decoder.n_hits == 0
+
+    def test_replica_has_own_cache(self, code, decoder):
+        error = np.zeros(2*code.n, dtype='uint8')
+        error[0] = 1
+        syndrome = code.measure_syndrome(error)
+        decoder.decode(syndrome)
+
+        replica = decoder.replicate(1)
+        assert replica.cache_info()['size'] == 0
+        replica.decode(syndrome)
+        assert replica.n_misses == 1
+        assert decoder.cache_info()['size'] == 1
+        assert decoder.n_misses == 1
+
+    def test_each_error_rate_has_its_own_cache(self, code, decoder):
+        error = np.zeros(2*code.n, dtype='uint8')
+        error[0] = 1
+        syndrome = code.measure_syndrome(error)
+
+        decoder.decode(syndrome)
+        decoder.set_error_rate(0.2)
+        assert decoder.decoder.error_rate == 0.2
+        decoder.decode(syndrome)
+        assert decoder.n_misses == 2
+
+        decoder.set_error_rate(0.1)
+        decoder.decode(syndrome)
+        assert decoder.n_hits == 1
+
+    def test_least_recently_used_is_evicted(self, code, error_model):
+        matcher = MatchingDecoder(code, error_model, 0.1)
+        decoder = CachedDecoder(code, error_model, 0.1, matcher, max_size=2)
+
+        syndromes = []
+        for i in range(3):
+            error = np.zeros(2*code.n, dtype='uint8')
+            error[i] = 1
+            syndromes.append(code.measure_syndrome(error))
+
+        decoder.decode(syndromes[0])
+        decoder.decode(syndromes[1])
+        decoder.decode(syndromes[0])
+        decoder.decode(syndromes[2])
+        assert decoder.cache_info()['size'] == 2
+
+        # Syndrome 1 was the least recently used, so it was evicted.
+        decoder.decode(syndromes[0])
+        decoder.decode(syndromes[1])
+        assert decoder.n_hits == 2
+        assert decoder.n_misses == 4
+
+    def test_params_reinstantiate_decoder(self, code, error_model, decoder):
+        params = decoder.params
+        assert params['decoder']['name'] == 'MatchingDecoder'
+        new_decoder = CachedDecoder(code, error_model, 0.1, **params)
+        assert isinstance(new_decoder.decoder, MatchingDecoder)
+        assert new_decoder.params == params
+
+
+def test_cached_decoder_from_input_dict(tmpdir):
+    input_data = {
+        'ranges': {
+            'label': 'cached',
+            'code': {
+                'name': 'Toric2DCode',
+                'parameters': [{'L_x': 3}]
+            },
+            'error_model': {
+                'name': 'PauliErrorModel',
+                'parameters': [{'r_x': 1/3, 'r_y': 1/3, 'r_z': 1/3}]
+            },
+            'decoder': {
+                'name': 'CachedDecoder',
+                'parameters': {
+                    'decoder': {
+                        'name': 'MatchingDecoder',
+                        'parameters': {}
+                    },
+                    'max_size': 100
+                }
+            },
+            'error_rate': [0.01]
+        }
+    }
+    output_file = str(tmpdir.join('results.json'))
+    batch_sim = read_input_dict(input_data, output_file, verbose=False)
+    assert len(batch_sim) == 1
+    assert isinstance(batch_sim[0].decoder, CachedDecoder)
+
+    batch_sim.run(10)
+    decoder = batch_sim[0].decoder
+    info = decoder.cache_info()
+    assert info['trivial'] + info['hits'] + info['misses'] == 10
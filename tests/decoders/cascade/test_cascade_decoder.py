@@ -0,0 +1,125 @@
+import pytest
+import numpy as np
+from panqec.codes import Toric2DCode
+from panqec.decoders import (
+    CascadeDecoder, LookupTableDecoder, MatchingDecoder,
+    BeliefPropagationOSDDecoder
+)
+from panqec.simulation import read_input_dict
+from tests.decoders.decoder_test import DecoderTest
+
+
+class TestCascadeDecoder(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(3)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        error_rate = 0.1
+        return CascadeDecoder(code, error_model, error_rate, [
+            LookupTableDecoder(code, error_model, error_rate, max_weight=1),
+            MatchingDecoder(code, error_model, error_rate),
+        ])
+
+    def test_cheap_stage_resolves_single_errors(self, code, decoder):
+        error = code.to_bsf({(1, 0): 'X'})
+        correction = decoder.decode(code.measure_syndrome(error))
+        assert code.is_success((correction + error) % 2)
+        assert decoder.last_decode_stats()['cascade_stage'] == 0
+
+        info = decoder.stage_info()
+        assert [stage['calls'] for stage in info] == [1, 0]
+        assert [stage['resolved'] for stage in info] == [1, 0]
+        assert info[0]['hit_rate'] == 1
+
+    def test_unresolved_syndrome_escalates(self, code, decoder):
+        # Weight-2 errors are not in the table of the first stage.
+        error = code.to_bsf({(1, 0): 'X', (3, 2): 'X'})
+        syndrome = code.measure_syndrome(error)
+        correction = decoder.decode(syndrome)
+        assert np.all(code.measure_syndrome(correction) == syndrome)
+        assert decoder.last_decode_stats()['cascade_stage'] == 1
+
+        info = decoder.stage_info()
+        assert [stage['calls'] for stage in info] == [1, 1]
+        assert [stage['resolved'] for stage in info] == [0, 1]
+
+    def test_max_stats_escalates(self, code, error_model):
+        decoder = CascadeDecoder(code, error_model, 0.1, [
+            BeliefPropagationOSDDecoder(code, error_model, 0.1),
+            MatchingDecoder(code, error_model, 0.1),
+        ], max_stats=[{'bp_iterations': -1}, None])
+        error = code.to_bsf({(1, 0): 'X'})
+        decoder.decode(code.measure_syndrome(error))
+        assert decoder.last_decode_stats()['cascade_stage'] == 1
+
+    def test_set_error_rate_moves_all_stages(self, decoder):
+        decoder.set_error_rate(0.2)
+        assert all(stage.error_rate == 0.2 for stage in decoder.decoders)
+
+    def test_replica_has_own_counters(self, code, decoder):
+        error = code.to_bsf({(1, 0): 'X'})
+        replica = decoder.replicate(1)
+        replica.decode(code.measure_syndrome(error))
+        assert [stage['calls'] for stage in replica.stage_info()] == [1, 0]
+        assert [stage['calls'] for stage in decoder.stage_info()] == [0, 0]
+        assert replica.decoders[1].matcher_x is decoder.decoders[1].matcher_x
+
+    def test_invalid_arguments(self, code, error_model):
+        with pytest.raises(ValueError):
+            CascadeDecoder(code, error_model, 0.1, [])
+        with pytest.raises(ValueError):
+            CascadeDecoder(
+                code, error_model, 0.1, [{'name': 'MatchingDecoder'}],
+                max_stats=[None, None]
+            )
+
+    def test_params_reinstantiate_decoder(self, code, error_model, decoder):
+        params = decoder.params
+        assert [stage['name'] for stage in params['decoders']] == [
+            'LookupTableDecoder', 'MatchingDecoder'
+        ]
+        new_decoder = CascadeDecoder(code, error_model, 0.1, **params)
+        assert isinstance(new_decoder.decoders[0], LookupTableDecoder)
+        assert new_decoder.params == params
+
+
+def test_cascade_decoder_from_input_dict(tmpdir):
+    input_data = {
+        'ranges': {
+            'label': 'cascade',
+            'code': {
+                'name': 'Toric2DCode',
+                'parameters': [{'L_x': 3}]
+            },
+            'error_model': {
+                'name': 'PauliErrorModel',
+                'parameters': [{'r_x': 1/3, 'r_y': 1/3, 'r_z': 1/3}]
+            },
+            'decoder': {
+                'name': 'CascadeDecoder',
+                'parameters': {
+                    'decoders': [
+                        {'name': 'LookupTableDecoder',
+                         'parameters': {'max_weight': 1}},
+                        {'name': 'BeliefPropagationOSDDecoder',
+                         'parameters': {'osd_order': 10}},
+                    ],
+                    'max_stats': [{'table_miss': 0}, None]
+                }
+            },
+            'error_rate': [0.05]
+        }
+    }
+    output_file = str(tmpdir.join('results.json'))
+    batch_sim = read_input_dict(input_data, output_file, verbose=False)
+    assert len(batch_sim) == 1
+    decoder = batch_sim[0].decoder
+    assert isinstance(decoder, CascadeDecoder)
+
+    batch_sim.run(10)
+    info = decoder.stage_info()
+    assert decoder.n_trivial + info[0]['calls'] == 10
+    assert sum(stage['resolved'] for stage in info) == info[0]['calls']
@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+from panqec.codes import (
+    Color666ToricCode, Color666PlanarCode, Color488Code, Toric2DCode
+)
+from panqec.config import DECODERS
+from panqec.decoders import RestrictionDecoder
+from panqec.error_models import PauliErrorModel
+from tests.decoders.decoder_test import DecoderTest
+
+
+class RestrictionDecoderTest(DecoderTest):
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return RestrictionDecoder(code, error_model, 0.1)
+
+    def test_random_errors_stay_in_codespace(self, code, error_model,
+                                             decoder):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            error = error_model.generate(code, 0.05, rng=rng)
+            correction = decoder.decode(code.measure_syndrome(error))
+            assert code.in_codespace((correction + error) % 2)
+            assert decoder.last_decode_stats()['fallback_decodes'] == 0
+
+
+class TestRestrictionDecoderColor666Toric(RestrictionDecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Color666ToricCode(2)
+
+
+class TestRestrictionDecoderColor666Planar(RestrictionDecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Color666PlanarCode(3)
+
+    def test_corrects_low_weight_errors(self, code, error_model, decoder):
+        # The planar code of size 3 has distance 7.
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            qubits = rng.choice(code.n, size=3, replace=False)
+            error = code.to_bsf({
+                code.qubit_coordinates[i]: 'Y' for i in qubits
+            })
+            correction = decoder.decode(code.measure_syndrome(error))
+            assert code.is_success((correction + error) % 2)
+
+
+class TestRestrictionDecoderColor488(RestrictionDecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Color488Code(3)
+
+
+def test_restriction_decoder_registered():
+    assert DECODERS['RestrictionDecoder'] is RestrictionDecoder
+    assert 'Color666PlanarCode' in RestrictionDecoder.allowed_codes
+
+
+def test_restriction_decoder_rejects_non_color_code():
+    code = Toric2DCode(3)
+    with pytest.raises(ValueError):
+        RestrictionDecoder(code, PauliErrorModel(1/3, 1/3, 1/3), 0.1)
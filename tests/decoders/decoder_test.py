@@ -38,6 +38,49 @@ class DecoderTest(metaclass=ABCMeta):
         assert code.is_success(correction)
         assert code.in_codespace(correction)
 
+    def test_decode_batch_trivial_syndromes(self, code, decoder):
+        syndromes = np.zeros(
+            shape=(3, code.stabilizer_matrix.shape[0]), dtype=np.uint
+        )
+        corrections = decoder.decode_batch(syndromes)
+        assert corrections.shape == (3, 2*code.n)
+        assert np.all(corrections == 0)
+
+    def test_set_error_rate(self, code, decoder):
+        decoder.set_error_rate(0.2)
+        assert decoder.error_rate == 0.2
+        syndrome = np.zeros(
+            shape=code.stabilizer_matrix.shape[0], dtype=np.uint
+        )
+        assert np.all(decoder.decode(syndrome) == 0)
+
+    def test_last_decode_stats(self, code, decoder):
+        syndrome = np.zeros(
+            shape=code.stabilizer_matrix.shape[0], dtype=np.uint
+        )
+        decoder.decode(syndrome)
+        stats = decoder.last_decode_stats()
+        assert isinstance(stats, dict)
+        assert all(np.isscalar(value) for value in stats.values())
+
+    def test_last_batch_stats(self, code, decoder):
+        errors = np.zeros((3, 2*code.n), dtype=np.uint)
+        errors[1, 0] = 1
+        errors[2, code.n + code.n // 2] = 1
+        syndromes = np.array([code.measure_syndrome(e) for e in errors])
+
+        decoder.decode_batch(syndromes)
+        batch_stats = decoder.last_batch_stats()
+        assert len(batch_stats) == len(syndromes)
+
+        # Same statistics as when decoding shot by shot (with a fresh
+        # replica, so that caches do not change them).
+        reference = decoder.replicate(0)
+        for syndrome, stats in zip(syndromes, batch_stats):
+            reference.decode(syndrome)
+            assert stats.keys() == reference.last_decode_stats().keys()
+            assert all(np.isscalar(value) for value in stats.values())
+
     @pytest.mark.slow
     def test_decode_single_qubit_error(self, code, decoder, allowed_paulis):
         for pauli in allowed_paulis:
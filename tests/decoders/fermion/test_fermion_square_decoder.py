@@ -0,0 +1,52 @@
+import pytest
+import numpy as np
+from panqec.codes import FermionSquare
+from panqec.decoders import FermionSquareDecoder
+from panqec.error_models import PauliErrorModel
+from tests.decoders.decoder_test import DecoderTest
+
+
+class TestFermionSquareDecoder(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return FermionSquare(6)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return FermionSquareDecoder(code, error_model, 0.1)
+
+    def test_decode_single_face_qubit_errors(self, code, decoder):
+        location = (1, 1)
+        for pauli in ['X', 'Y', 'Z']:
+            error = code.to_bsf({location: pauli})
+            correction = decoder.decode(code.measure_syndrome(error))
+            assert np.all(correction == error)
+
+    def test_decode_vertex_qubit_error(self, code, decoder):
+        error = code.to_bsf({(2, 2): 'X'})
+        correction = decoder.decode(code.measure_syndrome(error))
+        assert correction.shape == (2*code.n,)
+        assert np.all(code.measure_syndrome(correction + error) % 2 == 0)
+
+    def test_decode_does_not_modify_syndrome(self, code, decoder):
+        error = code.to_bsf({(1, 1): 'Z', (6, 2): 'Y'})
+        syndrome = code.measure_syndrome(error)
+        syndrome_copy = syndrome.copy()
+        decoder.decode(syndrome)
+        assert np.all(syndrome == syndrome_copy)
+
+
+def test_same_seed_gives_same_corrections():
+    code = FermionSquare(6)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoders = [
+        FermionSquareDecoder(code, error_model, 0.1, seed=3)
+        for _ in range(2)
+    ]
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        error = error_model.generate(code, 0.1, rng=rng)
+        syndrome = code.measure_syndrome(error)
+        corrections = [decoder.decode(syndrome) for decoder in decoders]
+        assert np.all(corrections[0] == corrections[1])
@@ -0,0 +1,107 @@
+import os
+import pytest
+import numpy as np
+from panqec.codes import Planar2DCode, Toric2DCode
+from panqec.decoders import LookupTableDecoder
+from panqec.error_models import PauliErrorModel
+from tests.decoders.decoder_test import DecoderTest
+
+
+class TestLookupTableDecoder(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Planar2DCode(3)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return LookupTableDecoder(code, error_model, 0.1, max_weight=1)
+
+    def test_table_size(self, code, decoder):
+        # Identity and all single-qubit errors have distinct syndromes.
+        assert len(decoder) == 1 + 3*code.n
+
+    def test_missing_syndrome(self, code, decoder):
+        error = code.to_bsf({(1, 0): 'X', (3, 2): 'Z', (1, 4): 'Y'})
+        syndrome = code.measure_syndrome(error)
+        assert decoder.lookup(syndrome) is None
+        correction = decoder.decode(syndrome)
+        assert np.all(correction == 0)
+        assert decoder.n_misses == 1
+
+    def test_invalid_max_weight(self, code, error_model):
+        with pytest.raises(ValueError):
+            LookupTableDecoder(code, error_model, 0.1, max_weight=-1)
+
+
+def test_weight_2_errors_are_corrected():
+    code = Toric2DCode(3)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = LookupTableDecoder(code, error_model, 0.1, max_weight=2)
+    error = code.to_bsf({(1, 0): 'Y', (2, 3): 'X'})
+    correction = decoder.decode(code.measure_syndrome(error))
+    assert code.is_success((error + correction) % 2)
+
+
+def test_max_likelihood_prefers_likely_paulis():
+    code = Toric2DCode(3)
+    error_model = PauliErrorModel(0.01, 0.01, 0.98)
+
+    # Under Z-biased noise, the most likely error with this syndrome
+    # only has Z components.
+    error = code.to_bsf({(1, 0): 'Z', (0, 1): 'Z'})
+    syndrome = code.measure_syndrome(error)
+
+    decoder = LookupTableDecoder(
+        code, error_model, 0.1, max_weight=2, max_likelihood=True
+    )
+    correction = decoder.decode(syndrome)
+    assert np.all(correction[:code.n] == 0)
+    assert np.all(code.measure_syndrome(correction) == syndrome)
+
+
+def test_set_error_rate_only_rebuilds_max_likelihood_tables():
+    code = Planar2DCode(3)
+    error_model = PauliErrorModel(0.1, 0.1, 0.8)
+
+    decoder = LookupTableDecoder(code, error_model, 0.1, max_weight=1)
+    table = decoder._table
+    decoder.set_error_rate(0.2)
+    assert decoder._table is table
+
+    decoder = LookupTableDecoder(
+        code, error_model, 0.1, max_weight=1, max_likelihood=True
+    )
+    table = decoder._table
+    decoder.set_error_rate(0.2)
+    assert decoder._table is not table
+    decoder.set_error_rate(0.1)
+    assert decoder._table is table
+
+
+def test_table_is_saved_and_loaded(tmpdir):
+    code = Planar2DCode(3)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = LookupTableDecoder(
+        code, error_model, 0.1, max_weight=2, cache_dir=str(tmpdir)
+    )
+    path = decoder.get_table_path()
+    assert os.path.exists(path)
+
+    # The minimum-weight table does not depend on the noise.
+    other_model = PauliErrorModel(0, 0, 1)
+    loaded = LookupTableDecoder(
+        code, other_model, 0.2, **decoder.params
+    )
+    assert loaded.get_table_path() == path
+    assert len(loaded) == len(decoder)
+
+    error = code.to_bsf({(1, 0): 'X', (3, 2): 'Z'})
+    syndrome = code.measure_syndrome(error)
+    assert np.all(loaded.decode(syndrome) == decoder.decode(syndrome))
+
+    ml_decoder = LookupTableDecoder(
+        code, error_model, 0.1, max_weight=2, max_likelihood=True,
+        cache_dir=str(tmpdir)
+    )
+    assert ml_decoder.get_table_path() != path
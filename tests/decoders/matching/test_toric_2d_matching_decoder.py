@@ -49,6 +49,40 @@ class TestToric2DMatchingDecoder(DecoderTest):
             'Total error should be in code space'
         )
 
+    def test_decode_batch_matches_decode(self, code, decoder):
+        rng = np.random.default_rng(0)
+        errors = rng.integers(0, 2, size=(20, 2*code.n)) * (
+            rng.random((20, 2*code.n)) < 0.1
+        )
+        # Repeated and trivial syndromes are decoded only once.
+        errors[10:] = errors[:10]
+        errors[5] = 0
+        syndromes = np.array([code.measure_syndrome(e) for e in errors])
+
+        corrections = decoder.decode_batch(syndromes)
+        for syndrome, correction in zip(syndromes, corrections):
+            assert np.all(correction == decoder.decode(syndrome))
+
+    def test_set_error_rate_matches_new_decoder(self, code):
+        # Biased noise so that the weights depend on the error rate.
+        error_model = PauliErrorModel(0.1, 0.1, 0.8)
+        decoder = MatchingDecoder(code, error_model, 0.4)
+        matchers = (decoder.matcher_x, decoder.matcher_z)
+        decoder.set_error_rate(0.05)
+        new_decoder = MatchingDecoder(code, error_model, 0.05)
+
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            error = error_model.generate(code, 0.2, rng=rng)
+            syndrome = code.measure_syndrome(error)
+            assert np.all(
+                decoder.decode(syndrome) == new_decoder.decode(syndrome)
+            )
+
+        # The graphs of the first error rate are reused.
+        decoder.set_error_rate(0.4)
+        assert (decoder.matcher_x, decoder.matcher_z) == matchers
+
     def test_exception_when_wrong_code(self, code):
         error_model = PauliErrorModel(1/3, 1/3, 1/3)
         error_rate = 0.5
@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+from panqec.codes import Toric2DCode, Planar2DCode
+from panqec.decoders import (
+    GreedyPreDecoder, MatchingDecoder, BeliefPropagationOSDDecoder
+)
+from panqec.error_models import PauliErrorModel
+from tests.decoders.decoder_test import DecoderTest
+
+
+class TestGreedyPreDecoder(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(6)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        error_rate = 0.1
+        matcher = MatchingDecoder(code, error_model, error_rate)
+        return GreedyPreDecoder(code, error_model, error_rate, matcher)
+
+    def test_isolated_errors_are_predecoded(self, code, decoder):
+        error = code.to_bsf({(1, 0): 'X', (6, 5): 'Y', (7, 10): 'Z'})
+        syndrome = code.measure_syndrome(error)
+
+        corrections, residuals = decoder.predecode(syndrome.reshape(1, -1))
+        assert np.all(residuals == 0)
+        assert np.all(corrections[0] == error)
+
+        correction = decoder.decode(syndrome)
+        assert np.all(correction == error)
+        assert decoder.last_decode_stats() == {
+            'predecoded_qubits': 3, 'residual_defects': 0
+        }
+
+    def test_adjacent_errors_are_left_to_decoder(self, code, decoder):
+        error = code.to_bsf({(1, 0): 'X', (3, 0): 'X'})
+        syndrome = code.measure_syndrome(error)
+
+        corrections, residuals = decoder.predecode(syndrome.reshape(1, -1))
+        assert np.all(corrections == 0)
+        assert np.all(residuals[0] == syndrome)
+
+        correction = decoder.decode(syndrome)
+        assert code.is_success((correction + error) % 2)
+
+    def test_syndrome_is_not_modified(self, code, decoder):
+        error = code.to_bsf({(1, 0): 'X', (7, 4): 'X', (9, 4): 'X'})
+        syndrome = code.measure_syndrome(error)
+        original = syndrome.copy()
+        decoder.decode(syndrome)
+        assert np.all(syndrome == original)
+
+    def test_decode_batch_matches_decode(self, code, decoder, error_model):
+        rng = np.random.default_rng(0)
+        syndromes = np.array([
+            code.measure_syndrome(
+                error_model.generate(code, error_rate=0.05, rng=rng)
+            )
+            for _ in range(20)
+        ])
+        corrections = decoder.decode_batch(syndromes)
+        for syndrome, correction in zip(syndromes, corrections):
+            assert np.all(code.measure_syndrome(correction) == syndrome)
+            assert np.all(correction == decoder.decode(syndrome))
+
+    def test_params_reinstantiate_decoder(self, code, error_model, decoder):
+        params = decoder.params
+        assert params['decoder']['name'] == 'MatchingDecoder'
+        new_decoder = GreedyPreDecoder(code, error_model, 0.1, **params)
+        assert isinstance(new_decoder.decoder, MatchingDecoder)
+        assert new_decoder.params == params
+
+
+def test_residual_is_decoded_by_wrapped_decoder():
+    code = Planar2DCode(5)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    bposd = BeliefPropagationOSDDecoder(code, error_model, 0.1)
+    decoder = GreedyPreDecoder(code, error_model, 0.1, bposd)
+
+    # An isolated error and a pair of adjacent errors.
+    error = code.to_bsf({(1, 0): 'Y', (7, 6): 'X', (9, 6): 'X'})
+    syndrome = code.measure_syndrome(error)
+    correction = decoder.decode(syndrome)
+    assert code.is_success((correction + error) % 2)
+
+    stats = decoder.last_decode_stats()
+    assert stats['predecoded_qubits'] == 1
+    assert stats['residual_defects'] > 0
+    assert 'bp_iterations' in stats
+
+    decoder.set_error_rate(0.2)
+    assert bposd.error_rate == 0.2
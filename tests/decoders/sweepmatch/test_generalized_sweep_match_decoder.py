@@ -0,0 +1,129 @@
+import pytest
+import numpy as np
+from panqec.codes import (
+    RhombicToricCode, RhombicPlanarCode, HollowPlanar3DCode, Toric2DCode,
+    Toric3DCode
+)
+from panqec.config import DECODERS
+from panqec.decoders import (
+    GeneralizedSweepMatchDecoder, GeneralizedSweepDecoder, SweepDecoder3D
+)
+from panqec.error_models import PauliErrorModel
+from tests.decoders.decoder_test import DecoderTest
+
+
+class GeneralizedSweepMatchDecoderTest(DecoderTest):
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return GeneralizedSweepMatchDecoder(code, error_model, 0.1)
+
+    def test_random_errors_end_in_codespace(self, code, error_model,
+                                            decoder):
+        rng = np.random.default_rng(0)
+        errors = [
+            error_model.generate(code, 0.02, rng=rng) for _ in range(10)
+        ]
+        syndromes = np.array([code.measure_syndrome(e) for e in errors])
+        corrections = decoder.decode_batch(syndromes)
+        for error, correction in zip(errors, corrections):
+            assert code.in_codespace((error + correction) % 2)
+
+
+class TestGeneralizedSweepMatchDecoderRhombicToric(
+    GeneralizedSweepMatchDecoderTest
+):
+
+    @pytest.fixture
+    def code(self):
+        return RhombicToricCode(4, 4, 4)
+
+    def test_sweeps_triangles(self, decoder):
+        # Triangles detect X errors, with loop-like syndromes.
+        assert decoder.sweeper.error_type == 'X'
+
+
+class TestGeneralizedSweepMatchDecoderRhombicPlanar(
+    GeneralizedSweepMatchDecoderTest
+):
+
+    @pytest.fixture
+    def code(self):
+        return RhombicPlanarCode(4, 4, 4)
+
+
+class TestGeneralizedSweepMatchDecoderHollowPlanar(
+    GeneralizedSweepMatchDecoderTest
+):
+
+    @pytest.fixture
+    def code(self):
+        return HollowPlanar3DCode(4, 4, 4)
+
+    def test_sweeps_faces(self, decoder):
+        assert decoder.sweeper.error_type == 'Z'
+
+
+def test_sweep_rule_matches_cubic_lattice_rule():
+    # On the cubic lattice, the derived rule is the usual sweep rule.
+    code = Toric3DCode(4)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = GeneralizedSweepDecoder(code, error_model, 0.1)
+    decoder.sweep_directions = [(1, 1, 1)]
+    reference = SweepDecoder3D(code, error_model, 0.1)
+
+    # An error without ties in the sweep rule.
+    error = code.to_bsf({(1, 2, 2): 'Z', (2, 3, 2): 'Z'})
+    syndrome = code.measure_syndrome(error)
+    assert np.all(decoder.decode(syndrome) == reference.decode(syndrome))
+
+
+def test_generalized_sweep_match_decoder_registered():
+    assert DECODERS['GeneralizedSweepMatchDecoder'] \
+        is GeneralizedSweepMatchDecoder
+
+
+def test_generalized_sweep_decoder_needs_loop_syndromes():
+    code = Toric2DCode(3)
+    with pytest.raises(ValueError):
+        GeneralizedSweepDecoder(code, PauliErrorModel(1/3, 1/3, 1/3), 0.1)
+
+
+@pytest.mark.parametrize('code', [
+    RhombicToricCode(4, 4, 4), RhombicPlanarCode(4, 4, 4)
+])
+def test_syndrome_cleared_at_low_error_rate(code):
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    sweeper = GeneralizedSweepDecoder(code, error_model, 0.02)
+    decoder = GeneralizedSweepMatchDecoder(code, error_model, 0.02)
+    errors = error_model.generate_batch(
+        code, 0.02, 60, rng=np.random.default_rng(0)
+    )
+    syndromes = np.array([code.measure_syndrome(e) for e in errors])
+
+    # The sweeper clears the syndrome of the errors it corrects.
+    corrections = sweeper.decode_batch(syndromes)
+    for error, correction in zip(errors, corrections):
+        residual = code.measure_syndrome((error + correction) % 2)
+        assert not np.any(residual[sweeper._rows])
+
+    # Together with matching, the whole syndrome is cleared.
+    corrections = decoder.decode_batch(syndromes)
+    for error, correction in zip(errors, corrections):
+        assert code.in_codespace((error + correction) % 2)
+
+
+def test_leftover_syndrome_decoded_with_bposd():
+    code = RhombicPlanarCode(4, 4, 4)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = GeneralizedSweepDecoder(code, error_model, 0.05, max_rounds=0)
+    error = error_model.generate(
+        code, 0.05, rng=np.random.default_rng(1)
+    )
+    syndrome = code.measure_syndrome(error)
+    assert np.any(syndrome[decoder._rows])
+
+    correction = decoder.decode(syndrome)
+    residual = code.measure_syndrome((error + correction) % 2)
+    assert not np.any(residual[decoder._rows])
+    assert decoder.last_decode_stats()['fallback_decodes'] == 1
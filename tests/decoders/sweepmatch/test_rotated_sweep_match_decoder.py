@@ -22,6 +22,24 @@ class TestRotatedSweepMatchDecoder(DecoderTest):
         return RotatedSweepMatchDecoder(code, error_model, error_rate,
                                         max_rounds=4)
 
+    def test_concurrent_decoding(self, code, error_model):
+        with RotatedSweepMatchDecoder(
+            code, error_model, 0.5, max_rounds=4, concurrent=True
+        ) as decoder:
+            assert 'concurrent' not in decoder.params
+
+            error = code.to_bsf({(1, 1, 1): 'Y', (5, 5, 3): 'X'})
+            syndrome = code.measure_syndrome(error)
+            correction = decoder.decode(syndrome)
+            assert np.all(code.measure_syndrome(correction) == syndrome)
+
+            corrections = decoder.decode_batch(
+                np.array([syndrome, syndrome])
+            )
+            for correction in corrections:
+                assert np.all(code.measure_syndrome(correction) == syndrome)
+        assert decoder._executor is None
+
     @pytest.mark.parametrize('sweep_direction, diffs', [
         [(+1, 0, +1), [(+1, +1, +1), (+1, -1, +1), (+2, 0, 0)]],
         [(+1, 0, -1), [(+1, +1, -1), (+1, -1, -1), (+2, 0, 0)]],
@@ -520,3 +538,33 @@ class TestRotatedSweepDecoder3D(DecoderTest):
             pauli_syndrome = code.measure_syndrome(error)
 
             assert np.all(pauli_syndrome == sign_flip_syndrome)
+
+    def test_sweep_move_matches_flip_edge(self, code, decoder):
+        rng = np.random.default_rng(0)
+        for sweep_direction in decoder.sweep_directions:
+            error = np.zeros(2*code.n, dtype=np.uint)
+            error[code.n:] = rng.random(code.n) < 0.1
+            signs = decoder.get_initial_state(code.measure_syndrome(error))
+
+            correction = dict()
+            new_signs = decoder.sweep_move(signs, correction, sweep_direction)
+
+            for location in correction:
+                decoder.flip_edge(location, signs)
+            assert np.all(new_signs == signs)
+
+    def test_edge_faces_match_syndrome(self, code, decoder):
+        for index in range(code.n):
+            error = np.zeros(2*code.n, dtype=np.uint)
+            error[code.n + index] = 1
+            syndrome = code.measure_syndrome(error)
+            faces = decoder._edge_faces[index]
+            faces = faces[faces < code.n_stabilizers]
+            assert set(np.where(syndrome)[0]) == set(faces)
+
+    def test_number_of_sweeps_is_reported(self, code, decoder):
+        syndromes = np.zeros((2, code.n_stabilizers), dtype=np.uint)
+        syndromes[1] = code.measure_syndrome(code.to_bsf({(3, 3, 3): 'Z'}))
+        decoder.decode_batch(syndromes)
+        assert decoder.last_n_sweeps[0] == 0
+        assert decoder.last_n_sweeps[1] > 0
@@ -1,7 +1,7 @@
 import itertools
 import pytest
 import numpy as np
-from panqec.codes import Toric3DCode
+from panqec.codes import Toric3DCode, Planar3DCode
 from panqec.decoders import SweepDecoder3D
 from panqec.bpauli import bsf_wt
 from panqec.error_models import PauliErrorModel
@@ -327,6 +327,10 @@ class Test3x3x3SweepDecoder3D(DecoderTest):
         total_error = (error + code.to_bsf(correction)) % 2
         assert np.any(code.measure_syndrome(total_error) != 0)
 
+        # The decoder stops as soon as the cycle is detected.
+        decoder.decode(syndrome)
+        assert decoder.last_n_sweeps.tolist() == [3]
+
     def test_never_ending_staircase_fails(self, code, decoder):
 
         # Weight-8 Z error that may start infinite loop in sweep decoder.
@@ -426,6 +430,43 @@ class Test3x3x3SweepDecoder3D(DecoderTest):
 
         assert correction == expected_correction
 
+    def test_decode_clears_syndrome_of_random_errors(self, code, decoder):
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            error = np.zeros(2*code.n, dtype=np.uint)
+            error[code.n:] = rng.random(code.n) < 0.03
+            syndrome = code.measure_syndrome(error)
+            correction = decoder.decode(syndrome)
+            total_error = (error + correction) % 2
+            assert np.all(code.measure_syndrome(total_error) == 0)
+
+
+class TestSweepDecoder3DPlanar:
+
+    @pytest.fixture
+    def code(self):
+        return Planar3DCode(3, 4, 5)
+
+    @pytest.fixture
+    def decoder(self, code):
+        return SweepDecoder3D(code, PauliErrorModel(0, 0, 1), 0.1)
+
+    def test_grid_covers_all_faces(self, code, decoder):
+        faces = set(code.type_index('face').values())
+        assert set(decoder._face_index[decoder._face_mask]) == faces
+
+    def test_sweep_move_matches_flip_edge(self, code, decoder):
+        error = code.to_bsf({(3, 2, 2): 'Z', (4, 1, 2): 'Z'})
+        signs = decoder.get_initial_state(code.measure_syndrome(error))
+
+        correction = dict()
+        new_signs = decoder.sweep_move(signs, correction)
+        assert len(correction) > 0
+
+        for location in correction:
+            decoder.flip_edge(location, signs)
+        assert np.all(new_signs == signs)
+
 
 def find_sites(error_pauli):
     """List of sites where Pauli has support over."""
@@ -23,6 +23,38 @@ class TestSweepMatchDecoder(DecoderTest):
         assert decoder.label is not None
         assert decoder.decode is not None
 
+    def test_decode_batch_clears_syndromes(self, decoder, code):
+        rng = np.random.default_rng(0)
+        errors = (rng.random((10, 2*code.n)) < 0.02).astype(np.uint)
+        syndromes = np.array([code.measure_syndrome(e) for e in errors])
+
+        corrections = decoder.decode_batch(syndromes)
+        assert corrections.shape == (10, 2*code.n)
+        for error, correction in zip(errors, corrections):
+            total_error = (error + correction) % 2
+            assert np.all(code.measure_syndrome(total_error) == 0)
+
+    def test_concurrent_decoding(self, decoder, code, error_model):
+        concurrent = SweepMatchDecoder(
+            code, error_model, 0.5, concurrent=True
+        )
+        assert concurrent.params == {}
+
+        rng = np.random.default_rng(0)
+        errors = (rng.random((10, 2*code.n)) < 0.02).astype(np.uint)
+        syndromes = np.array([code.measure_syndrome(e) for e in errors])
+
+        # The sweeper randomly breaks ties, but the matcher does not.
+        corrections = concurrent.decode_batch(syndromes)
+        for syndrome, correction in zip(syndromes, corrections):
+            assert np.all(code.measure_syndrome(correction) == syndrome)
+            assert np.all(
+                correction[:code.n] == decoder.decode(syndrome)[:code.n]
+            )
+
+        concurrent.close()
+        assert concurrent._executor is None
+
     def test_decode_trivial_syndrome(self, decoder, code):
         syndrome = np.zeros(
             shape=code.stabilizer_matrix.shape[0], dtype=np.uint
@@ -0,0 +1,140 @@
+import pytest
+import numpy as np
+from panqec.codes import Toric2DCode, Toric3DCode
+from panqec.decoders import (
+    ThreadPoolDecoder, MatchingDecoder, BeliefPropagationOSDDecoder,
+    SweepMatchDecoder
+)
+from panqec.error_models import PauliErrorModel
+from tests.decoders.decoder_test import DecoderTest
+
+
+class TestThreadPoolDecoder(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(4)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        error_rate = 0.1
+        matcher = MatchingDecoder(code, error_model, error_rate)
+        return ThreadPoolDecoder(
+            code, error_model, error_rate, matcher, n_workers=3
+        )
+
+    @pytest.fixture
+    def syndromes(self, code, error_model):
+        rng = np.random.default_rng(0)
+        return np.array([
+            code.measure_syndrome(
+                error_model.generate(code, error_rate=0.05, rng=rng)
+            )
+            for _ in range(10)
+        ])
+
+    def test_decode_batch_matches_decoder(self, decoder, syndromes):
+        corrections = decoder.decode_batch(syndromes)
+        assert corrections.shape == (10, 2*decoder.code.n)
+        assert np.all(corrections == decoder.decoder.decode_batch(syndromes))
+
+        # The replicas share the code, the error model and the matching
+        # graphs, which are only read while decoding.
+        assert len(decoder._replicas) == 3
+        for replica in decoder._replicas:
+            assert replica.code is decoder.code
+            assert replica.error_model is decoder.error_model
+            assert replica.matcher_x is decoder.decoder.matcher_x
+            assert replica.matcher_z is decoder.decoder.matcher_z
+
+    def test_few_shots_use_few_threads(self, decoder, syndromes):
+        decoder.decode_batch(syndromes[:1])
+        assert len(decoder._replicas) == 1
+        decoder.decode_batch(syndromes[:2])
+        assert len(decoder._replicas) == 2
+
+    def test_set_error_rate_moves_replicas(self, decoder, syndromes):
+        decoder.decode_batch(syndromes)
+        decoder.set_error_rate(0.2)
+        assert all(
+            replica.error_rate == 0.2 for replica in decoder._replicas
+        )
+
+    def test_close_shuts_down_threads(self, decoder, syndromes):
+        decoder.decode_batch(syndromes)
+        assert decoder._executor is not None
+        decoder.close()
+        assert decoder._executor is None
+
+    def test_context_manager_closes(self, code, error_model, syndromes):
+        with ThreadPoolDecoder(
+            code, error_model, 0.1, {'name': 'MatchingDecoder'}, n_workers=2
+        ) as decoder:
+            decoder.decode_batch(syndromes)
+            assert decoder._executor is not None
+        assert decoder._executor is None
+
+    def test_invalid_n_workers(self, code, error_model):
+        with pytest.raises(ValueError):
+            ThreadPoolDecoder(
+                code, error_model, 0.1, {'name': 'MatchingDecoder'},
+                n_workers=0
+            )
+
+
+def test_thread_pool_of_bposd_decoders():
+    code = Toric2DCode(3)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = ThreadPoolDecoder(code, error_model, 0.1, {
+        'name': 'BeliefPropagationOSDDecoder',
+        'parameters': {'osd_order': 2}
+    }, n_workers=2)
+    assert isinstance(decoder.decoder, BeliefPropagationOSDDecoder)
+    assert decoder.params['decoder']['parameters']['osd_order'] == 2
+
+    rng = np.random.default_rng(0)
+    syndromes = np.array([
+        code.measure_syndrome(
+            error_model.generate(code, error_rate=0.05, rng=rng)
+        )
+        for _ in range(6)
+    ])
+    corrections = decoder.decode_batch(syndromes)
+    for syndrome, correction in zip(syndromes, corrections):
+        assert np.all(code.measure_syndrome(correction) == syndrome)
+
+    # The BP-OSD decoders hold the messages, so each thread has its own.
+    x_decoders = [replica.x_decoder for replica in decoder._replicas]
+    assert len(set(map(id, x_decoders))) == 2
+    decoder.close()
+
+
+def test_replicas_have_distinct_seeds():
+    code = Toric3DCode(3)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    sweep_match = SweepMatchDecoder(code, error_model, 0.1)
+    decoder = ThreadPoolDecoder(
+        code, error_model, 0.1, sweep_match, n_workers=3
+    )
+    replicas = decoder._get_replicas(3)
+
+    # The sweepers share their lookup grids but not their generators.
+    draws = [
+        tuple(replica.sweeper._rng.integers(1 << 30, size=4))
+        for replica in replicas
+    ]
+    assert len(set(draws)) == 3
+    for replica in replicas[1:]:
+        assert (
+            replica.sweeper._face_index is sweep_match.sweeper._face_index
+        )
+
+    # The seeds are reproducible.
+    other = ThreadPoolDecoder(
+        code, error_model, 0.1, SweepMatchDecoder(code, error_model, 0.1),
+        n_workers=3
+    )
+    assert [
+        tuple(replica.sweeper._rng.integers(1 << 30, size=4))
+        for replica in other._get_replicas(3)[1:]
+    ] == draws[1:]
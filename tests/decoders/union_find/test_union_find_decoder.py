@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+from panqec.codes import (
+    Toric2DCode, Planar2DCode, Color666PlanarCode, Toric3DCode,
+    RhombicToricCode
+)
+from panqec.config import DECODERS
+from panqec.decoders import UnionFindDecoder
+from panqec.decoders.union_find._union_find_decoder import _Cluster
+from panqec.error_models import PauliErrorModel
+from tests.decoders.decoder_test import DecoderTest
+
+
+class TestUnionFindDecoderToric2D(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(4, 5)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return UnionFindDecoder(code, error_model, 0.1)
+
+    def test_decode_single_error(self, code, decoder):
+        error = code.to_bsf({(1, 0): 'Y'})
+        correction = decoder.decode(code.measure_syndrome(error))
+        assert np.all(correction == error)
+
+
+class TestUnionFindDecoderColor666(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Color666PlanarCode(3)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return UnionFindDecoder(code, error_model, 0.1)
+
+
+class TestUnionFindDecoderToric3D(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric3DCode(3)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return UnionFindDecoder(code, error_model, 0.1)
+
+
+@pytest.mark.parametrize('code', [
+    Planar2DCode(5), Color666PlanarCode(5), Toric3DCode(4),
+    RhombicToricCode(2)
+])
+def test_correction_matches_syndrome(code):
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = UnionFindDecoder(code, error_model, 0.1)
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        error = error_model.generate(code, 0.1, rng=rng)
+        syndrome = code.measure_syndrome(error)
+        correction = decoder.decode(syndrome)
+        assert np.all(code.measure_syndrome(correction) == syndrome)
+
+
+def test_weights_follow_noise_bias():
+    code = Toric2DCode(4)
+    error_model = PauliErrorModel(0, 0, 1)
+    decoder = UnionFindDecoder(code, error_model, 0.1)
+    assert np.all(decoder.weights > 0)
+    assert np.all(decoder.weights[:code.n] > decoder.weights[code.n:])
+
+
+def test_cluster_boundary_after_merge():
+    cluster = _Cluster(0, True, np.array([0, 1, 2]))
+    cluster.merge(_Cluster(1, False, np.array([2, 3])))
+    grown = np.array([False, True, False, False])
+
+    # Shared qubits are counted once, and grown qubits are dropped.
+    assert np.all(cluster.get_boundary(grown) == [0, 2, 3])
+    assert len(cluster.boundary) == 1
+
+
+def test_union_find_decoder_is_registered():
+    assert DECODERS['UnionFindDecoder'] is UnionFindDecoder
+    assert UnionFindDecoder.allowed_codes is None
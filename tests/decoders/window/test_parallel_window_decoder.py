@@ -0,0 +1,156 @@
+import pytest
+import numpy as np
+from panqec.codes import Toric2DCode, Planar2DCode, Toric3DCode
+from panqec.config import DECODERS
+from panqec.decoders import ParallelWindowDecoder, MatchingDecoder
+from panqec.error_models import PauliErrorModel
+from tests.decoders.decoder_test import DecoderTest
+
+
+class TestParallelWindowDecoderToric2D(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric2DCode(8)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return ParallelWindowDecoder(
+            code, error_model, 0.1, n_blocks=2, buffer=3
+        )
+
+    def test_single_error_on_seam(self, code, decoder):
+        # The qubit (8, 1) sits on the seam between the two blocks.
+        for location in [(0, 1), (8, 1), (7, 0)]:
+            error = code.to_bsf({location: 'Y'})
+            correction = decoder.decode(code.measure_syndrome(error))
+            assert np.all(correction == error)
+
+    def test_invalid_buffer(self, code, error_model):
+        with pytest.raises(ValueError):
+            ParallelWindowDecoder(code, error_model, 0.1, n_blocks=2, buffer=4)
+
+        # Seams with an empty core would never commit any correction.
+        with pytest.raises(ValueError):
+            ParallelWindowDecoder(code, error_model, 0.1, n_blocks=2, buffer=0)
+
+    def test_each_qubit_committed_once_per_stage(self, code, decoder):
+        for problem, windows in zip(decoder._problems, decoder._windows):
+            n_cols = problem['H'].shape[1]
+            for stage in ['blocks', 'seams']:
+                committed = np.concatenate([
+                    cols[commit] for _, cols, commit in windows[stage]
+                ])
+                assert len(np.unique(committed)) == len(committed)
+                if stage == 'blocks':
+                    assert np.all(np.sort(committed) == np.arange(n_cols))
+
+
+class TestParallelWindowDecoderToric3D(DecoderTest):
+
+    @pytest.fixture
+    def code(self):
+        return Toric3DCode(4)
+
+    @pytest.fixture
+    def decoder(self, code, error_model):
+        return ParallelWindowDecoder(
+            code, error_model, 0.1, n_blocks=2, buffer=1,
+            block_decoder='bposd'
+        )
+
+    def test_matching_needs_graph_like_checks(self, code, error_model):
+        with pytest.raises(ValueError):
+            ParallelWindowDecoder(
+                code, error_model, 0.1, buffer=1, block_decoder='matching'
+            )
+
+
+def test_auto_block_decoder_on_toric_3d():
+    # X errors are detected by 2 vertices, Z errors by 4 faces.
+    code = Toric3DCode(8, 8, 8)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = ParallelWindowDecoder(code, error_model, 0.02, buffer=3)
+    assert [problem['decoder'] for problem in decoder._problems] == [
+        'matching', 'bposd'
+    ]
+
+    rng = np.random.default_rng(0)
+    for error in error_model.generate_batch(code, 0.02, 10, rng=rng):
+        syndrome = code.measure_syndrome(error)
+        correction = decoder.decode(syndrome)
+        assert np.all(code.measure_syndrome(correction) == syndrome)
+        assert code.is_success((correction + error) % 2)
+
+
+def test_windows_only_wrap_around_periodic_codes():
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    toric = ParallelWindowDecoder(
+        Toric2DCode(12), error_model, 0.05, n_blocks=2, buffer=3
+    )
+    planar = ParallelWindowDecoder(
+        Planar2DCode(12), error_model, 0.05, n_blocks=2, buffer=3
+    )
+    assert all(problem['periodic'] for problem in toric._problems)
+    assert not any(problem['periodic'] for problem in planar._problems)
+
+    for problem, windows in zip(planar._problems, planar._windows):
+        # The first block does not reach the far edge of the lattice,
+        # and there is no seam at the edge.
+        rows, _, _ = windows['blocks'][0]
+        extent = problem['row_coords'].max() + 1
+        assert problem['row_coords'][rows].max() < extent / 2 + 3 + 1
+        assert len(windows['seams']) == 1
+
+
+@pytest.mark.parametrize('code, n_blocks, buffer', [
+    (Toric2DCode(12), 3, 3), (Planar2DCode(12), 2, 4), (Toric2DCode(12), 1, 0)
+])
+def test_correction_matches_syndrome(code, n_blocks, buffer):
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    decoder = ParallelWindowDecoder(
+        code, error_model, 0.05, n_blocks=n_blocks, buffer=buffer
+    )
+    matcher = MatchingDecoder(code, error_model, 0.05)
+    rng = np.random.default_rng(0)
+    n_fails = [0, 0]
+    for _ in range(20):
+        error = error_model.generate(code, 0.05, rng=rng)
+        syndrome = code.measure_syndrome(error)
+        correction = decoder.decode(syndrome)
+        assert np.all(code.measure_syndrome(correction) == syndrome)
+        n_fails[0] += not code.is_success((correction + error) % 2)
+        n_fails[1] += not code.is_success(
+            (matcher.decode(syndrome) + error) % 2
+        )
+    assert n_fails[0] <= n_fails[1] + 1
+
+
+def test_seams_keep_accuracy_of_matching():
+    code = Toric2DCode(16)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    error_rate = 0.08
+    decoder = ParallelWindowDecoder(
+        code, error_model, error_rate, n_blocks=4, buffer=3, n_workers=1
+    )
+    matcher = MatchingDecoder(code, error_model, error_rate)
+    rng = np.random.default_rng(0)
+    errors = error_model.generate_batch(code, error_rate, 300, rng=rng)
+
+    n_success = [0, 0]
+    for error in errors:
+        syndrome = code.measure_syndrome(error)
+        n_success[0] += code.is_success(
+            (decoder.decode(syndrome) + error) % 2
+        )
+        n_success[1] += code.is_success(
+            (matcher.decode(syndrome) + error) % 2
+        )
+
+    # Committing whole seam windows used to succeed on only 283 shots.
+    assert n_success[1] == 298
+    assert n_success[0] >= 290
+
+
+def test_parallel_window_decoder_is_registered():
+    assert DECODERS['ParallelWindowDecoder'] is ParallelWindowDecoder
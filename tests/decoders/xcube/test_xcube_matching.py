@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from panqec.codes import XCubeCode
 from panqec.decoders import XCubeMatchingDecoder
@@ -13,3 +14,47 @@ class TestXCubeMatchingDecoder(DecoderTest):
     def decoder(self, code, error_model):
         error_rate = 0.1
         return XCubeMatchingDecoder(code, error_model, error_rate)
+
+    def test_decode_does_not_modify_syndrome(self, code, decoder):
+        error = code.to_bsf({(1, 0, 0): 'X', (0, 0, 1): 'Z'})
+        syndrome = code.measure_syndrome(error)
+        syndrome_copy = syndrome.copy()
+        correction = decoder.decode(syndrome)
+        assert np.all(syndrome == syndrome_copy)
+        assert code.is_success((error + correction) % 2)
+
+    def test_decode_planes_pairs_match_syndrome(self, code, decoder):
+        error = code.to_bsf({(1, 0, 0): 'X'})
+        cube_syndrome = code.measure_syndrome(error)[code.z_indices]
+        for axis in ['x', 'y', 'z']:
+            matching, pairs = decoder.decode_planes(cube_syndrome, axis)
+
+            # Each cube appears in exactly one plane per axis.
+            matched = np.concatenate(list(pairs.values()))
+            assert matched.shape == (np.sum(cube_syndrome) // 2, 2)
+            assert len(matching) > 0
+
+    def test_decode_planes_matching_clears_plane_syndromes(
+        self, code, decoder
+    ):
+        rng = np.random.default_rng(0)
+        error = code.to_bsf({
+            code.qubit_coordinates[i]: 'X'
+            for i in rng.choice(code.n, size=6, replace=False)
+        })
+        cube_syndrome = code.measure_syndrome(error)[code.z_indices]
+        for axis_int, axis in enumerate(['x', 'y', 'z']):
+            toric_code = decoder.toric_code[axis]
+            matching, pairs = decoder.decode_planes(cube_syndrome, axis)
+            for plane in range(1, 2*code.size[axis_int], 2):
+                # Correction of the plane, built from the matched pairs.
+                correction = toric_code.to_bsf({
+                    tuple(np.delete(loc, axis_int)): 'Z'
+                    for loc in matching if loc[axis_int] == plane
+                })
+                syndrome = toric_code.measure_syndrome(correction)
+                defects = np.flatnonzero(
+                    toric_code.extract_x_syndrome(syndrome)
+                )
+                matched = pairs.get(plane, np.zeros((0, 2), dtype=int))
+                assert np.all(np.sort(matched.ravel()) == defects)
@@ -6,7 +6,8 @@ import numpy as np
 import pandas as pd
 from panqec.analysis import (
     get_subthreshold_fit_function, get_single_qubit_error_rate, Analysis,
-    deduce_bias, count_fails
+    deduce_bias, count_fails, merge_decoder_stats, count_codespace_fails,
+    count_successes, get_n_sector_bits, read_entry
 )
 from panqec.simulation import read_input_json
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
@@ -160,6 +161,7 @@ class TestAnalysis:
             'size', 'code', 'n', 'k', 'd', 'error_model', 'decoder',
             'error_rate', 'wall_time', 'n_trials', 'n_fail',
             'effective_error', 'success', 'codespace', 'bias', 'results_file',
+            'effective_error_counts', 'codespace_fail_counts',
             'p_est', 'p_se', 'p_word_est', 'p_word_se', 'single_qubit_p_est',
             'single_qubit_p_se', 'code_family', 'error_model_family',
             'p_est_X', 'p_se_X', 'n_fail_X', 'n_trials_X',
@@ -430,6 +432,79 @@ class TestCountFails:
         assert count_fails(effective_error, codespace, 'X') == 6
         assert count_fails(effective_error, codespace, 'Z') == 4
 
+    def test_counts(self):
+        effective_error = np.array([
+            [0, 1, 1, 1, 0, 1],
+            [1, 1, 0, 0, 0, 0],
+        ], dtype=np.uint8)
+        codespace = np.array([True, True], dtype=bool)
+        counts = np.array([3, 2])
+        assert count_fails(effective_error, codespace, 'X', counts) == 10
+        assert count_fails(effective_error, codespace, 'Z') == 2
+
+    def test_histogram(self):
+        counts = {'011101': 3, '110000': 2, '000000': 5}
+        assert count_codespace_fails(counts, 'X') == 10
+        assert count_codespace_fails(counts, 'Z') == 6
+        assert count_successes(counts) == 5
+        assert get_n_sector_bits(counts, 3) == 3
+
+    def test_histogram_by_sector(self):
+        counts = {'10': 3, '11': 2, '00': 5}
+        assert count_codespace_fails(counts, 'X') == 5
+        assert count_codespace_fails(counts, 'Z') == 2
+        assert get_n_sector_bits(counts, 10) == 1
+        assert get_n_sector_bits({}, 10) == 10
+
+
+class TestReadEntry:
+
+    @pytest.fixture
+    def inputs(self):
+        return {
+            'code': {'name': 'Toric2DCode', 'parameters': {'L_x': 3},
+                     'n': 18, 'k': 2, 'd': 3},
+            'error_model': {'name': 'PauliErrorModel', 'parameters': {}},
+            'decoder': {'name': 'MatchingDecoder', 'parameters': {}},
+            'error_rate': 0.1,
+        }
+
+    def test_per_shot_results_are_counted(self, inputs):
+        entry, = read_entry({'inputs': inputs, 'results': {
+            'effective_error': [[0, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 0]],
+            'success': [True, False, False],
+            'codespace': [True, True, False],
+        }})
+        assert entry['n_trials'] == 3
+        assert entry['effective_error_counts'] == {'0000': 1, '0100': 1}
+        assert entry['codespace_fail_counts'] == {'0000': 1}
+
+    def test_compact_results(self, inputs):
+        entry, = read_entry({'inputs': inputs, 'results': {
+            'effective_error_counts': {'0000': 7, '1000': 2},
+            'codespace_fail_counts': {'0000': 1},
+        }})
+        assert entry['n_trials'] == 10
+        assert entry['effective_error'].shape == (0, 4)
+        assert len(entry['success']) == 0
+
+
+def test_merge_decoder_stats():
+    first = {'decode_time': {'count': 2, 'sum': 3.0, 'max': 2.0,
+                             'bins': {'0': 1, '3': 1}}}
+    second = {
+        'decode_time': {'count': 1, 'sum': 0.0, 'max': 0.0,
+                        'bins': {'zero': 1}},
+        'n_sweeps': {'count': 1, 'sum': 4.0, 'max': 4.0, 'bins': {'6': 1}},
+    }
+    # Results files written before decoder statistics have none.
+    merged = merge_decoder_stats([first, np.nan, second])
+    assert merged['decode_time'] == {
+        'count': 3, 'sum': 3.0, 'max': 2.0,
+        'bins': {'0': 1, '3': 1, 'zero': 1}
+    }
+    assert merged['n_sweeps'] == second['n_sweeps']
+
 
 class TestAnalysisClusterTutorial:
 
@@ -73,6 +73,22 @@ class TestPauliNoise:
             'Should be Z error everywhere'
         )
 
+    def test_generate_batch_same_as_generate(self, code, error_model):
+        rng = np.random.default_rng(0)
+        errors = np.array([
+            error_model.generate(code, 0.3, rng=rng) for _ in range(5)
+        ])
+        batch = error_model.generate_batch(
+            code, 0.3, 5, rng=np.random.default_rng(0)
+        )
+        assert batch.shape == (5, 2*code.n)
+        assert np.all(batch == errors)
+
+    def test_generate_batch_all_Y_errors(self, code):
+        error_model = PauliErrorModel(0, 1, 0)
+        batch = error_model.generate_batch(code, 1, 3, rng=np.random)
+        assert all(bsf_to_pauli(error) == 'Y'*code.n for error in batch)
+
     def test_raise_error_if_direction_does_not_sum_to_1(self):
         with pytest.raises(ValueError):
             PauliErrorModel(0, 0, 0)
@@ -5,11 +5,17 @@ import gzip
 import numpy as np
 from panqec.error_models import PauliErrorModel
 from panqec.codes import Toric2DCode
-from panqec.decoders import BeliefPropagationOSDDecoder
+from panqec.decoders import (
+    BeliefPropagationOSDDecoder, MatchingDecoder,
+    MemoryBeliefPropagationDecoder, ThreadPoolDecoder, BudgetDecoder,
+    GreedyPreDecoder
+)
 from panqec.simulation import (
     read_input_json, run_once, DirectSimulation, expand_input_ranges, run_file,
     BatchSimulation
 )
+from panqec.simulation._batch_simulation import DecoderPool
+from panqec.utils import save_json
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 
@@ -107,6 +113,132 @@ class TestSimulationToric2DCode():
         assert len(simulation._results['success']) == 10
         assert set(required_fields).issubset(simulation._results.keys())
 
+    def test_run_records_decoder_stats(self, code, error_model, decoder):
+        simulation = DirectSimulation(
+            code, error_model, decoder, 0.1, verbose=False
+        )
+        simulation.run(4)
+        stats = simulation._results['decoder_stats']
+        assert stats['decode_time']['count'] == 4
+        assert stats['decode_time']['max'] >= 0
+        assert stats['bp_iterations']['count'] == 4
+
+    @pytest.mark.parametrize('decoder_class', [
+        BeliefPropagationOSDDecoder, MatchingDecoder
+    ])
+    def test_batch_run_same_as_shot_by_shot(
+        self, code, error_model, decoder_class
+    ):
+        decoder = decoder_class(code, error_model, 0.1)
+        simulations = [
+            DirectSimulation(
+                code, error_model, decoder, 0.1, verbose=False,
+                rng=np.random.default_rng(0), batch_size=batch_size
+            )
+            for batch_size in [1, 4]
+        ]
+        for simulation in simulations:
+            simulation.run(10)
+        shot_by_shot, batch = [
+            simulation.results for simulation in simulations
+        ]
+        assert batch['n_runs'] == 10
+        assert batch['success'] == shot_by_shot['success']
+        assert batch['codespace'] == shot_by_shot['codespace']
+        assert np.all(
+            np.array(batch['effective_error'])
+            == np.array(shot_by_shot['effective_error'])
+        )
+        assert batch['decoder_stats']['decode_time']['count'] == 10
+        assert (
+            simulations[1].get_results().keys()
+            == simulations[0].get_results().keys()
+        )
+
+    @pytest.mark.parametrize('batch_size', [1, 4])
+    def test_compact_run_same_counts(
+        self, code, error_model, decoder, batch_size, tmpdir
+    ):
+        simulations = [
+            DirectSimulation(
+                code, error_model, decoder, 0.1, verbose=False,
+                rng=np.random.default_rng(0), batch_size=batch_size,
+                compact=compact
+            )
+            for compact in [False, True]
+        ]
+        for simulation in simulations:
+            simulation.run(10)
+        per_shot, compact = simulations
+        assert 'effective_error' not in compact.results
+        assert compact.get_results() == per_shot.get_results()
+        assert compact.sector_error_rates() == per_shot.sector_error_rates()
+
+        codespace = np.array(per_shot.results['codespace'])
+        effective_error = np.array(per_shot.results['effective_error'])
+        assert sum(compact.results['effective_error_counts'].values()) == (
+            codespace.sum()
+        )
+        assert compact.results['effective_error_counts'].get(
+            '0'*effective_error.shape[1], 0
+        ) == np.sum(per_shot.results['success'])
+
+        # Compact results can be saved and resumed.
+        output_file = os.path.join(tmpdir, 'compact.json')
+        save_json([compact.get_results_to_save()], output_file)
+        resumed = DirectSimulation(
+            code, error_model, decoder, 0.1, verbose=False, compact=True
+        )
+        resumed.load_results(output_file)
+        assert resumed.get_results() == compact.get_results()
+
+    @pytest.mark.parametrize('make_decoder', [
+        lambda code, error_model: MatchingDecoder(code, error_model, 0.1),
+        lambda code, error_model: MemoryBeliefPropagationDecoder(
+            code, error_model, 0.1
+        ),
+        lambda code, error_model: GreedyPreDecoder(
+            code, error_model, 0.1, {'name': 'MatchingDecoder'}
+        ),
+        lambda code, error_model: ThreadPoolDecoder(
+            code, error_model, 0.1, BudgetDecoder(
+                code, error_model, 0.1,
+                {'name': 'BeliefPropagationOSDDecoder'},
+                max_stats={'bp_iterations': 1}
+            ), n_workers=2
+        ),
+    ])
+    def test_batch_run_keeps_decoder_stats(self, error_model, make_decoder):
+        code = Toric2DCode(6)
+        results = []
+        for batch_size in [1, 10]:
+            decoder = make_decoder(code, error_model)
+            simulation = DirectSimulation(
+                code, error_model, decoder, 0.1, verbose=False,
+                rng=np.random.default_rng(0), batch_size=batch_size
+            )
+            simulation.run(20)
+            results.append(simulation.results)
+            decoder.close()
+        shot_by_shot, batch = results
+
+        assert batch['decoder_stats'].keys() == (
+            shot_by_shot['decoder_stats'].keys()
+        )
+        assert len(batch['decoder_stats']) > 1
+        for name, histogram in batch['decoder_stats'].items():
+            assert histogram['count'] == (
+                shot_by_shot['decoder_stats'][name]['count']
+            )
+        assert batch['n_budget_exceeded'] == shot_by_shot['n_budget_exceeded']
+        assert batch['n_budget_exceeded_fail'] == (
+            shot_by_shot['n_budget_exceeded_fail']
+        )
+
+    def test_invalid_batch_size(self, code, error_model, decoder):
+        with pytest.raises(ValueError):
+            DirectSimulation(code, error_model, decoder, 0.1, batch_size=0)
+
 
 class TestBatchSimulationOneFile():
 
@@ -200,3 +332,32 @@ class TestReadInputJson:
 
         batch_sim = read_input_json(input_json, output_json)
         assert len(batch_sim) == 126
+
+
+class TestDecoderPool:
+
+    def test_decoder_shared_across_error_rates(self):
+        code = Toric2DCode(3)
+        error_model = PauliErrorModel(1/3, 1/3, 1/3)
+        decoder_dict = {'name': 'MatchingDecoder', 'parameters': {}}
+
+        pool = DecoderPool()
+        decoders = [
+            pool.get_decoder(decoder_dict, code, error_model, p)
+            for p in [0.1, 0.2]
+        ]
+        assert len(pool) == 1
+        assert decoders[0] is decoders[1]
+        assert decoders[0].error_rate == 0.2
+
+    def test_simulations_reweight_shared_decoder(self):
+        code = Toric2DCode(3)
+        error_model = PauliErrorModel(1/3, 1/3, 1/3)
+        decoder = MatchingDecoder(code, error_model, 0.1)
+        simulations = [
+            DirectSimulation(code, error_model, decoder, p, verbose=False)
+            for p in [0.1, 0.2]
+        ]
+        for simulation in simulations:
+            simulation.run(2)
+            assert decoder.error_rate == simulation.error_rate
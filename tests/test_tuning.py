@@ -0,0 +1,183 @@
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from click.testing import CliRunner
+from panqec.cli import cli
+from panqec.codes import Toric2DCode
+from panqec.error_models import PauliErrorModel
+from panqec.simulation import (
+    calibrate_decoder, summarize_calibration, pareto_front,
+    choose_parameters, tune_input_dict, expand_input_ranges
+)
+
+
+@pytest.fixture
+def summary():
+    return pd.DataFrame([
+        {'parameters': {'osd_order': 0}, 'n_trials': 100, 'n_fail': 20,
+         'p_est': 0.20, 'p_se': 0.04, 'latency': 0.001},
+        {'parameters': {'osd_order': 10}, 'n_trials': 100, 'n_fail': 10,
+         'p_est': 0.10, 'p_se': 0.03, 'latency': 0.002},
+        {'parameters': {'osd_order': 50}, 'n_trials': 100, 'n_fail': 12,
+         'p_est': 0.12, 'p_se': 0.03, 'latency': 0.005},
+        {'parameters': {'osd_order': 100}, 'n_trials': 100, 'n_fail': 9,
+         'p_est': 0.09, 'p_se': 0.03, 'latency': 0.010},
+    ])
+
+
+def test_pareto_front(summary):
+    front = pareto_front(summary)
+    assert [p['osd_order'] for p in front['parameters']] == [0, 10, 100]
+
+
+def test_choose_parameters(summary):
+    # Order 100 is not significantly better than order 10, which is faster.
+    assert choose_parameters(summary) == {'osd_order': 10}
+    assert choose_parameters(summary, n_sigma=0) == {'osd_order': 100}
+    assert choose_parameters(summary, max_latency=0.001) == {'osd_order': 0}
+    assert choose_parameters(summary, max_latency=1e-6) == {'osd_order': 0}
+
+
+def test_calibrate_decoder():
+    code = Toric2DCode(3)
+    error_model = PauliErrorModel(1/3, 1/3, 1/3)
+    calibration = calibrate_decoder(
+        code, error_model, 'BeliefPropagationOSDDecoder',
+        {'osd_order': [0, 2]}, [0.05, 0.1], n_trials=5,
+        base_parameters={'max_bp_iter': 10},
+        rng=np.random.default_rng(0)
+    )
+    assert len(calibration) == 4
+    assert all(calibration['n_trials'] == 5)
+    assert calibration['parameters'][0] == {'max_bp_iter': 10, 'osd_order': 0}
+
+    summary = summarize_calibration(calibration)
+    assert len(summary) == 2
+    assert all(summary['n_trials'] == 10)
+    assert all(summary['latency'] > 0)
+
+
+@pytest.fixture
+def input_data():
+    return {
+        'comments': '',
+        'ranges': {
+            'label': 'tuning',
+            'code': {
+                'name': 'Toric2DCode',
+                'parameters': [{'L_x': 3}, {'L_x': 4}]
+            },
+            'error_model': {
+                'name': 'PauliErrorModel',
+                'parameters': [{'r_x': 1/3, 'r_y': 1/3, 'r_z': 1/3}]
+            },
+            'decoder': {
+                'name': 'BeliefPropagationOSDDecoder',
+                'parameters': {'max_bp_iter': 1000, 'osd_order': 100}
+            },
+            'error_rate': [0.01, 0.05, 0.1, 0.2]
+        }
+    }
+
+
+def test_tune_input_dict(input_data):
+    tuned = tune_input_dict(
+        input_data, n_trials=3, parameter_grid={'osd_order': [0, 5]},
+        max_error_rates=2, rng=np.random.default_rng(0), verbose=False
+    )
+    assert input_data['ranges']['decoder']['parameters']['osd_order'] == 100
+
+    ranges = tuned['ranges']
+    if not isinstance(ranges, list):
+        ranges = [ranges]
+    codes = []
+    for sub_ranges in ranges:
+        parameters = sub_ranges['decoder']['parameters']
+        assert parameters['max_bp_iter'] == 1000
+        assert parameters['osd_order'] in [0, 5]
+        assert sub_ranges['error_rate'] == input_data['ranges']['error_rate']
+        codes += sub_ranges['code']['parameters']
+    assert codes == input_data['ranges']['code']['parameters']
+
+
+def test_tune_input_dict_needs_grid(input_data):
+    input_data['ranges']['decoder'] = {'name': 'MatchingDecoder'}
+    with pytest.raises(ValueError):
+        tune_input_dict(input_data, n_trials=1, verbose=False)
+
+
+def test_tune_input_dict_rejects_runs(input_data):
+    runs_data = {'runs': expand_input_ranges(input_data['ranges'])}
+    with pytest.raises(ValueError):
+        tune_input_dict(runs_data, n_trials=1, verbose=False)
+
+
+def test_tune_decoder_cli(input_data, tmpdir):
+    input_file = str(tmpdir.join('input.json'))
+    output_file = str(tmpdir.join('tuned.json'))
+    with open(input_file, 'w') as f:
+        json.dump(input_data, f)
+
+    result = CliRunner().invoke(cli, [
+        'tune-decoder', '-i', input_file, '-o', output_file, '-t', '2',
+        '--grid', '{"osd_order": [0, 5]}', '--max_error_rates', '1'
+    ])
+    assert result.exit_code == 0, result.output
+    assert 'Pareto front' in result.output
+
+    with open(output_file) as f:
+        tuned = json.load(f)
+    assert 'ranges' in tuned
+
+
+def test_tune_decoder_cli_keeps_input_file(input_data, tmpdir):
+    input_file = str(tmpdir.join('input.json'))
+    with open(input_file, 'w') as f:
+        json.dump(input_data, f)
+
+    result = CliRunner().invoke(cli, [
+        'tune-decoder', '-i', input_file, '-t', '2',
+        '--grid', '{"osd_order": [0, 5]}', '--max_error_rates', '1'
+    ])
+    assert result.exit_code == 0, result.output
+
+    with open(input_file) as f:
+        assert json.load(f) == input_data
+    with open(str(tmpdir.join('input-tuned.json'))) as f:
+        assert 'ranges' in json.load(f)
+
+
+def test_tune_decoder_cli_in_place(input_data, tmpdir):
+    input_file = str(tmpdir.join('input.json'))
+    with open(input_file, 'w') as f:
+        json.dump(input_data, f)
+    arguments = [
+        'tune-decoder', '-i', input_file, '-t', '2',
+        '--grid', '{"osd_order": [0, 5]}', '--max_error_rates', '1',
+        '--in-place'
+    ]
+
+    result = CliRunner().invoke(cli, arguments + ['-o', input_file])
+    assert result.exit_code != 0
+
+    result = CliRunner().invoke(cli, arguments)
+    assert result.exit_code == 0, result.output
+    with open(input_file) as f:
+        tuned = json.load(f)
+    # The hand-picked osd_order of 100 is not on the grid.
+    assert tuned != input_data
+    assert not tmpdir.join('input-tuned.json').exists()
+
+
+def test_tune_decoder_cli_rejects_runs(input_data, tmpdir):
+    input_file = str(tmpdir.join('input.json'))
+    with open(input_file, 'w') as f:
+        json.dump({'runs': expand_input_ranges(input_data['ranges'])}, f)
+
+    result = CliRunner().invoke(cli, [
+        'tune-decoder', '-i', input_file, '-t', '2',
+        '--grid', '{"osd_order": [0, 5]}'
+    ])
+    assert result.exit_code != 0
+    assert "'ranges'" in result.output
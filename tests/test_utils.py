@@ -4,7 +4,9 @@ import numpy as np
 from panqec.bsparse import from_array
 from panqec.utils import (
     sizeof_fmt, identity, NumpyEncoder, list_where_str, list_where, set_where,
-    format_polynomial, simple_print, find_nearest, get_label
+    format_polynomial, simple_print, find_nearest, get_label,
+    histogram_add, histogram_merge, histogram_quantile,
+    pattern_histogram_add, pattern_histogram_merge, pattern_histogram_arrays
 )
 
 
@@ -153,3 +155,68 @@ class TestGetLabel:
             'r_y': 0.33333333333333337,
             'r_z': 0.3333333333333333
         }) == 'PauliErrorModel(r_x=0.333333, r_y=0.333333, r_z=0.333333)'
+
+
+class TestHistogram:
+
+    def test_add_and_quantile(self):
+        histogram = {}
+        for value in range(1, 101):
+            histogram = histogram_add(histogram, value)
+        assert histogram['count'] == 100
+        assert histogram['sum'] == 5050
+        assert histogram['max'] == 100
+        # Quantiles are resolved up to the width of a bin.
+        assert 35 <= histogram_quantile(histogram, 0.5) <= 50
+        assert histogram_quantile(histogram, 1) == 100
+
+    def test_zero_values(self):
+        histogram = {}
+        for value in [0, 0, 0, 5]:
+            histogram = histogram_add(histogram, value)
+        assert histogram['bins']['zero'] == 3
+        assert histogram_quantile(histogram, 0.5) == 0
+
+    def test_merge(self):
+        first, second, both = {}, {}, {}
+        for value in [1, 2, 3]:
+            first = histogram_add(first, value)
+            both = histogram_add(both, value)
+        for value in [10, 20]:
+            second = histogram_add(second, value)
+            both = histogram_add(both, value)
+        assert histogram_merge(first, {}, second) == both
+
+    def test_empty_quantile_is_nan(self):
+        assert np.isnan(histogram_quantile({}, 0.5))
+
+
+class TestPatternHistogram:
+
+    def test_add_and_arrays(self):
+        histogram = pattern_histogram_add({}, np.array([
+            [0, 1, 0, 0], [0, 0, 0, 0], [0, 1, 0, 0]
+        ]))
+        histogram = pattern_histogram_add(histogram, np.zeros((2, 4)))
+        assert histogram == {'0000': 3, '0100': 2}
+
+        patterns, counts = pattern_histogram_arrays(histogram)
+        assert patterns.tolist() == [[0, 0, 0, 0], [0, 1, 0, 0]]
+        assert counts.tolist() == [3, 2]
+
+    def test_long_patterns_counted_by_sector(self):
+        patterns = np.zeros((3, 20), dtype=np.uint8)
+        patterns[0, 3] = 1
+        patterns[1, [3, 15]] = 1
+        histogram = pattern_histogram_add({}, patterns)
+        assert histogram == {'00': 1, '10': 1, '11': 1}
+
+    def test_merge(self):
+        merged = pattern_histogram_merge({'00': 1, '01': 2}, {}, {'01': 3})
+        assert merged == {'00': 1, '01': 5}
+
+    def test_empty(self):
+        assert pattern_histogram_add({}, np.zeros((0, 4))) == {}
+        patterns, counts = pattern_histogram_arrays({})
+        assert patterns.shape == (0, 0)
+        assert len(counts) == 0